@@ -12,9 +12,103 @@ sys.path.insert(0, current_dir)
 sys.path.insert(0, os.path.join(current_dir, 'tof'))
 sys.path.insert(0, os.path.join(current_dir, 'led_control'))
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import time
+import threading
+from typing import Optional, Dict, Any
+
+from tof_sampler import TOFSampler, RateMeter, STATUS_OK
+from tof_history import TOFHistory
+from tof_stream import Broadcaster, format_sse
+from tof_profiles import PROFILES, DEFAULT_PROFILE, LatencyTracker, describe_profiles
+from tof_jobs import JobManager
+from tof_stats import AVAILABLE_STATS, DEFAULT_STATS, compute_statistics, parse_stats
+from tof_filters import FilterChain
+from tof_array import TOFSensorArray, parse_array_spec
+from i2c_bus import I2CBusManager
+from tof_cache import ReadingCache
+from hardware_supervisor import HardwareSupervisor
+from tof_recorder import TOFRecorder, RECORD_DTYPE, list_segments, open_segment
+from tof_replay import ReplayTOFSensor
+from tof_synthetic import SyntheticTOFSensor
+from tof_events import DEFAULT_ZONES, ZoneDetector
+from tof_adaptive import AdaptiveRate
+from proximity_rules import DEFAULT_PROXIMITY_MAP, RuleTable, apply_rule
+from proximity_control import ProximityLoop
+from led_expressions import EXPRESSIONS
+from led_frames import FrameWriter, compile_frames, render_canvas
+from display_actor import DisplayActor, blink_duration
+from led_timeline import EASINGS, Timeline, timeline_from_request
+
+# Background sampler configuration (override through the environment)
+TOF_SAMPLER_ENABLED = os.environ.get("TOF_SAMPLER", "1") != "0"
+TOF_SAMPLE_RATE_HZ = float(os.environ.get("TOF_SAMPLE_RATE_HZ", "20"))
+# Adaptive rate: idle at the minimum, jump to the maximum on motion or a
+# zone change, decay back after the hold time
+TOF_ADAPTIVE = os.environ.get("TOF_ADAPTIVE", "0") != "0"
+TOF_ADAPTIVE_MIN_HZ = float(os.environ.get("TOF_ADAPTIVE_MIN_HZ", "5"))
+TOF_ADAPTIVE_MAX_HZ = float(os.environ.get("TOF_ADAPTIVE_MAX_HZ", "50"))
+TOF_ADAPTIVE_ACTIVITY_MM_S = float(os.environ.get("TOF_ADAPTIVE_ACTIVITY_MM_S", "250"))
+TOF_ADAPTIVE_HOLD_S = float(os.environ.get("TOF_ADAPTIVE_HOLD_S", "2"))
+TOF_ADAPTIVE_DECAY = float(os.environ.get("TOF_ADAPTIVE_DECAY", "0.8"))
+# "single" triggers one measurement per read; "continuous" keeps the sensor
+# ranging back-to-back and the sampler collects results as they complete
+TOF_RANGING_MODE = os.environ.get("TOF_RANGING_MODE", "single")
+TOF_INTER_MEASUREMENT_MS = float(os.environ.get("TOF_INTER_MEASUREMENT_MS", "0"))
+TOF_PROFILE = os.environ.get("TOF_PROFILE", DEFAULT_PROFILE)
+TOF_JOB_WORKERS = int(os.environ.get("TOF_JOB_WORKERS", "2"))
+# Filter chain applied to every sample, e.g. "median:5,ema:0.3,kalman:4:100"
+TOF_FILTERS = os.environ.get("TOF_FILTERS", "median:5")
+TOF_HISTORY_CAPACITY = int(os.environ.get("TOF_HISTORY_CAPACITY", "12000"))
+TOF_STREAM_MAX_CLIENTS = int(os.environ.get("TOF_STREAM_MAX_CLIENTS", "32"))
+# Distance zones for /tof/events: "name:upper_mm,...,last_name"
+TOF_EVENT_ZONES = os.environ.get("TOF_EVENT_ZONES", DEFAULT_ZONES)
+TOF_EVENT_HYSTERESIS_MM = float(os.environ.get("TOF_EVENT_HYSTERESIS_MM", "20"))
+TOF_EVENT_DWELL_MS = float(os.environ.get("TOF_EVENT_DWELL_MS", "50"))
+# Sensor array on the shared bus, e.g. "left:17:0x30,center:27:0x31,right:22:0x32"
+# (name:xshut_gpio:address); simulated automatically when there is no hardware
+TOF_ARRAY = os.environ.get("TOF_ARRAY", "")
+TOF_ARRAY_SIMULATED = os.environ.get("TOF_ARRAY_SIMULATED", "0") != "0"
+# GPIO wired to the primary sensor's XSHUT; required for a hardware array
+# while the primary sensor is on the same bus at 0x29
+TOF_PRIMARY_XSHUT = os.environ.get("TOF_PRIMARY_XSHUT", "")
+# Binary sample recording (see tof/tof_recorder.py for the file format)
+TOF_RECORD = os.environ.get("TOF_RECORD", "0") != "0"
+TOF_RECORD_DIR = os.environ.get("TOF_RECORD_DIR", os.path.join(current_dir, "recordings"))
+# Replay a recorded trace (segment, segment directory or CSV) instead of the
+# sensor; speed 0 serves samples back-to-back for reproducible benchmarks
+TOF_REPLAY = os.environ.get("TOF_REPLAY", "")
+TOF_REPLAY_SPEED = float(os.environ.get("TOF_REPLAY_SPEED", "1.0"))
+TOF_REPLAY_SENSOR = int(os.environ.get("TOF_REPLAY_SENSOR", "0"))
+TOF_REPLAY_LOOP = os.environ.get("TOF_REPLAY_LOOP", "1") != "0"
+
+# Noise model for the synthetic sensor used when there is no hardware and no
+# trace; an empty seed draws a different sequence on every start. Parsed when
+# the sensor is built, so a malformed value falls back to the defaults.
+TOF_SIM_SEED = os.environ.get("TOF_SIM_SEED", "")
+TOF_SIM_DISTANCE_MM = os.environ.get("TOF_SIM_DISTANCE_MM", "800")
+TOF_SIM_NOISE_MM = os.environ.get("TOF_SIM_NOISE_MM", "8")
+TOF_SIM_DRIFT_MM = os.environ.get("TOF_SIM_DRIFT_MM", "200")
+TOF_SIM_DROPOUT = os.environ.get("TOF_SIM_DROPOUT", "0")
+TOF_SIM_OUT_OF_RANGE = os.environ.get("TOF_SIM_OUT_OF_RANGE", "0")
+TOF_SIM_LATENCY_MS = os.environ.get("TOF_SIM_LATENCY_MS", "")
+
+# Proximity reaction: a rule table (JSON file, or simple bands) and the
+# closed loop that applies it continuously (PROXIMITY_LOOP=1 starts it)
+PROXIMITY_RULES = os.environ.get("PROXIMITY_RULES", "")
+PROXIMITY_MAP = os.environ.get("PROXIMITY_MAP", DEFAULT_PROXIMITY_MAP)
+PROXIMITY_RATE_HZ = float(os.environ.get("PROXIMITY_RATE_HZ", "20"))
+PROXIMITY_HYSTERESIS_MM = float(os.environ.get("PROXIMITY_HYSTERESIS_MM", "20"))
+PROXIMITY_LOOP = os.environ.get("PROXIMITY_LOOP", "0") != "0"
+
+# Write precompiled MAX7219 register frames instead of drawing through luma's canvas
+LED_FAST_FRAMES = os.environ.get("LED_FAST_FRAMES", "1") != "0"
+
+WS_ENABLED = os.environ.get("WS_ENABLED", "1") != "0"
+WS_PORT = int(os.environ.get("WS_PORT", "8765"))
+
+DEBUG = True
 
 # Import our modules with better error handling
 tof_sensor = None
@@ -27,20 +121,37 @@ try:
     import board
     import busio
     import adafruit_vl53l0x
-    from typing import Optional, Dict, Any
     
     class TOFSensor:
-        def __init__(self):
+        def __init__(self, ranging_mode: str = "single", inter_measurement_ms: float = 0,
+                     profile: str = DEFAULT_PROFILE):
             self.sensor = None
+            self.i2c = None
             self.is_initialized = False
             self.last_reading = None
             self.last_error = None
-            self.initialize_sensor()
+            self.ranging_mode = "single"
+            self.inter_measurement_ms = 0
+            self.profile = DEFAULT_PROFILE
+            self.rate_meter = RateMeter()
+            self.latency = LatencyTracker()
+            # Sampler, jobs, request threads and profile changes all share
+            # one bus; concurrent reads are coalesced into one measurement
+            self.bus = I2CBusManager()
+            # Repeated read failures open the circuit: reads then fail fast
+            # while the sensor is re-initialized in the background
+            self.supervisor = HardwareSupervisor("TOF sensor", self._reinitialize)
+            if not self.initialize_sensor():
+                self.supervisor.trip(self.last_error)
+            self.apply_profile(profile)
+            self.set_ranging_mode(ranging_mode, inter_measurement_ms)
         
         def initialize_sensor(self) -> bool:
             try:
-                i2c = busio.I2C(board.SCL, board.SDA)
-                self.sensor = adafruit_vl53l0x.VL53L0X(i2c)
+                # Keep the bus object across retries; the sensor array may share it
+                if self.i2c is None:
+                    self.i2c = busio.I2C(board.SCL, board.SDA)
+                self.sensor = adafruit_vl53l0x.VL53L0X(self.i2c)
                 self.is_initialized = True
                 return True
             except Exception as e:
@@ -48,18 +159,90 @@ try:
                 print(f"TOF sensor init failed: {e}")
                 return False
         
+        def set_ranging_mode(self, mode: str, inter_measurement_ms: float = 0) -> bool:
+            """Switch between single-shot and continuous (back-to-back) ranging.
+            
+            The driver only offers back-to-back continuous ranging, so a
+            non-zero inter-measurement period is applied by the reader pacing
+            its reads; the sensor itself keeps ranging at its timing budget.
+            """
+            if mode not in ("single", "continuous"):
+                return False
+            try:
+                with self.bus.transaction():
+                    if self.sensor:
+                        if mode == "continuous" and self.ranging_mode != "continuous":
+                            self.sensor.start_continuous()
+                        elif mode == "single" and self.ranging_mode == "continuous":
+                            self.sensor.stop_continuous()
+                self.ranging_mode = mode
+                self.inter_measurement_ms = max(0, inter_measurement_ms)
+                return True
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"TOF ranging mode change failed: {e}")
+                return False
+        
+        def apply_profile(self, name: str) -> bool:
+            """Set the timing budget and signal limit for a named profile"""
+            profile = PROFILES.get(name)
+            if profile is None:
+                return False
+            try:
+                with self.bus.transaction():
+                    if self.sensor:
+                        # The budget can only change while the sensor is idle
+                        continuous = self.ranging_mode == "continuous"
+                        if continuous:
+                            self.sensor.stop_continuous()
+                        self.sensor.measurement_timing_budget = profile.timing_budget_us
+                        self.sensor.signal_rate_limit = profile.signal_rate_limit
+                        if continuous:
+                            self.sensor.start_continuous()
+                self.profile = name
+                return True
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"TOF profile change failed: {e}")
+                return False
+        
+        def _reinitialize(self) -> bool:
+            """Recreate the driver and restore the profile and ranging mode"""
+            with self.bus.transaction():
+                mode = self.ranging_mode
+                if not self.initialize_sensor():
+                    return False
+                # A fresh driver starts idle in single-shot mode
+                self.ranging_mode = "single"
+                return (self.apply_profile(self.profile) and
+                        self.set_ranging_mode(mode, self.inter_measurement_ms))
+        
+        def _read_range(self) -> int:
+            # In continuous mode the driver waits for the measurement
+            # already in flight instead of triggering a new one
+            start = time.perf_counter()
+            try:
+                distance = self.sensor.range
+            except Exception as e:
+                # Counted here, once per hardware read, not once per waiter
+                self.supervisor.record_failure(str(e))
+                raise
+            self.supervisor.record_success()
+            self.latency.record(self.profile, (time.perf_counter() - start) * 1000)
+            self.rate_meter.tick()
+            return distance
+        
         def read_distance(self) -> Optional[int]:
+            if not self.supervisor.allow():
+                self.last_error = f"TOF sensor offline, retrying: {self.supervisor.last_error}"
+                return None
+            if not self.sensor:
+                self.last_error = self.last_error or "TOF sensor not initialized"
+                return None
             try:
-                if self.sensor:
-                    distance = self.sensor.range
-                    self.last_reading = distance
-                    return distance
-                else:
-                    # Mock reading
-                    import random
-                    distance = random.randint(100, 2000)
-                    self.last_reading = distance
-                    return distance
+                distance = self.bus.read("range", self._read_range)
+                self.last_reading = distance
+                return distance
             except Exception as e:
                 self.last_error = str(e)
                 return None
@@ -70,10 +253,16 @@ try:
                 "hardware_available": True,
                 "last_reading": self.last_reading,
                 "last_error": self.last_error,
+                "ranging_mode": self.ranging_mode,
+                "inter_measurement_ms": self.inter_measurement_ms,
+                "effective_sample_rate_hz": self.rate_meter.rate_hz,
+                "profile": self.profile,
+                "circuit": self.supervisor.get_status(),
                 "timestamp": time.time()
             }
         
-        def read_multiple(self, count: int = 10, interval: float = 0.1) -> Dict[str, Any]:
+        def read_multiple(self, count: int = 10, interval: float = 0.1,
+                          stats=DEFAULT_STATS) -> Dict[str, Any]:
             readings = []
             start_time = time.time()
             
@@ -87,26 +276,18 @@ try:
                     })
                 time.sleep(interval)
             
-            if readings:
-                distances = [r["distance_mm"] for r in readings]
-                stats = {
-                    "min": min(distances),
-                    "max": max(distances),
-                    "avg": sum(distances) / len(distances),
-                    "count": len(distances)
-                }
-            else:
-                stats = {"min": None, "max": None, "avg": None, "count": 0}
-            
+            distances = [r["distance_mm"] for r in readings]
             return {
                 "readings": readings,
-                "statistics": stats,
+                "statistics": compute_statistics(distances, stats=stats, failed=count - len(readings)),
                 "duration_seconds": time.time() - start_time
             }
     
-    tof_sensor = TOFSensor()
-    tof_available = True
-    print("✅ TOF sensor module loaded successfully")
+    # A replayed trace stands in for the sensor; leave the bus alone
+    if not TOF_REPLAY:
+        tof_sensor = TOFSensor(TOF_RANGING_MODE, TOF_INTER_MEASUREMENT_MS, TOF_PROFILE)
+        tof_available = True
+        print("✅ TOF sensor module loaded successfully")
     
 except ImportError as e:
     tof_available = False
@@ -119,166 +300,155 @@ try:
     # Try importing LED controller components directly
     from luma.core.interface.serial import spi, noop
     from luma.led_matrix.device import max7219
-    from luma.core.render import canvas
-    import threading
     
     class LEDController:
+        CASCADED = 2
+        # Intensity luma sets when it initializes the matrix
+        BRIGHTNESS = 0x70
+        
         def __init__(self):
             self.device = None
             self.is_initialized = False
+            self.last_error = None
             self.current_expression = "normal"
-            self.animation_thread = None
-            self.stop_animation = False
             
-            # Eye expressions (16x8 each)
-            self.expressions = {
-                "normal": [
-                    [0,0,1,1,1,1,0,0,   0,0,1,1,1,1,0,0],
-                    [0,1,0,0,0,0,1,0,   0,1,0,0,0,0,1,0],
-                    [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
-                    [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
-                    [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
-                    [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
-                    [0,1,0,0,0,0,1,0,   0,1,0,0,0,0,1,0],
-                    [0,0,1,1,1,1,0,0,   0,0,1,1,1,1,0,0]
-                ],
-                "happy": [
-                    [0,0,1,1,1,1,0,0,   0,0,1,1,1,1,0,0],
-                    [0,1,0,0,0,0,1,0,   0,1,0,0,0,0,1,0],
-                    [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
-                    [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
-                    [1,0,0,1,1,0,0,1,   1,0,0,1,1,0,0,1],
-                    [0,1,1,0,0,1,1,0,   0,1,1,0,0,1,1,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0]
-                ],
-                "sad": [
-                    [0,0,1,1,1,1,0,0,   0,0,1,1,1,1,0,0],
-                    [0,1,0,0,0,0,1,0,   0,1,0,0,0,0,1,0],
-                    [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
-                    [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
-                    [0,1,0,0,0,0,1,0,   0,1,0,0,0,0,1,0],
-                    [0,0,1,0,0,1,0,0,   0,0,1,0,0,1,0,0],
-                    [0,0,0,1,1,0,0,0,   0,0,0,1,1,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0]
-                ],
-                "wink": [
-                    [0,0,1,1,1,1,0,0,   0,0,0,0,0,0,0,0],
-                    [0,1,0,0,0,0,1,0,   0,0,0,0,0,0,0,0],
-                    [1,0,0,0,0,0,0,1,   0,0,1,1,1,1,0,0],
-                    [1,0,0,0,0,0,0,1,   0,1,0,0,0,0,1,0],
-                    [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
-                    [1,0,0,0,0,0,0,1,   0,0,0,0,0,0,0,0],
-                    [0,1,0,0,0,0,1,0,   0,0,0,0,0,0,0,0],
-                    [0,0,1,1,1,1,0,0,   0,0,0,0,0,0,0,0]
-                ],
-                "love": [
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [0,1,1,0,0,1,1,0,   0,1,1,0,0,1,1,0],
-                    [1,1,1,1,1,1,1,1,   1,1,1,1,1,1,1,1],
-                    [1,1,1,1,1,1,1,1,   1,1,1,1,1,1,1,1],
-                    [0,1,1,1,1,1,1,0,   0,1,1,1,1,1,1,0],
-                    [0,0,1,1,1,1,0,0,   0,0,1,1,1,1,0,0],
-                    [0,0,0,1,1,0,0,0,   0,0,0,1,1,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0]
-                ],
-                "closed": [
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [1,1,1,1,1,1,1,1,   1,1,1,1,1,1,1,1],
-                    [1,1,1,1,1,1,1,1,   1,1,1,1,1,1,1,1],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0]
-                ],
-                "off": [
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
-                    [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0]
-                ]
-            }
+            # Eye expressions (16x8 each), compiled once into register frames
+            self.expressions = dict(EXPRESSIONS)
+            self.frames = compile_frames(self.expressions, self.CASCADED)
+            self.fast_frames = LED_FAST_FRAMES
+            self.frame_writer = None
+            # Set when the SPI driver itself is missing (e.g. no spidev off the Pi)
+            self.driver_error: Optional[str] = None
+            
+            # The only thread that draws; callers queue commands for it.
+            # It starts with the other background services.
+            self.actor = DisplayActor(self._show, self._set_brightness, self.BRIGHTNESS,
+                                      default_expression=self.current_expression)
             
-            self.initialize_device()
+            # Redraw the current expression once the matrix comes back
+            self.supervisor = HardwareSupervisor(
+                "LED matrix", self.initialize_device,
+                on_recover=lambda: self.display_expression(self.current_expression))
+            if not self.initialize_device():
+                if self.driver_error:
+                    # Retrying cannot install a library; stay in mock mode
+                    print("   Falling back to mock mode for LED controller")
+                else:
+                    print("   Falling back to mock mode for LED controller; retrying in the background")
+                    self.supervisor.trip(self.last_error)
         
         def initialize_device(self) -> bool:
             try:
                 serial = spi(port=0, device=0, gpio=noop())
-                self.device = max7219(serial, cascaded=2, block_orientation=0, rotate=0)
+                self.device = max7219(serial, cascaded=self.CASCADED, block_orientation=0, rotate=0)
+                # New device, unknown contents: the first frame goes out in full
+                self.frame_writer = FrameWriter(self.device)
                 self.is_initialized = True
                 print("✅ LED matrix hardware initialized successfully")
                 return True
+            except ImportError as e:
+                print(f"⚠️ LED matrix driver not available: {e}")
+                self.last_error = self.driver_error = str(e)
+                return False
             except Exception as e:
                 print(f"⚠️ LED matrix hardware init failed: {e}")
-                print("   Falling back to mock mode for LED controller")
+                self.last_error = str(e)
                 self.is_initialized = False
                 self.device = None
                 return False
         
         def display_expression(self, expression: str) -> bool:
+            """Queue an expression for the display thread; False if unknown or the queue is full"""
             if expression not in self.expressions:
                 return False
             
+            self.current_expression = expression
+            return self.actor.set(expression)
+        
+        def _show(self, expression: str) -> bool:
+            """Draw on the matrix; called on the display thread only"""
             self.current_expression = expression
             eye_pattern = self.expressions[expression]
             
             if self.device and self.is_initialized:
+                # The matrix failed mid-run; skip SPI until it is re-initialized
+                if not self.supervisor.allow():
+                    return False
                 try:
-                    with canvas(self.device) as draw:
-                        for y, row in enumerate(eye_pattern):
-                            for x, pixel in enumerate(row):
-                                if pixel:
-                                    draw.point((x, y), fill="white")
+                    if self.fast_frames:
+                        # Only the digit registers that differ from what is shown
+                        self.frame_writer.write(self.frames[expression])
+                    else:
+                        render_canvas(self.device, eye_pattern)
+                        self.frame_writer.invalidate()
+                    self.supervisor.record_success()
                     return True
                 except Exception as e:
                     print(f"Error displaying expression: {e}")
+                    self.last_error = str(e)
+                    # A partial write leaves the matrix in an unknown state
+                    self.frame_writer.invalidate()
+                    self.supervisor.record_failure(self.last_error)
                     return False
             else:
                 print(f"🎭 Mock LED: Displaying expression '{expression}'")
                 return True
         
-        def blink(self, base_expression: str = None, duration: float = 0.15) -> bool:
-            if base_expression is None:
-                base_expression = self.current_expression
+        def _set_brightness(self, level: int) -> bool:
+            """Set the matrix intensity; called on the display thread only"""
+            if not (self.device and self.is_initialized):
+                return True
+            if not self.supervisor.allow():
+                return False
+            try:
+                self.device.contrast(level)
+                self.supervisor.record_success()
+                return True
+            except Exception as e:
+                self.last_error = str(e)
+                self.supervisor.record_failure(self.last_error)
+                return False
+        
+        def blink(self, base_expression: str = None, duration: float = 0.15,
+                  wait_timeout: Optional[float] = None) -> bool:
+            """Queue a blink; it preempts a running animation, which then resumes.
             
-            if base_expression not in self.expressions:
+            With ``wait_timeout`` the call returns once the eyes reopened and
+            raises TimeoutError if that takes longer.
+            """
+            if base_expression is not None and base_expression not in self.expressions:
                 return False
             
-            print(f"👀 LED Blink: {base_expression} -> closed -> {base_expression} (duration: {duration}s)")
-            self.display_expression("closed")
-            time.sleep(duration)
-            self.display_expression(base_expression)
+            print(f"👀 LED Blink: closed -> {base_expression or 'current'} (duration: {duration}s)")
+            done = threading.Event() if wait_timeout is not None else None
+            if not self.actor.blink(base_expression, duration, done):
+                return False
+            if done is not None and not done.wait(wait_timeout):
+                raise TimeoutError(f"Blink did not finish within {wait_timeout}s")
             return True
         
-        def start_animation(self, expressions: list, duration: float = 1.0, loop: bool = True):
-            self.stop_animation = False
-            
-            def animate():
-                while not self.stop_animation:
-                    for expr in expressions:
-                        if self.stop_animation:
-                            break
-                        self.display_expression(expr)
-                        time.sleep(duration)
-                    if not loop:
-                        break
-            
-            if self.animation_thread and self.animation_thread.is_alive():
-                self.stop_animation = True
-                self.animation_thread.join()
+        def start_animation(self, expressions: list, duration: float = 1.0, loop: bool = True) -> bool:
+            """Cycle through expressions, each held for ``duration`` seconds"""
+            try:
+                timeline = Timeline.from_expressions(expressions, duration, loop)
+            except (TypeError, ValueError) as e:
+                print(f"Invalid animation: {e}")
+                return False
+            return self.play_timeline(timeline)
+        
+        def play_timeline(self, timeline: Timeline, start_at: Optional[float] = None) -> bool:
+            """Play a keyframe timeline, replacing any running animation.
             
-            self.animation_thread = threading.Thread(target=animate)
-            self.animation_thread.start()
+            ``start_at`` (Unix time) lets several units run the same timeline
+            in phase; a time in the past joins it mid-way.
+            """
+            start_ns = None
+            if start_at is not None:
+                start_ns = time.monotonic_ns() + int((start_at - time.time()) * 1e9)
+            return self.actor.animate(timeline, start_ns)
         
         def stop_current_animation(self):
-            self.stop_animation = True
-            if self.animation_thread and self.animation_thread.is_alive():
-                self.animation_thread.join()
+            self.actor.stop_animation()
         
         def get_status(self) -> Dict[str, Any]:
             return {
@@ -286,7 +456,12 @@ try:
                 "hardware_available": self.device is not None,
                 "current_expression": self.current_expression,
                 "available_expressions": list(self.expressions.keys()),
-                "animation_running": self.animation_thread is not None and self.animation_thread.is_alive()
+                "animation_running": self.actor.animation_running,
+                "display": self.actor.get_status(),
+                "frame_path": "registers" if self.fast_frames else "canvas",
+                "frame_writer": self.frame_writer.get_status() if self.frame_writer else None,
+                "driver_error": self.driver_error,
+                "circuit": self.supervisor.get_status()
             }
     
     led_controller = LEDController()
@@ -303,62 +478,128 @@ except Exception as e:
     led_available = False
     print(f"❌ LED controller initialization failed: {e}")
 
-# Create mock classes if hardware not available
-if not tof_available:
-    class MockTOFSensor:
-        def __init__(self):
-            self.is_initialized = False
-            self.last_reading = None
-            self.last_error = "Hardware not available"
-        
-        def read_distance(self):
-            import random
-            self.last_reading = random.randint(100, 2000)
-            return self.last_reading
-        
-        def get_status(self):
-            return {
-                "initialized": False,
-                "hardware_available": False,
-                "last_reading": self.last_reading,
-                "last_error": self.last_error,
-                "timestamp": time.time()
-            }
-        
-        def read_multiple(self, count=10, interval=0.1):
-            readings = []
-            for i in range(count):
-                distance = self.read_distance()
-                readings.append({
-                    "reading": i + 1,
-                    "distance_mm": distance,
-                    "timestamp": time.time()
-                })
-                time.sleep(interval)
-            
-            distances = [r["distance_mm"] for r in readings]
-            return {
-                "readings": readings,
-                "statistics": {
-                    "min": min(distances),
-                    "max": max(distances),
-                    "avg": sum(distances) / len(distances),
-                    "count": len(distances)
-                },
-                "duration_seconds": count * interval
-            }
-    
-    tof_sensor = MockTOFSensor()
+if TOF_REPLAY:
+    try:
+        tof_sensor = ReplayTOFSensor.from_file(
+            TOF_REPLAY, sensor_id=TOF_REPLAY_SENSOR, speed=TOF_REPLAY_SPEED, loop=TOF_REPLAY_LOOP,
+            ranging_mode=TOF_RANGING_MODE, inter_measurement_ms=TOF_INTER_MEASUREMENT_MS,
+            profile=TOF_PROFILE)
+        print(f"✅ Replaying TOF trace {TOF_REPLAY} at speed {TOF_REPLAY_SPEED}")
+    except (OSError, ValueError) as e:
+        print(f"❌ TOF trace replay failed: {e}")
+
+# Without hardware or a trace, a synthetic sensor with hardware-like timing
+if tof_sensor is None:
+    sensor_settings = dict(ranging_mode=TOF_RANGING_MODE, inter_measurement_ms=TOF_INTER_MEASUREMENT_MS,
+                           profile=TOF_PROFILE)
+    try:
+        tof_sensor = SyntheticTOFSensor(
+            seed=int(TOF_SIM_SEED) if TOF_SIM_SEED else None, distance_mm=float(TOF_SIM_DISTANCE_MM),
+            noise_mm=float(TOF_SIM_NOISE_MM), drift_mm=float(TOF_SIM_DRIFT_MM),
+            dropout_rate=float(TOF_SIM_DROPOUT), out_of_range_rate=float(TOF_SIM_OUT_OF_RANGE),
+            latency_ms=float(TOF_SIM_LATENCY_MS) if TOF_SIM_LATENCY_MS else None, **sensor_settings)
+    except ValueError as e:
+        print(f"⚠️  Invalid TOF_SIM_* setting ({e}); using the default noise model")
+        tof_sensor = SyntheticTOFSensor(**sensor_settings)
+    print(f"🎭 Using synthetic TOF sensor (seed={tof_sensor.seed if tof_sensor.seed is not None else 'random'})")
+
+# A single sampler owns the sensor bus; request handlers read its latest sample.
+# In continuous mode it free-runs (or paces to the inter-measurement period)
+# and picks up each measurement as the sensor completes it.
+if tof_sensor.ranging_mode == "continuous":
+    tof_sample_rate = 1000.0 / tof_sensor.inter_measurement_ms if tof_sensor.inter_measurement_ms else None
+else:
+    tof_sample_rate = TOF_SAMPLE_RATE_HZ
+try:
+    tof_filter_chain = FilterChain.parse(TOF_FILTERS)
+except ValueError as e:
+    print(f"⚠️  Invalid TOF_FILTERS ({e}); running without filters")
+    tof_filter_chain = FilterChain([])
+tof_rate_policy = None
+if TOF_ADAPTIVE:
+    try:
+        tof_rate_policy = AdaptiveRate(TOF_ADAPTIVE_MIN_HZ, TOF_ADAPTIVE_MAX_HZ, TOF_ADAPTIVE_ACTIVITY_MM_S,
+                                       TOF_ADAPTIVE_HOLD_S, TOF_ADAPTIVE_DECAY)
+    except ValueError as e:
+        print(f"⚠️  Invalid adaptive rate settings ({e}); sampling at a fixed rate")
+tof_sampler = TOFSampler(tof_sensor, rate_hz=tof_sample_rate, filter_chain=tof_filter_chain,
+                         rate_policy=tof_rate_policy) if TOF_SAMPLER_ENABLED else None
+tof_history = TOFHistory(TOF_HISTORY_CAPACITY)
+tof_cache = ReadingCache()
+tof_recorder = TOFRecorder(TOF_RECORD_DIR)
+tof_broadcaster = Broadcaster(TOF_STREAM_MAX_CLIENTS)
+try:
+    tof_zones = ZoneDetector(TOF_EVENT_ZONES, TOF_EVENT_HYSTERESIS_MM, TOF_EVENT_DWELL_MS)
+except ValueError as e:
+    print(f"⚠️  Invalid TOF zone settings ({e}); using the default zones")
+    tof_zones = ZoneDetector(DEFAULT_ZONES)
+tof_event_broadcaster = Broadcaster(TOF_STREAM_MAX_CLIENTS)
+
+# Long sampling windows run on a small dedicated pool, never on request threads
+tof_jobs = JobManager(tof_sensor.read_distance, max_workers=TOF_JOB_WORKERS)
+
+def publish_reading(reading):
+    """Format each sample once and fan it out to every stream subscriber"""
+    if tof_broadcaster.subscriber_count:
+        tof_broadcaster.publish(format_sse({
+            "distance_mm": reading.distance_mm,
+            "filtered_mm": reading.filtered_mm,
+            "status": reading.status,
+            "timestamp": reading.timestamp
+        }))
+
+def publish_zone_event(event):
+    if tof_event_broadcaster.subscriber_count:
+        tof_event_broadcaster.publish(format_sse(event.to_dict(), event=event.kind))
+
+tof_zones.subscribe(publish_zone_event)
+if tof_rate_policy:
+    # Someone entering a zone is activity even when the motion is slow
+    tof_zones.subscribe(lambda event: tof_rate_policy.boost())
+
+if tof_sampler:
+    tof_sampler.add_listener(tof_history.append)
+    tof_sampler.add_listener(tof_cache.update)
+    tof_sampler.add_listener(tof_recorder.record)
+    tof_sampler.add_listener(publish_reading)
+    tof_sampler.add_listener(tof_zones.update)
+
+# Optional multi-sensor array. On hardware it shares the primary sensor's
+# busio.I2C object and bus manager; addresses are assigned when the array starts.
+tof_array = None
+if TOF_ARRAY:
+    try:
+        array_specs = parse_array_spec(TOF_ARRAY)
+        array_budget = PROFILES[tof_sensor.profile].timing_budget_us
+        if tof_available and not TOF_ARRAY_SIMULATED:
+            primary_xshut = int(TOF_PRIMARY_XSHUT) if TOF_PRIMARY_XSHUT else None
+            if primary_xshut is None and tof_sensor.sensor is not None:
+                # Booting the array would readdress the primary along with the first array sensor
+                raise ValueError("the primary TOF sensor answers at 0x29; wire its XSHUT "
+                                 "and set TOF_PRIMARY_XSHUT")
+            if primary_xshut is not None and primary_xshut in [spec.xshut_pin for spec in array_specs]:
+                raise ValueError(f"TOF_PRIMARY_XSHUT GPIO {primary_xshut} is used by an array sensor")
+            tof_array = TOFSensorArray.from_hardware(array_specs, i2c=tof_sensor.i2c,
+                                                     primary_xshut=primary_xshut,
+                                                     timing_budget_us=array_budget, bus=tof_sensor.bus,
+                                                     reinit_primary=tof_sensor._reinitialize)
+        else:
+            tof_array = TOFSensorArray.simulated_array(array_specs, timing_budget_us=array_budget)
+    except (ValueError, ImportError) as e:
+        print(f"⚠️  TOF sensor array not available: {e}")
+
+if tof_array:
+    # Sensor id 0 is the primary sensor; array sensors follow in spec order
+    for member in tof_array.members:
+        tof_recorder.sensor_names[member.index + 1] = member.name
+    tof_array.add_listener(lambda member, reading: tof_recorder.record(reading, member.index + 1))
 
 if not led_available:
     class MockLEDController:
         def __init__(self):
             self.is_initialized = False
             self.current_expression = "normal"
-            self.expressions = {
-                "normal": [], "happy": [], "sad": [], "wink": [], 
-                "love": [], "closed": [], "off": []
-            }
+            self.expressions = dict(EXPRESSIONS)
         
         def display_expression(self, expression):
             if expression in self.expressions:
@@ -367,12 +608,17 @@ if not led_available:
                 return True
             return False
         
-        def blink(self, base_expression=None, duration=0.15):
+        def blink(self, base_expression=None, duration=0.15, wait_timeout=None):
             print(f"Mock LED: Blinking for {duration}s")
             return True
         
         def start_animation(self, expressions, duration=1.0, loop=True):
             print(f"Mock LED: Starting animation with {expressions}")
+            return True
+        
+        def play_timeline(self, timeline, start_at=None):
+            print(f"Mock LED: Starting timeline with {len(timeline.keyframes)} keyframes")
+            return True
         
         def stop_current_animation(self):
             print("Mock LED: Stopping animation")
@@ -388,6 +634,36 @@ if not led_available:
     
     led_controller = MockLEDController()
 
+def load_proximity_rules() -> RuleTable:
+    expressions = led_controller.expressions
+    if PROXIMITY_RULES:
+        try:
+            return RuleTable.load(PROXIMITY_RULES, expressions)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Invalid PROXIMITY_RULES file ({e}); using PROXIMITY_MAP")
+    try:
+        return RuleTable.parse(PROXIMITY_MAP, expressions)
+    except ValueError as e:
+        print(f"⚠️  Invalid PROXIMITY_MAP ({e}); using the default bands")
+        return RuleTable.parse(DEFAULT_PROXIMITY_MAP)
+
+proximity_loop = ProximityLoop(lambda: tof_sampler.latest,
+                               lambda rule, previous: apply_rule(led_controller, rule, previous),
+                               load_proximity_rules(), rate_hz=PROXIMITY_RATE_HZ,
+                               hysteresis_mm=PROXIMITY_HYSTERESIS_MM)
+if tof_rate_policy:
+    # Idle samples arrive at the minimum rate; they are still current
+    proximity_loop.stale_ms = max(proximity_loop.stale_ms, 2000 / tof_rate_policy.min_hz)
+
+# WebSocket channel shares the sampler and LED controller with the Flask app
+ws_server = None
+if WS_ENABLED:
+    try:
+        from ws_server import WebSocketServer
+        ws_server = WebSocketServer(led_controller, tof_sampler, port=WS_PORT)
+    except ImportError as e:
+        print(f"⚠️  WebSocket channel not available: {e}")
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for web interface
 
@@ -417,10 +693,32 @@ def get_combined_status():
     status = {
         "timestamp": time.time(),
         "tof_sensor": tof_sensor.get_status() if tof_sensor else {"available": False},
-        "led_controller": led_controller.get_status() if led_controller else {"available": False}
+        "i2c_bus": tof_sensor.bus.get_status() if tof_sensor else {"available": False},
+        "tof_sampler": tof_sampler.get_status() if tof_sampler else {"enabled": False},
+        "tof_history": tof_history.get_status(),
+        "tof_cache": tof_cache.get_status(),
+        "tof_recorder": tof_recorder.get_status(),
+        "tof_stream": tof_broadcaster.get_status(),
+        "tof_events": dict(tof_zones.get_status(), stream=tof_event_broadcaster.get_status()),
+        "tof_jobs": tof_jobs.get_status(),
+        "tof_array": tof_array.get_status() if tof_array else {"enabled": False},
+        "proximity_loop": proximity_loop.get_status(),
+        "led_controller": led_controller.get_status() if led_controller else {"available": False},
+        "websocket": ws_server.get_status() if ws_server else {"enabled": False}
     }
     return jsonify(status)
 
+def get_max_age_ms() -> float:
+    """Staleness a client accepts, from ?max_age_ms (0 forces a fresh read).
+    
+    Without the parameter any sampler sample is fresh enough, and with no
+    sampler running every request reads the sensor, as before.
+    """
+    max_age_ms = request.args.get('max_age_ms', type=float)
+    if max_age_ms is None:
+        return float("inf") if tof_sampler and tof_sampler.running else 0.0
+    return max(0.0, min(max_age_ms, 60000.0))
+
 # === TOF Sensor Endpoints ===
 @app.route('/tof/distance', methods=['GET'])
 def get_distance():
@@ -428,19 +726,27 @@ def get_distance():
     if not tof_sensor:
         return jsonify({"success": False, "error": "TOF sensor not available"}), 503
     
-    distance = tof_sensor.read_distance()
-    if distance is not None:
+    max_age_ms = get_max_age_ms()
+    entry, cache_hit = tof_cache.get_or_read(max_age_ms, tof_sensor.read_distance)
+    reading = entry.reading
+    if reading.status == STATUS_OK:
         return jsonify({
             "success": True,
-            "distance_mm": distance,
-            "timestamp": time.time()
+            "distance_mm": reading.distance_mm,
+            "filtered_mm": reading.filtered_mm,
+            "timestamp": reading.timestamp,
+            "age_ms": reading.age_ms(),
+            "cache_hit": cache_hit,
+            "source": entry.source
         })
-    else:
-        return jsonify({
-            "success": False,
-            "error": tof_sensor.last_error,
-            "timestamp": time.time()
-        }), 500
+    return jsonify({
+        "success": False,
+        "error": tof_sensor.last_error,
+        "timestamp": reading.timestamp,
+        "age_ms": reading.age_ms(),
+        "cache_hit": cache_hit,
+        "source": entry.source
+    }), 500
 
 @app.route('/tof/multiple', methods=['GET'])
 def get_multiple_readings():
@@ -454,10 +760,356 @@ def get_multiple_readings():
     count = max(1, min(count, 100))
     interval = max(0.01, min(interval, 5.0))
     
-    result = tof_sensor.read_multiple(count, interval)
+    try:
+        stats = parse_stats(request.args.get('stats'))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e), "available": list(AVAILABLE_STATS)}), 400
+    
+    result = tof_sensor.read_multiple(count, interval, stats)
+    result["success"] = True
+    return jsonify(result)
+
+@app.route('/tof/jobs', methods=['POST'])
+def create_job():
+    """Start a background multi-reading job and return its id immediately"""
+    if not tof_sensor:
+        return jsonify({"success": False, "error": "TOF sensor not available"}), 503
+    
+    data = request.get_json() or {}
+    try:
+        count = int(data.get('count', 10))
+        interval = float(data.get('interval', 0.1))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "count and interval must be numbers"}), 400
+    
+    count = max(1, min(count, 10000))
+    interval = max(0.01, min(interval, 60.0))
+    
+    job = tof_jobs.submit(count, interval)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": f"Too many pending jobs (max {tof_jobs.max_pending})"
+        }), 429
+    
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "count": count,
+        "interval": interval,
+        "status_url": f"/tof/jobs/{job.id}"
+    }), 202
+
+@app.route('/tof/jobs', methods=['GET'])
+def list_jobs():
+    """List recent sampling jobs without their readings"""
+    return jsonify({
+        "success": True,
+        "jobs": [job.to_dict(include_readings=False) for job in tof_jobs.list_jobs()]
+    })
+
+@app.route('/tof/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get progress and results of a sampling job"""
+    job = tof_jobs.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": f"Unknown job: {job_id}"}), 404
+    
+    try:
+        stats = parse_stats(request.args.get('stats'))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e), "available": list(AVAILABLE_STATS)}), 400
+    
+    result = job.to_dict(stats=stats)
     result["success"] = True
     return jsonify(result)
 
+@app.route('/tof/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running sampling job"""
+    job = tof_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": f"Unknown job: {job_id}"}), 404
+    
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+        "timestamp": time.time()
+    })
+
+@app.route('/tof/history', methods=['GET'])
+def get_history():
+    """Get recent sampled readings from the history buffer"""
+    if not tof_sensor:
+        return jsonify({"success": False, "error": "TOF sensor not available"}), 503
+    if not tof_sampler or not tof_sampler.running:
+        return jsonify({"success": False, "error": "TOF sampler not running"}), 503
+    
+    seconds = request.args.get('seconds', 10.0, type=float)
+    max_points = request.args.get('max_points', 500, type=int)
+    
+    seconds = max(0.1, min(seconds, 3600.0))
+    max_points = max(1, min(max_points, 5000))
+    
+    stats = None
+    if request.args.get('stats'):
+        try:
+            stats = parse_stats(request.args.get('stats'))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e), "available": list(AVAILABLE_STATS)}), 400
+    
+    views = tof_history.window(seconds, max_points)
+    result = tof_history.to_dict(views)
+    if stats:
+        # Statistics cover the whole window, not the downsampled points
+        result["statistics"] = tof_history.statistics(seconds, stats)
+    result.update({
+        "success": True,
+        "seconds": seconds,
+        "max_points": max_points,
+        "rate_hz": tof_sampler.rate_meter.rate_hz
+    })
+    return jsonify(result)
+
+@app.route('/tof/filters', methods=['GET'])
+def get_filters():
+    """Get the filter chain with per-stage cost"""
+    if not tof_sampler:
+        return jsonify({"success": False, "error": "TOF sampler not enabled"}), 503
+    
+    period = 1.0 / tof_sampler.rate_hz if tof_sampler.rate_hz else None
+    status = tof_sampler.filter_chain.get_status(period)
+    status["success"] = True
+    return jsonify(status)
+
+@app.route('/tof/filters', methods=['PUT'])
+def set_filters():
+    """Replace the filter chain, e.g. {"stages": [{"type": "median", "window": 5}]}"""
+    if not tof_sampler:
+        return jsonify({"success": False, "error": "TOF sampler not enabled"}), 503
+    
+    data = request.get_json() or {}
+    try:
+        chain = FilterChain.from_config(data.get('stages', []))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    
+    # The sampler picks up the new chain on its next sample
+    tof_sampler.filter_chain = chain
+    return jsonify({
+        "success": True,
+        "stages": chain.config(),
+        "timestamp": time.time()
+    })
+
+@app.route('/tof/profile', methods=['GET'])
+def get_profile():
+    """Get the active ranging profile and all available profiles"""
+    if not tof_sensor:
+        return jsonify({"success": False, "error": "TOF sensor not available"}), 503
+    
+    return jsonify({
+        "success": True,
+        "profile": tof_sensor.profile,
+        "profiles": describe_profiles(tof_sensor.latency)
+    })
+
+@app.route('/tof/profile', methods=['POST'])
+def set_profile():
+    """Switch the ranging profile at runtime"""
+    if not tof_sensor:
+        return jsonify({"success": False, "error": "TOF sensor not available"}), 503
+    
+    data = request.get_json() or {}
+    profile = data.get('profile', DEFAULT_PROFILE)
+    
+    if profile not in PROFILES:
+        return jsonify({
+            "success": False,
+            "error": f"Unknown profile: {profile}",
+            "available": list(PROFILES.keys())
+        }), 400
+    
+    success = tof_sensor.apply_profile(profile)
+    return jsonify({
+        "success": success,
+        "profile": tof_sensor.profile,
+        "expected_latency_ms": PROFILES[tof_sensor.profile].expected_latency_ms,
+        "error": None if success else tof_sensor.last_error,
+        "timestamp": time.time()
+    }), 200 if success else 500
+
+@app.route('/tof/stream', methods=['GET'])
+def stream_distance():
+    """Stream sampled readings as Server-Sent Events"""
+    if not tof_sensor:
+        return jsonify({"success": False, "error": "TOF sensor not available"}), 503
+    if not tof_sampler or not tof_sampler.running:
+        return jsonify({"success": False, "error": "TOF sampler not running"}), 503
+    
+    rate_hz = request.args.get('rate_hz', type=float)
+    queue_size = request.args.get('queue', 16, type=int)
+    
+    if rate_hz is not None:
+        rate_hz = max(0.1, min(rate_hz, tof_sampler.rate_hz or rate_hz))
+    queue_size = max(1, min(queue_size, 256))
+    
+    subscription = tof_broadcaster.subscribe(rate_hz, queue_size)
+    if subscription is None:
+        return jsonify({
+            "success": False,
+            "error": f"Too many stream clients (max {tof_broadcaster.max_subscribers})"
+        }), 503
+    
+    def generate():
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                message = subscription.get(timeout=15.0)
+                # Comment lines keep idle connections from being closed by proxies
+                yield message if message is not None else ": keepalive\n\n"
+        finally:
+            tof_broadcaster.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+@app.route('/tof/events', methods=['GET'])
+def stream_zone_events():
+    """Stream zone enter/leave events as Server-Sent Events"""
+    if not tof_sensor:
+        return jsonify({"success": False, "error": "TOF sensor not available"}), 503
+    if not tof_sampler or not tof_sampler.running:
+        return jsonify({"success": False, "error": "TOF sampler not running"}), 503
+    
+    queue_size = max(1, min(request.args.get('queue', 64, type=int), 256))
+    subscription = tof_event_broadcaster.subscribe(queue_size=queue_size)
+    if subscription is None:
+        return jsonify({
+            "success": False,
+            "error": f"Too many event clients (max {tof_event_broadcaster.max_subscribers})"
+        }), 503
+    
+    def generate():
+        try:
+            yield "retry: 2000\n\n"
+            # Current zone first, so clients need no separate request to sync
+            yield format_sse({"zone": tof_zones.zone, "timestamp": time.time()}, event="state")
+            while True:
+                message = subscription.get(timeout=15.0)
+                yield message if message is not None else ": keepalive\n\n"
+        finally:
+            tof_event_broadcaster.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+@app.route('/tof/recording', methods=['GET'])
+def get_recording():
+    """Get recorder status and the segment files on disk"""
+    segments = []
+    for path in list_segments(tof_recorder.directory):
+        try:
+            header, records = open_segment(path)
+        except (OSError, ValueError) as e:
+            segments.append({"file": os.path.basename(path), "error": str(e)})
+            continue
+        segments.append({
+            "file": os.path.basename(path),
+            "records": len(records),
+            "bytes": os.path.getsize(path),
+            "created_ns": header["created_ns"],
+            "sensors": header["metadata"].get("sensors", {})
+        })
+    result = tof_recorder.get_status()
+    result.update({
+        "success": True,
+        "record_size": RECORD_DTYPE.itemsize,
+        "segments": segments
+    })
+    return jsonify(result)
+
+@app.route('/tof/recording/start', methods=['POST'])
+def start_recording():
+    """Start recording every sample to binary segment files"""
+    if not tof_sampler and not tof_array:
+        return jsonify({"success": False, "error": "No TOF sampler or array to record"}), 503
+    
+    success = tof_recorder.start()
+    return jsonify({
+        "success": success,
+        "directory": tof_recorder.directory,
+        "error": None if success else tof_recorder.last_error,
+        "timestamp": time.time()
+    }), 200 if success else 500
+
+@app.route('/tof/recording/stop', methods=['POST'])
+def stop_recording():
+    """Stop recording and flush queued samples to disk"""
+    tof_recorder.stop()
+    status = tof_recorder.get_status()
+    return jsonify({
+        "success": True,
+        "records_written": status["records_written"],
+        "dropped": status["dropped"],
+        "segment": status["segment"],
+        "timestamp": time.time()
+    })
+
+@app.route('/tof/array', methods=['GET'])
+def get_array_snapshot():
+    """Get the newest reading of every sensor in the array"""
+    if not tof_array or not tof_array.running:
+        return jsonify({"success": False, "error": "TOF sensor array not running"}), 503
+    
+    result = tof_array.snapshot()
+    result.update({
+        "success": True,
+        "rate_hz": tof_array.rate_meter.rate_hz,
+        "timestamp": time.time()
+    })
+    return jsonify(result)
+
+@app.route('/tof/<sensor_id>/distance', methods=['GET'])
+def get_array_distance(sensor_id):
+    """Get the newest reading of one array sensor"""
+    if not tof_array or not tof_array.running:
+        return jsonify({"success": False, "error": "TOF sensor array not running"}), 503
+    
+    member = tof_array.get(sensor_id)
+    if member is None:
+        return jsonify({
+            "success": False,
+            "error": f"Unknown sensor: {sensor_id}",
+            "available": tof_array.names
+        }), 404
+    
+    latest = member.latest
+    if latest is None:
+        return jsonify({"success": False, "error": f"No reading from {sensor_id} yet"}), 503
+    if latest.status != STATUS_OK:
+        return jsonify({
+            "success": False,
+            "sensor": sensor_id,
+            "error": member.last_error,
+            "timestamp": latest.timestamp,
+            "age_ms": latest.age_ms()
+        }), 500
+    
+    return jsonify({
+        "success": True,
+        "sensor": sensor_id,
+        "distance_mm": latest.distance_mm,
+        "timestamp": latest.timestamp,
+        "age_ms": latest.age_ms()
+    })
+
 # === LED Controller Endpoints ===
 @app.route('/led/expression', methods=['POST'])
 def set_expression():
@@ -504,48 +1156,69 @@ def set_expression_path(expression):
 
 @app.route('/led/blink', methods=['POST'])
 def blink():
-    """Perform a blink animation"""
+    """Perform a blink animation.
+    
+    Returns as soon as the blink is scheduled; with "wait": true it returns
+    once the eyes reopened, waiting at most "timeout" seconds.
+    """
     if not led_controller:
         return jsonify({"success": False, "error": "LED controller not available"}), 503
     
     data = request.get_json() or {}
     base_expression = data.get('base_expression')
-    duration = data.get('duration', 0.15)
+    try:
+        duration = blink_duration(data.get('duration', 0.15))
+        timeout = float(data.get('timeout', duration + 1.0))
+    except (TypeError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    wait_timeout = max(0.0, min(timeout, 5.0)) if data.get('wait') else None
     
-    success = led_controller.blink(base_expression, duration)
+    try:
+        success = led_controller.blink(base_expression, duration, wait_timeout)
+    except TimeoutError as e:
+        return jsonify({"success": False, "error": str(e), "duration": duration}), 504
     return jsonify({
         "success": success,
         "action": "blink",
         "duration": duration,
+        "completed": success and wait_timeout is not None,
         "timestamp": time.time()
     })
 
 @app.route('/led/animate', methods=['POST'])
 def start_animation():
-    """Start an expression animation"""
+    """Start an expression animation.
+    
+    Either "expressions" with one "duration" for all of them, or
+    "keyframes" with their own duration, brightness and easing. Optional
+    "fps" sets the brightness easing rate and "start_at" (Unix time) a
+    shared start for units that should run in phase.
+    """
     if not led_controller:
         return jsonify({"success": False, "error": "LED controller not available"}), 503
     
-    data = request.get_json()
-    expressions = data.get('expressions', ['normal', 'happy'])
+    data = request.get_json() or {}
     duration = data.get('duration', 1.0)
-    loop = data.get('loop', True)
     
-    invalid = [e for e in expressions if e not in led_controller.expressions]
-    if invalid:
+    try:
+        timeline, start_at = timeline_from_request(data, led_controller.expressions)
+    except ValueError as e:
         return jsonify({
             "success": False,
-            "error": f"Unknown expressions: {invalid}",
-            "available": list(led_controller.expressions.keys())
+            "error": str(e),
+            "available": list(led_controller.expressions.keys()),
+            "easings": list(EASINGS)
         }), 400
     
-    led_controller.start_animation(expressions, duration, loop)
+    success = led_controller.play_timeline(timeline, start_at)
     return jsonify({
-        "success": True,
+        "success": success,
         "action": "start_animation",
-        "expressions": expressions,
-        "duration": duration,
-        "loop": loop,
+        "expressions": [keyframe.expression for keyframe in timeline.keyframes],
+        "duration": duration if 'keyframes' not in data else None,
+        "loop": timeline.loop,
+        "timeline": timeline.describe(),
+        "start_at": start_at,
         "timestamp": time.time()
     })
 
@@ -583,31 +1256,129 @@ def proximity_reaction():
             "error": "Both TOF sensor and LED controller required"
         }), 503
     
-    distance = tof_sensor.read_distance()
+    # Prefer the sampler's filtered value so noise at a band edge does not
+    # flip the expression back and forth
+    entry, cache_hit = tof_cache.get_or_read(get_max_age_ms(), tof_sensor.read_distance)
+    reading = entry.reading
+    raw_distance = reading.distance_mm
+    distance = round(reading.filtered_mm) if reading.filtered_mm is not None else raw_distance
     if distance is None:
         return jsonify({
             "success": False,
             "error": "Failed to read distance"
         }), 500
     
-    # Determine expression based on distance
-    if distance < 100:  # Very close
-        expression = "love"
-    elif distance < 300:  # Close
-        expression = "happy" 
-    elif distance < 800:  # Medium
-        expression = "normal"
-    else:  # Far
-        expression = "sad"
-    
-    success = led_controller.display_expression(expression)
+    # Same rule table as the proximity loop
+    rule = proximity_loop.rules.lookup(distance)
+    success = apply_rule(led_controller, rule) if rule else True
     return jsonify({
         "success": success,
         "distance_mm": distance,
-        "expression": expression,
+        "raw_distance_mm": raw_distance,
+        "age_ms": reading.age_ms(),
+        "cache_hit": cache_hit,
+        "expression": rule.expression if rule else None,
+        "rule": rule.to_dict() if rule else None,
+        "timestamp": time.time()
+    })
+
+@app.route('/actions/proximity_rules', methods=['GET'])
+def get_proximity_rules():
+    """Active proximity rule table and its compiled boundaries"""
+    return jsonify(dict(proximity_loop.rules.describe(), success=True, timestamp=time.time()))
+
+@app.route('/actions/proximity_rules', methods=['PUT'])
+def set_proximity_rules():
+    """Replace the rule table, e.g. {"rules": [{"expression": "love", "max_mm": 100}]}"""
+    data = request.get_json() or {}
+    try:
+        table = RuleTable.from_config(data.get('rules'), led_controller.expressions)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "available": list(led_controller.expressions.keys())
+        }), 400
+    
+    # One reference swap: the loop and requests see either table, never a mix
+    proximity_loop.rules = table
+    return jsonify(dict(table.describe(), success=True, timestamp=time.time()))
+
+@app.route('/actions/proximity_loop', methods=['GET'])
+def get_proximity_loop():
+    """Closed-loop proximity reaction status and timing"""
+    return jsonify(dict(proximity_loop.get_status(), timestamp=time.time()))
+
+@app.route('/actions/proximity_loop/start', methods=['POST'])
+def start_proximity_loop():
+    """Start reacting to proximity continuously at a fixed rate"""
+    if not tof_sampler or not tof_sampler.running:
+        return jsonify({"success": False, "error": "TOF sampler not running"}), 503
+    
+    data = request.get_json() or {}
+    try:
+        rate_hz = float(data.get('rate_hz', proximity_loop.rate_hz))
+        hysteresis_mm = float(data.get('hysteresis_mm', proximity_loop.hysteresis_mm))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "rate_hz and hysteresis_mm must be numbers"}), 400
+    
+    if proximity_loop.running:
+        return jsonify({"success": False, "error": "Proximity loop already running"}), 409
+    proximity_loop.rate_hz = max(1.0, min(rate_hz, 200.0))
+    proximity_loop.hysteresis_mm = max(0.0, min(hysteresis_mm, 500.0))
+    proximity_loop.start()
+    return jsonify({
+        "success": True,
+        "rate_hz": proximity_loop.rate_hz,
+        "hysteresis_mm": proximity_loop.hysteresis_mm,
         "timestamp": time.time()
     })
 
+@app.route('/actions/proximity_loop/stop', methods=['POST'])
+def stop_proximity_loop():
+    """Stop the proximity loop; the last expression stays on display"""
+    was_running = proximity_loop.running
+    proximity_loop.stop()
+    return jsonify(dict(proximity_loop.get_status(), success=True, was_running=was_running,
+                        timestamp=time.time()))
+
+def start_background_services():
+    """Start background threads in the process that serves requests"""
+    # The debug reloader runs this module twice: once in a watcher process and
+    # once in the serving child (WERKZEUG_RUN_MAIN set). Only the child should
+    # own the hardware threads, otherwise two samplers share the bus.
+    if DEBUG and os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+        return
+    # Devices that failed at import only opened their circuit; retry them here
+    if hasattr(tof_sensor, "supervisor"):
+        tof_sensor.supervisor.start()
+    if led_available:
+        led_controller.actor.start()
+        led_controller.supervisor.start()
+    if tof_sampler:
+        tof_sampler.start()
+        rate = f"{tof_sampler.rate_hz} Hz" if tof_sampler.rate_hz else "sensor rate"
+        if tof_rate_policy:
+            rate = f"{tof_rate_policy.min_hz}-{tof_rate_policy.max_hz} Hz (adaptive)"
+        print(f"📡 TOF sampler running at {rate} ({tof_sensor.ranging_mode} ranging)")
+    if tof_array:
+        if tof_array.start():
+            mode = "simulated" if tof_array.simulated else "hardware"
+            print(f"📡 TOF array running with {len(tof_array.members)} sensors ({mode})")
+        else:
+            print(f"⚠️  TOF array failed to start: {tof_array.last_error}")
+    if TOF_RECORD:
+        if tof_recorder.start():
+            print(f"💾 Recording TOF samples to {tof_recorder.directory}")
+        else:
+            print(f"⚠️  TOF recorder failed to start: {tof_recorder.last_error}")
+    if PROXIMITY_LOOP and tof_sampler:
+        proximity_loop.start()
+        print(f"🔁 Proximity loop running at {proximity_loop.rate_hz} Hz")
+    if ws_server:
+        ws_server.start()
+        print(f"🔌 WebSocket channel on ws://0.0.0.0:{ws_server.port}")
+
 if __name__ == "__main__":
     print("Starting Combined Hardware API server...")
     print(f"TOF sensor available: {tof_available}")
@@ -617,6 +1388,21 @@ if __name__ == "__main__":
     print("  GET  /status - Combined status")
     print("  GET  /tof/distance - Get distance")
     print("  GET  /tof/multiple - Get multiple readings")
+    print("  POST /tof/jobs - Start background readings job")
+    print("  GET  /tof/jobs/<id> - Job progress and results")
+    print("  DELETE /tof/jobs/<id> - Cancel job")
+    print("  GET  /tof/history - Recent sampled readings")
+    print("  GET  /tof/stream - Live readings (Server-Sent Events)")
+    print("  GET  /tof/events - Zone enter/leave events (Server-Sent Events)")
+    print("  GET  /tof/filters - Filter chain and per-stage cost")
+    print("  PUT  /tof/filters - Replace filter chain")
+    print("  GET  /tof/profile - Ranging profiles and latency")
+    print("  POST /tof/profile - Switch ranging profile")
+    print("  GET  /tof/recording - Recorder status and segments")
+    print("  POST /tof/recording/start - Start binary recording")
+    print("  POST /tof/recording/stop - Stop recording")
+    print("  GET  /tof/array - All array sensors")
+    print("  GET  /tof/<sensor>/distance - One array sensor")
     print("  POST /led/expression - Set expression")
     print("  POST /led/expression/<expr> - Set expression")
     print("  POST /led/blink - Blink animation")
@@ -624,5 +1410,11 @@ if __name__ == "__main__":
     print("  POST /led/stop - Stop animation")
     print("  GET  /led/expressions - List expressions")
     print("  POST /actions/proximity_reaction - React to proximity")
+    print("  GET  /actions/proximity_rules - Proximity rule table")
+    print("  PUT  /actions/proximity_rules - Replace proximity rule table")
+    print("  GET  /actions/proximity_loop - Proximity loop status")
+    print("  POST /actions/proximity_loop/start - Start continuous proximity reaction")
+    print("  POST /actions/proximity_loop/stop - Stop continuous proximity reaction")
     print()
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    start_background_services()
+    app.run(host='0.0.0.0', port=5000, debug=DEBUG)
\ No newline at end of file
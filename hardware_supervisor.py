@@ -0,0 +1,147 @@
+"""
+Hardware Supervisor
+Circuit breaker with background re-initialization for flaky hardware devices
+"""
+
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+
+
+class HardwareSupervisor:
+    """Watches a device for consecutive failures and recovers it off-thread.
+    
+    While the circuit is closed, callers report each operation with
+    ``record_success`` / ``record_failure``. After ``failure_threshold``
+    failures in a row the circuit opens: ``allow()`` returns False, so
+    requests fail immediately instead of waiting on a dead bus, and a
+    background thread calls ``initialize()`` with exponential backoff plus
+    jitter until it returns True. Then the circuit closes again and
+    ``on_recover`` runs (e.g. to redraw what the device should show).
+    
+    No thread runs before ``start()``: a device that fails while the
+    module is imported only opens the circuit, and recovery begins once
+    the serving process starts its background services.
+    """
+    
+    def __init__(self, name: str, initialize: Callable[[], bool],
+                 failure_threshold: int = 3, base_delay_s: float = 0.5,
+                 max_delay_s: float = 30.0, jitter: float = 0.5,
+                 on_recover: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.initialize = initialize
+        self.failure_threshold = failure_threshold
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.jitter = jitter
+        self.on_recover = on_recover
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.opened_at: Optional[float] = None
+        self.next_retry_at: Optional[float] = None
+        self.opens = 0
+        self.recoveries = 0
+        self.attempts = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._started = False
+    
+    def start(self):
+        """Allow background recovery, beginning it if the circuit is already open"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            if self.state == CIRCUIT_OPEN:
+                self._start_recovery()
+    
+    def allow(self) -> bool:
+        """True when the device may be used; counts rejected calls otherwise"""
+        if self.state == CIRCUIT_CLOSED:
+            return True
+        self.rejected += 1
+        return False
+    
+    def record_success(self):
+        self.consecutive_failures = 0
+    
+    def record_failure(self, error: str):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = error
+            if self.consecutive_failures >= self.failure_threshold:
+                self._open()
+    
+    def trip(self, error: str):
+        """Open the circuit immediately, e.g. when the device failed to initialize"""
+        with self._lock:
+            self.last_error = error
+            self._open()
+    
+    def _open(self):
+        if self.state == CIRCUIT_OPEN:
+            return
+        self.state = CIRCUIT_OPEN
+        self.opened_at = time.time()
+        self.opens += 1
+        print(f"⚠️  {self.name} circuit open after error: {self.last_error}")
+        if self._started:
+            self._start_recovery()
+    
+    def _start_recovery(self):
+        self._thread = threading.Thread(target=self._recover, name=f"{self.name}-recovery", daemon=True)
+        self._thread.start()
+    
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential delay for a retry, scaled down by up to ``jitter``.
+        
+        The random spread keeps devices that failed together (e.g. on one
+        loose connector) from retrying in lockstep.
+        """
+        delay = min(self.max_delay_s, self.base_delay_s * 2 ** attempt)
+        return delay * (1 - self.jitter * random.random())
+    
+    def _recover(self):
+        attempt = 0
+        while True:
+            delay = self.backoff_delay(attempt)
+            self.next_retry_at = time.time() + delay
+            time.sleep(delay)
+            self.attempts += 1
+            try:
+                if self.initialize():
+                    break
+            except Exception as e:
+                self.last_error = str(e)
+            attempt += 1
+        with self._lock:
+            self.state = CIRCUIT_CLOSED
+            self.consecutive_failures = 0
+            self.next_retry_at = None
+            self.recoveries += 1
+        print(f"✅ {self.name} recovered after {attempt + 1} attempt(s)")
+        if self.on_recover:
+            try:
+                self.on_recover()
+            except Exception as e:
+                self.record_failure(str(e))
+    
+    def get_status(self) -> Dict[str, Any]:
+        retry_at = self.next_retry_at
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "opened_at": self.opened_at,
+            "retry_in_s": max(0.0, retry_at - time.time()) if retry_at else None,
+            "opens": self.opens,
+            "recoveries": self.recoveries,
+            "attempts": self.attempts,
+            "rejected": self.rejected
+        }
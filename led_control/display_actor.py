@@ -0,0 +1,309 @@
+"""
+LED Display Actor
+One thread owns the LED matrix and works through a prioritized command queue
+"""
+
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from led_timeline import Timeline
+
+# Lower runs first. A blink jumps ahead of queued commands; the others keep
+# their arrival order, so a stop never overtakes the animation it should end.
+PRIORITY_BLINK = 0
+PRIORITY_NORMAL = 1
+
+# Accepted blink lengths, seconds
+BLINK_MIN_S = 0.02
+BLINK_MAX_S = 2.0
+
+
+def blink_duration(value: Any) -> float:
+    """Blink length from client input, clamped to the accepted range; raises ValueError"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"duration must be a number of seconds: {value!r}")
+    return max(BLINK_MIN_S, min(float(value), BLINK_MAX_S))
+
+
+class DisplayActor:
+    """Serializes every draw on a single thread.
+    
+    ``show(expression) -> bool`` and ``set_brightness(level) -> bool`` are
+    the only calls that touch the device, and only the actor thread makes
+    them. Callers enqueue a command and return at once: ``set`` draws an
+    expression, ``animate`` plays a timeline, ``stop_animation`` ends it
+    and ``blink`` closes the eyes for a moment. Timeline steps are not
+    queued behind commands; the actor wakes for the timeline's next change
+    on an absolute deadline, or earlier when a command arrives, and shows
+    the state due at the time it actually woke. It records how late each
+    step ran (jitter) and counts keyframes it woke too late to show at all
+    (dropped). A blink preempts a running timeline without pausing its
+    clock: when the eyes reopen it shows whatever is due by then, so a
+    blink never puts units that run the same timeline out of phase. An
+    explicit reopen expression (a blink base, or a frame set during the
+    blink) is shown instead until the timeline's next change.
+    """
+    
+    def __init__(self, show: Callable[[str], bool],
+                 set_brightness: Optional[Callable[[int], bool]] = None,
+                 brightness: Optional[int] = None, max_pending: int = 64,
+                 latency_window: int = 500, default_expression: Optional[str] = None):
+        self.show = show
+        # What a blink reopens to before anything has been drawn
+        self.default_expression = default_expression
+        self.set_brightness = set_brightness
+        self._queue = queue.PriorityQueue(maxsize=max_pending)
+        self._order = itertools.count()
+        self._thread = None
+        # Last expression drawn and intensity level set
+        self.expression: Optional[str] = None
+        self.brightness = brightness
+        
+        self._timeline: Optional[Timeline] = None
+        self._timeline_start_ns = 0
+        self._next_step_ns: Optional[int] = None
+        # Keyframe number (counted across loops) last shown
+        self._keyframe: Optional[int] = None
+        self._base_brightness: Optional[int] = None
+        
+        self._blink_until_ns: Optional[int] = None
+        self._reopen: Optional[str] = None
+        self._reopen_order = -1
+        self._blink_done: List[threading.Event] = []
+        
+        self.commands = 0
+        self.rejected = 0
+        self.draws = 0
+        self.draw_failures = 0
+        self.animation_steps = 0
+        self.dropped_keyframes = 0
+        self.blinks = 0
+        self.preemptions = 0
+        self._latency_ms = deque(maxlen=latency_window)
+        self._lateness_us = deque(maxlen=latency_window)
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    @property
+    def animation_running(self) -> bool:
+        return self._timeline is not None
+    
+    @property
+    def blinking(self) -> bool:
+        return self._blink_until_ns is not None
+    
+    def start(self) -> bool:
+        if self.running:
+            return False
+        self._thread = threading.Thread(target=self._run, name="led-display", daemon=True)
+        self._thread.start()
+        return True
+    
+    # --- Commands (any thread) ---
+    
+    def _submit(self, priority: int, kind: str, *args) -> bool:
+        try:
+            self._queue.put_nowait((priority, next(self._order), time.monotonic_ns(), kind, args))
+            return True
+        except queue.Full:
+            self.rejected += 1
+            return False
+    
+    def set(self, expression: str) -> bool:
+        return self._submit(PRIORITY_NORMAL, "set", expression)
+    
+    def blink(self, base_expression: Optional[str] = None, duration: float = 0.15,
+              done: Optional[threading.Event] = None) -> bool:
+        """Close the eyes for ``duration`` seconds, then show ``base_expression``
+        (by default whatever was on display). ``done`` is set once they reopen."""
+        return self._submit(PRIORITY_BLINK, "blink", base_expression, duration, done)
+    
+    def animate(self, timeline: Timeline, start_ns: Optional[int] = None) -> bool:
+        """Play ``timeline`` from monotonic time ``start_ns`` (default: now).
+        
+        A start in the past joins the timeline mid-way, in phase with
+        anything else started at that instant.
+        """
+        return self._submit(PRIORITY_NORMAL, "animate", timeline, start_ns)
+    
+    def stop_animation(self) -> bool:
+        return self._submit(PRIORITY_NORMAL, "stop")
+    
+    # --- Actor thread ---
+    
+    def _draw(self, expression: str):
+        self.expression = expression
+        self.draws += 1
+        try:
+            ok = self.show(expression)
+        except Exception as e:
+            print(f"LED display failed: {e}")
+            ok = False
+        if not ok:
+            self.draw_failures += 1
+    
+    def _set_level(self, level: int):
+        self.brightness = level
+        if self.set_brightness is None:
+            return
+        try:
+            ok = self.set_brightness(level)
+        except Exception as e:
+            print(f"LED brightness failed: {e}")
+            ok = False
+        if not ok:
+            self.draw_failures += 1
+    
+    def _schedule(self, now: int):
+        """Deadline of the timeline's next change after ``now``"""
+        elapsed = now - self._timeline_start_ns
+        if elapsed < 0:
+            self._next_step_ns = self._timeline_start_ns
+            return
+        change = self._timeline.next_change_ns(elapsed)
+        self._next_step_ns = self._timeline_start_ns + change if change is not None else now
+    
+    def _handle(self, kind: str, args: tuple, order: int, now: int):
+        if kind == "set":
+            if self.blinking:
+                # Only a frame sent after the blink's own base replaces it;
+                # one queued earlier was merely overtaken by the blink
+                if order > self._reopen_order:
+                    self._reopen, self._reopen_order = args[0], order
+            else:
+                self._draw(args[0])
+        elif kind == "blink":
+            base, duration, done = args
+            if done is not None:
+                self._blink_done.append(done)
+            if not self.blinking:
+                self.blinks += 1
+                shown = self.expression if self.expression is not None else self.default_expression
+                self._reopen, self._reopen_order = shown, -1
+                if self.animation_running:
+                    self.preemptions += 1
+                self._draw("closed")
+            # A blink during a blink keeps the eyes closed a little longer
+            self._blink_until_ns = now + int(duration * 1e9)
+            if base is not None:
+                self._reopen, self._reopen_order = base, order
+        elif kind == "animate":
+            timeline, start_ns = args
+            if not self.animation_running:
+                # Restored on stop if keyframes change the brightness
+                self._base_brightness = self.brightness
+            self._timeline = timeline
+            self._timeline_start_ns = start_ns if start_ns is not None else now
+            self._next_step_ns = max(self._timeline_start_ns, now)
+            self._keyframe = None
+            self.dropped_keyframes = 0
+            self._lateness_us.clear()
+        elif kind == "stop":
+            if self.animation_running and self._base_brightness is not None \
+                    and self.brightness != self._base_brightness:
+                self._set_level(self._base_brightness)
+            self._timeline = None
+            self._next_step_ns = None
+    
+    def _advance(self, now: int):
+        """Run whatever timed work is due: a blink reopening, a timeline step"""
+        if self.blinking and now >= self._blink_until_ns:
+            self._blink_until_ns = None
+            # Keyframes hidden behind the blink were preempted, not dropped
+            self._keyframe = None
+            if self.animation_running and self._reopen_order < 0:
+                self._next_step_ns = max(now, self._timeline_start_ns)
+            else:
+                if self._reopen is not None:
+                    self._draw(self._reopen)
+                if self.animation_running:
+                    self._schedule(now)
+            for done in self._blink_done:
+                done.set()
+            self._blink_done = []
+        if self.animation_running and not self.blinking and now >= self._next_step_ns:
+            self._lateness_us.append((now - self._next_step_ns) / 1e3)
+            state = self._timeline.state(now - self._timeline_start_ns)
+            if state is None:
+                # A one-shot timeline ended; its last frame stays on display
+                final = self._timeline.levels[-1]
+                if final is not None and final != self.brightness:
+                    self._set_level(final)
+                self._timeline = None
+                self._next_step_ns = None
+                return
+            number, expression, level = state
+            if self._keyframe is not None and number > self._keyframe + 1:
+                # Woke too late to show these at all; never burst through them
+                self.dropped_keyframes += number - self._keyframe - 1
+            if number != self._keyframe and expression != self.expression:
+                self._draw(expression)
+            if level is not None and level != self.brightness:
+                self._set_level(level)
+            self._keyframe = number
+            self.animation_steps += 1
+            self._schedule(now)
+    
+    def _timeout(self) -> Optional[float]:
+        if self.blinking:
+            due = self._blink_until_ns
+        elif self.animation_running:
+            due = self._next_step_ns
+        else:
+            return None
+        return max(0.0, (due - time.monotonic_ns()) / 1e9)
+    
+    def _run(self):
+        while True:
+            try:
+                _, order, queued_ns, kind, args = self._queue.get(timeout=self._timeout())
+            except queue.Empty:
+                pass
+            else:
+                now = time.monotonic_ns()
+                self._latency_ms.append((now - queued_ns) / 1e6)
+                self.commands += 1
+                self._handle(kind, args, order, now)
+            self._advance(time.monotonic_ns())
+    
+    def get_status(self) -> Dict[str, Any]:
+        latency = self._latency_ms.copy()
+        lateness = np.array(self._lateness_us.copy()) / 1e3
+        timeline = self._timeline
+        jitter = None
+        if len(lateness):
+            jitter = {
+                "avg_ms": round(float(lateness.mean()), 3),
+                "p99_ms": round(float(np.percentile(lateness, 99)), 3),
+                "max_ms": round(float(lateness.max()), 3)
+            }
+        return {
+            "running": self.running,
+            "expression": self.expression,
+            "brightness": self.brightness,
+            "animation_running": timeline is not None,
+            "timeline": timeline.describe() if timeline else None,
+            "blinking": self.blinking,
+            "pending": self._queue.qsize(),
+            "commands": self.commands,
+            "rejected": self.rejected,
+            "draws": self.draws,
+            "draw_failures": self.draw_failures,
+            "animation_steps": self.animation_steps,
+            "dropped_keyframes": self.dropped_keyframes,
+            "step_jitter": jitter,
+            "blinks": self.blinks,
+            "preemptions": self.preemptions,
+            "queue_latency_ms": {
+                "avg": round(sum(latency) / len(latency), 3),
+                "max": round(max(latency), 3)
+            } if latency else None
+        }
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+LED Frame Benchmark
+Compares frames per second of the luma canvas path, precompiled register
+frames and diffed register frames, and the SPI bytes each one sends
+
+Usage:
+    python led_control/led_benchmark.py [--frames 2000] [--spi]
+
+Without --spi the device writes to an in-memory serial interface, so the
+numbers show the Python cost of each path; with --spi they include the bus.
+Needs luma.led-matrix.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from luma.led_matrix.device import max7219
+
+from led_expressions import EXPRESSIONS
+from led_frames import FrameWriter, compile_frames, render_canvas, write_frame
+
+CASCADED = 2
+
+
+class CaptureSerial:
+    """Stand-in serial interface that records what would go over SPI"""
+    
+    def __init__(self):
+        self.transfers = []
+    
+    def command(self, *cmd):
+        self.transfers.append(list(cmd))
+    
+    def data(self, data):
+        self.transfers.append(list(data))
+    
+    def cleanup(self):
+        pass
+
+
+class RegisterModel:
+    """Digit registers of each device in the chain, as the transfers set them"""
+    
+    def __init__(self):
+        self.registers = {}
+    
+    def apply(self, transfers):
+        for transfer in transfers:
+            for position in range(0, len(transfer), 2):
+                self.registers[position // 2, transfer[position]] = transfer[position + 1]
+
+
+def check_diffing(device, serial, frames):
+    """Diffed writes must leave every register as a full write would"""
+    writer = FrameWriter(device)
+    full, diffed = RegisterModel(), RegisterModel()
+    names = list(EXPRESSIONS) + ["normal", "closed", "normal", "happy", "happy"]
+    for name in names:
+        serial.transfers.clear()
+        write_frame(device, frames[name])
+        full.apply(serial.transfers)
+        serial.transfers.clear()
+        writer.write(frames[name])
+        diffed.apply(serial.transfers)
+        if full.registers != diffed.registers:
+            raise SystemExit(f"Diffed write of '{name}' left different register contents")
+
+
+def check_equivalent(device, serial, frames):
+    """Both paths must send identical bytes for every expression"""
+    for name, pattern in EXPRESSIONS.items():
+        serial.transfers.clear()
+        render_canvas(device, pattern)
+        expected = serial.transfers[:]
+        serial.transfers.clear()
+        write_frame(device, frames[name])
+        if serial.transfers != expected:
+            raise SystemExit(f"Register frame for '{name}' differs from the canvas output")
+
+
+def measure(draw, count, names):
+    start = time.perf_counter()
+    for i in range(count):
+        draw(names[i % len(names)])
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--frames", type=int, default=2000, help="frames per path")
+    parser.add_argument("--spi", action="store_true", help="drive the real matrix on SPI port 0")
+    args = parser.parse_args()
+    
+    if args.spi:
+        from luma.core.interface.serial import spi, noop
+        serial = spi(port=0, device=0, gpio=noop())
+    else:
+        serial = CaptureSerial()
+    device = max7219(serial, cascaded=CASCADED, block_orientation=0, rotate=0)
+    frames = compile_frames(EXPRESSIONS, CASCADED)
+    
+    if not args.spi:
+        check_equivalent(device, serial, frames)
+        print("✅ Register frames match the canvas output for all expressions")
+        check_diffing(device, serial, frames)
+        print("✅ Diffed writes leave the same register contents as full writes")
+    
+    def clear():
+        if not args.spi:
+            serial.transfers.clear()
+    
+    def canvas_path(name):
+        render_canvas(device, EXPRESSIONS[name])
+        clear()
+    
+    def frame_path(name):
+        write_frame(device, frames[name])
+        clear()
+    
+    target = "SPI" if args.spi else "memory"
+    full_bytes = sum(len(transfer) for transfer in frames["normal"])
+    sequences = {
+        "all expressions": list(EXPRESSIONS),
+        "blink (normal/closed)": ["normal", "closed"],
+        "normal/happy": ["normal", "happy"],
+        "held expression": ["normal"]
+    }
+    for label, names in sequences.items():
+        writer = FrameWriter(device)
+        
+        def diff_path(name):
+            writer.write(frames[name])
+            clear()
+        
+        canvas_fps = measure(canvas_path, args.frames, names)
+        frame_fps = measure(frame_path, args.frames, names)
+        diff_fps = measure(diff_path, args.frames, names)
+        diff_bytes = writer.bytes_sent / writer.frames
+        print(f"\n{label} ({target}):")
+        print(f"  Canvas path:    {canvas_fps:10.0f} frames/s  {full_bytes:5.1f} bytes/frame")
+        print(f"  Register path:  {frame_fps:10.0f} frames/s  {full_bytes:5.1f} bytes/frame")
+        print(f"  Diffed path:    {diff_fps:10.0f} frames/s  {diff_bytes:5.1f} bytes/frame")
+
+
+if __name__ == "__main__":
+    main()
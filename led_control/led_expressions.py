@@ -0,0 +1,77 @@
+"""
+LED Eye Expressions
+16x8 pixel patterns (two cascaded 8x8 matrices), row-major, 1 = lit
+"""
+
+EXPRESSIONS = {
+    "normal": [
+        [0,0,1,1,1,1,0,0,   0,0,1,1,1,1,0,0],
+        [0,1,0,0,0,0,1,0,   0,1,0,0,0,0,1,0],
+        [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
+        [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
+        [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
+        [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
+        [0,1,0,0,0,0,1,0,   0,1,0,0,0,0,1,0],
+        [0,0,1,1,1,1,0,0,   0,0,1,1,1,1,0,0]
+    ],
+    "happy": [
+        [0,0,1,1,1,1,0,0,   0,0,1,1,1,1,0,0],
+        [0,1,0,0,0,0,1,0,   0,1,0,0,0,0,1,0],
+        [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
+        [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
+        [1,0,0,1,1,0,0,1,   1,0,0,1,1,0,0,1],
+        [0,1,1,0,0,1,1,0,   0,1,1,0,0,1,1,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0]
+    ],
+    "sad": [
+        [0,0,1,1,1,1,0,0,   0,0,1,1,1,1,0,0],
+        [0,1,0,0,0,0,1,0,   0,1,0,0,0,0,1,0],
+        [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
+        [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
+        [0,1,0,0,0,0,1,0,   0,1,0,0,0,0,1,0],
+        [0,0,1,0,0,1,0,0,   0,0,1,0,0,1,0,0],
+        [0,0,0,1,1,0,0,0,   0,0,0,1,1,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0]
+    ],
+    "wink": [
+        [0,0,1,1,1,1,0,0,   0,0,0,0,0,0,0,0],
+        [0,1,0,0,0,0,1,0,   0,0,0,0,0,0,0,0],
+        [1,0,0,0,0,0,0,1,   0,0,1,1,1,1,0,0],
+        [1,0,0,0,0,0,0,1,   0,1,0,0,0,0,1,0],
+        [1,0,0,0,0,0,0,1,   1,0,0,0,0,0,0,1],
+        [1,0,0,0,0,0,0,1,   0,0,0,0,0,0,0,0],
+        [0,1,0,0,0,0,1,0,   0,0,0,0,0,0,0,0],
+        [0,0,1,1,1,1,0,0,   0,0,0,0,0,0,0,0]
+    ],
+    "love": [
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [0,1,1,0,0,1,1,0,   0,1,1,0,0,1,1,0],
+        [1,1,1,1,1,1,1,1,   1,1,1,1,1,1,1,1],
+        [1,1,1,1,1,1,1,1,   1,1,1,1,1,1,1,1],
+        [0,1,1,1,1,1,1,0,   0,1,1,1,1,1,1,0],
+        [0,0,1,1,1,1,0,0,   0,0,1,1,1,1,0,0],
+        [0,0,0,1,1,0,0,0,   0,0,0,1,1,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0]
+    ],
+    "closed": [
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [1,1,1,1,1,1,1,1,   1,1,1,1,1,1,1,1],
+        [1,1,1,1,1,1,1,1,   1,1,1,1,1,1,1,1],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0]
+    ],
+    "off": [
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0],
+        [0,0,0,0,0,0,0,0,   0,0,0,0,0,0,0,0]
+    ]
+}
@@ -0,0 +1,136 @@
+"""
+MAX7219 Register Frames
+Expressions precompiled to digit-register writes for cascaded MAX7219 matrices
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# MAX7219 register address of digit 0; digits 0-7 follow consecutively
+DIGIT_0 = 0x01
+
+# One SPI transfer per digit register: [digit, byte] for every cascaded
+# device, the device farthest down the chain first
+Frame = Tuple[List[int], ...]
+
+
+def compile_frame(pattern: Sequence[Sequence[int]], cascaded: int) -> Frame:
+    """Pack a row-major 8 x (8 * cascaded) pattern into register writes.
+    
+    Matches what luma's ``max7219.display`` sends for the same pixels with
+    ``block_orientation=0``, ``rotate=0`` and blocks in normal order: digit
+    register ``d`` holds column ``d`` of a block with row ``y`` in bit ``y``,
+    and the rightmost block is sent first.
+    """
+    width = 8 * cascaded
+    if len(pattern) != 8 or any(len(row) != width for row in pattern):
+        raise ValueError(f"Pattern must be 8 rows of {width} pixels")
+    frame = []
+    for digit in range(8):
+        transfer = []
+        for block_x in range(width - 8, -8, -8):
+            byte = 0
+            for y in range(8):
+                if pattern[y][block_x + digit]:
+                    byte |= 1 << y
+            transfer += [DIGIT_0 + digit, byte]
+        frame.append(transfer)
+    return tuple(frame)
+
+
+def compile_frames(expressions: Dict[str, Sequence[Sequence[int]]], cascaded: int) -> Dict[str, Frame]:
+    return {name: compile_frame(pattern, cascaded) for name, pattern in expressions.items()}
+
+
+def write_frame(device, frame: Frame):
+    """Send a compiled frame: eight ``data`` calls, no image, no repacking"""
+    for transfer in frame:
+        device.data(transfer)
+
+
+class FrameWriter:
+    """Sends only the digit registers that differ from the frame on the device.
+    
+    A shadow copy holds the last frame written. Each digit register is one
+    column of every block, and a transfer carries that register for the
+    whole chain, so a transfer is skipped when it matches the shadow and
+    sent unchanged otherwise. Changing to a different expression rewrites
+    nearly every column of an eye, so the saving comes from redrawing what
+    is already shown (recovery redraws, repeated requests, animations that
+    hold a frame): that costs no SPI traffic at all. Call ``invalidate``
+    whenever the device may hold something else (re-initialized, or drawn
+    through another path); the next write is then a full one. Writes are
+    serialized so the shadow always matches the order frames reached the
+    device.
+    """
+    
+    def __init__(self, device):
+        self.device = device
+        self._shadow: Optional[Frame] = None
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.unchanged_frames = 0
+        self.registers_sent = 0
+        self.registers_skipped = 0
+        self.bytes_sent = 0
+        self.bytes_full = 0
+    
+    def invalidate(self):
+        with self._lock:
+            self._shadow = None
+    
+    def write(self, frame: Frame):
+        with self._lock:
+            self._write(frame)
+    
+    def _write(self, frame: Frame):
+        shadow = self._shadow
+        self.frames += 1
+        # Every transfer of a frame is one pair per device in the chain
+        transfer_bytes = len(frame[0])
+        self.bytes_full += len(frame) * transfer_bytes
+        if frame is shadow:
+            # Compiled frames are shared, so a held expression is the same object
+            self.registers_skipped += len(frame)
+            self.unchanged_frames += 1
+            return
+        sent = 0
+        if shadow is None:
+            for transfer in frame:
+                self.device.data(transfer)
+            sent = len(frame)
+        else:
+            for transfer, previous in zip(frame, shadow):
+                if transfer != previous:
+                    self.device.data(transfer)
+                    sent += 1
+        self.bytes_sent += sent * transfer_bytes
+        # Only after every register went out: a failed write leaves the
+        # shadow as it was and the error handler invalidates it
+        self._shadow = frame
+        self.registers_sent += sent
+        self.registers_skipped += len(frame) - sent
+        if not sent:
+            self.unchanged_frames += 1
+    
+    def get_status(self) -> Dict[str, Any]:
+        total = self.registers_sent + self.registers_skipped
+        return {
+            "frames": self.frames,
+            "unchanged_frames": self.unchanged_frames,
+            "registers_sent": self.registers_sent,
+            "registers_skipped": self.registers_skipped,
+            "bytes_sent": self.bytes_sent,
+            "bytes_saved_ratio": round(1 - self.bytes_sent / self.bytes_full, 3) if self.bytes_full else None,
+            "registers_skipped_ratio": round(self.registers_skipped / total, 3) if total else None
+        }
+
+
+def render_canvas(device, pattern: Sequence[Sequence[int]]):
+    """Draw a pattern through luma's canvas (PIL image, repacked on every call)"""
+    from luma.core.render import canvas
+    with canvas(device) as draw:
+        for y, row in enumerate(pattern):
+            for x, pixel in enumerate(row):
+                if pixel:
+                    draw.point((x, y), fill="white")
@@ -0,0 +1,206 @@
+"""
+LED Animation Timeline
+Keyframes with their own durations and brightness easing, scheduled on absolute time
+"""
+
+import bisect
+import time
+from typing import Any, Callable, Collection, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Easing curves map progress through a keyframe (0..1) to interpolation (0..1)
+EASINGS: Dict[str, Callable[[float], float]] = {
+    "step": lambda t: 1.0,
+    "linear": lambda t: t,
+    "ease_in": lambda t: t * t,
+    "ease_out": lambda t: t * (2 - t),
+    "ease_in_out": lambda t: 3 * t * t - 2 * t * t * t
+}
+
+MAX_KEYFRAMES = 256
+MIN_KEYFRAME_S = 0.001
+MAX_KEYFRAME_S = 60.0
+# How far a shared start may lie in the past (joining mid-way) or the future
+MAX_START_AGE_S = 3600.0
+MAX_START_AHEAD_S = 60.0
+
+
+class Keyframe(NamedTuple):
+    """An expression held for ``duration`` seconds.
+    
+    ``brightness`` (0-255) is reached at the end of the keyframe, eased
+    from the previous keyframe's level; None holds the previous level.
+    """
+    expression: str
+    duration: float
+    brightness: Optional[int] = None
+    easing: str = "step"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"expression": self.expression, "duration": self.duration,
+                "brightness": self.brightness, "easing": self.easing}
+
+
+def parse_keyframes(specs: Any, expressions: Optional[Collection[str]] = None) -> List[Keyframe]:
+    """Keyframes from [{"expression": "happy", "duration": 0.5, ...}]; raises ValueError"""
+    if not isinstance(specs, list) or not specs:
+        raise ValueError("keyframes must be a non-empty list")
+    keyframes = []
+    for spec in specs:
+        if not isinstance(spec, dict):
+            raise ValueError(f"Keyframe must be an object: {spec}")
+        expression = spec.get("expression")
+        if not isinstance(expression, str) or (expressions is not None and expression not in expressions):
+            raise ValueError(f"Unknown expression in keyframe: {expression!r}")
+        duration = spec.get("duration", 1.0)
+        if isinstance(duration, bool) or not isinstance(duration, (int, float)):
+            raise ValueError(f"Keyframe duration must be a number: {duration!r}")
+        brightness = spec.get("brightness")
+        if brightness is not None and (isinstance(brightness, bool) or not isinstance(brightness, int)
+                                       or not 0 <= brightness <= 255):
+            raise ValueError(f"Keyframe brightness must be an integer 0-255: {brightness!r}")
+        easing = spec.get("easing", "step")
+        if easing not in EASINGS:
+            raise ValueError(f"Unknown easing {easing!r}; available: {', '.join(EASINGS)}")
+        keyframes.append(Keyframe(expression, float(duration), brightness, easing))
+    return keyframes
+
+
+class Timeline:
+    """Immutable keyframe schedule.
+    
+    The state at any moment is a function of the time elapsed since the
+    start alone: keyframe boundaries sit at fixed offsets and looping
+    wraps on the cycle length. A player that wakes late therefore shows
+    what is due now, skipping whatever it missed, and render time never
+    accumulates into drift. Units started from the same instant stay in
+    phase indefinitely. While a keyframe eases brightness, updates fall
+    on a ``fps`` grid aligned to the start.
+    """
+    
+    def __init__(self, keyframes: Sequence[Keyframe], loop: bool = True, fps: float = 30.0):
+        if not keyframes:
+            raise ValueError("Timeline needs at least one keyframe")
+        if len(keyframes) > MAX_KEYFRAMES:
+            raise ValueError(f"Timeline is limited to {MAX_KEYFRAMES} keyframes")
+        if any(not MIN_KEYFRAME_S <= keyframe.duration <= MAX_KEYFRAME_S for keyframe in keyframes):
+            raise ValueError(f"Keyframe durations must be {MIN_KEYFRAME_S:g}-{MAX_KEYFRAME_S:g} seconds")
+        if not 0 < fps <= 100:
+            raise ValueError("Timeline fps must be in (0, 100]")
+        self.keyframes = list(keyframes)
+        self.loop = loop
+        self.fps = fps
+        self.frame_ns = int(1e9 / fps)
+        # Start offset of every keyframe, plus the cycle end
+        self.offsets_ns = [0]
+        for keyframe in self.keyframes:
+            self.offsets_ns.append(self.offsets_ns[-1] + int(keyframe.duration * 1e9))
+        self.total_ns = self.offsets_ns[-1]
+        # Brightness in effect at the end of every keyframe
+        self.levels: List[Optional[int]] = []
+        level = None
+        for keyframe in self.keyframes:
+            level = keyframe.brightness if keyframe.brightness is not None else level
+            self.levels.append(level)
+        if loop:
+            # Leading keyframes without a level hold the one the cycle ends on
+            for i, keyframe in enumerate(self.keyframes):
+                if keyframe.brightness is not None:
+                    break
+                self.levels[i] = self.levels[-1]
+    
+    @classmethod
+    def from_expressions(cls, expressions: Sequence[str], duration: float = 1.0,
+                         loop: bool = True) -> "Timeline":
+        """Every expression held for the same ``duration``"""
+        return cls([Keyframe(expression, duration) for expression in expressions], loop)
+    
+    def _start_level(self, index: int) -> Optional[int]:
+        if index:
+            return self.levels[index - 1]
+        return self.levels[-1] if self.loop else None
+    
+    def _eased(self, index: int) -> bool:
+        keyframe = self.keyframes[index]
+        start = self._start_level(index)
+        return (keyframe.easing != "step" and keyframe.brightness is not None
+                and start is not None and start != keyframe.brightness)
+    
+    def _locate(self, elapsed_ns: int) -> Optional[Tuple[int, int, int]]:
+        """(cycle, keyframe index, time into the cycle); None once a one-shot timeline ended"""
+        if elapsed_ns < 0:
+            elapsed_ns = 0
+        if elapsed_ns >= self.total_ns and not self.loop:
+            return None
+        cycle, position = divmod(elapsed_ns, self.total_ns)
+        return cycle, bisect.bisect_right(self.offsets_ns, position) - 1, position
+    
+    def state(self, elapsed_ns: int) -> Optional[Tuple[int, str, Optional[int]]]:
+        """(keyframe number counted across loops, expression, brightness) at
+        ``elapsed_ns``; None once a one-shot timeline ended"""
+        located = self._locate(elapsed_ns)
+        if located is None:
+            return None
+        cycle, index, position = located
+        keyframe = self.keyframes[index]
+        brightness = self.levels[index]
+        if self._eased(index):
+            start = self._start_level(index)
+            progress = (position - self.offsets_ns[index]) / (self.offsets_ns[index + 1] - self.offsets_ns[index])
+            brightness = round(start + (keyframe.brightness - start) * EASINGS[keyframe.easing](progress))
+        return cycle * len(self.keyframes) + index, keyframe.expression, brightness
+    
+    def next_change_ns(self, elapsed_ns: int) -> Optional[int]:
+        """Elapsed time of the next update after ``elapsed_ns``: the next
+        keyframe boundary, or the next grid tick while easing"""
+        located = self._locate(elapsed_ns)
+        if located is None:
+            return None
+        cycle, index, _ = located
+        end = cycle * self.total_ns + self.offsets_ns[index + 1]
+        if self._eased(index):
+            return min((max(elapsed_ns, 0) // self.frame_ns + 1) * self.frame_ns, end)
+        return end
+    
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "keyframes": len(self.keyframes),
+            "cycle_s": self.total_ns / 1e9,
+            "loop": self.loop,
+            "fps": self.fps
+        }
+
+
+def timeline_from_request(data: Dict[str, Any],
+                          expressions: Collection[str]) -> Tuple[Timeline, Optional[float]]:
+    """Timeline and shared start (Unix time or None) from an animate request.
+    
+    Either "keyframes", or "expressions" all held for one "duration"; plus
+    optional "loop", "fps" (clamped to 1-100) and "start_at". Raises
+    ValueError for anything malformed.
+    """
+    if "keyframes" in data:
+        keyframes = parse_keyframes(data["keyframes"], expressions)
+    else:
+        names = data.get("expressions", ["normal", "happy"])
+        if not isinstance(names, list):
+            raise ValueError("expressions must be a list")
+        unknown = [name for name in names if not isinstance(name, str) or name not in expressions]
+        if unknown:
+            raise ValueError(f"Unknown expressions: {unknown}")
+        duration = data.get("duration", 1.0)
+        keyframes = parse_keyframes([{"expression": name, "duration": duration} for name in names],
+                                    expressions)
+    fps = data.get("fps", 30.0)
+    if isinstance(fps, bool) or not isinstance(fps, (int, float)):
+        raise ValueError(f"fps must be a number: {fps!r}")
+    timeline = Timeline(keyframes, bool(data.get("loop", True)), max(1.0, min(float(fps), 100.0)))
+    
+    start_at = data.get("start_at")
+    if start_at is not None:
+        if isinstance(start_at, bool) or not isinstance(start_at, (int, float)):
+            raise ValueError(f"start_at must be a Unix time: {start_at!r}")
+        if not -MAX_START_AGE_S <= start_at - time.time() <= MAX_START_AHEAD_S:
+            raise ValueError(f"start_at must be within the last {MAX_START_AGE_S:g} s "
+                             f"or the next {MAX_START_AHEAD_S:g} s")
+        start_at = float(start_at)
+    return timeline, start_at
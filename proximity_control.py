@@ -0,0 +1,163 @@
+"""
+Proximity Control Loop
+Maps the sampled distance to an LED expression at a fixed control rate
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from proximity_rules import ProximityRule, RuleTable
+from tof_sampler import STATUS_OK, TOFReading
+
+
+class ProximityLoop:
+    """Closed-loop proximity reaction on its own thread.
+    
+    Every tick reads the newest sample (filtered when a filter chain is
+    set), looks up its rule with hysteresis around the one on display and
+    calls ``apply(rule, previous)`` only when the rule changes, so a steady
+    distance costs no SPI traffic. Distances no rule covers leave the
+    display as it is. ``rules`` may be replaced at any time; the next tick
+    picks up the new table and applies its rule if that differs. Ticks run
+    on absolute deadlines; the loop records how late each tick woke
+    (jitter) and counts ticks whose work ran past the next deadline
+    (misses). Samples older than
+    ``stale_ms`` are ignored, so a stalled sampler freezes the display
+    rather than driving it from old data.
+    """
+    
+    def __init__(self, get_reading: Callable[[], Optional[TOFReading]],
+                 apply: Callable[[ProximityRule, Optional[ProximityRule]], bool],
+                 rules: RuleTable,
+                 rate_hz: float = 20.0, hysteresis_mm: float = 20.0,
+                 stale_ms: float = 500.0, jitter_window: int = 1000):
+        self.get_reading = get_reading
+        self.apply = apply
+        self.rules = rules
+        self.rate_hz = rate_hz
+        self.hysteresis_mm = hysteresis_mm
+        self.stale_ms = stale_ms
+        self.expression: Optional[str] = None
+        self.distance_mm: Optional[float] = None
+        self.rule: Optional[ProximityRule] = None
+        self._table: Optional[RuleTable] = None
+        self._current: Optional[int] = None
+        self._lateness_us = deque(maxlen=jitter_window)
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._reset_counters()
+    
+    def _reset_counters(self):
+        self.started_at: Optional[float] = None
+        self.ticks = 0
+        self.deadline_misses = 0
+        self.stale_samples = 0
+        self.led_updates = 0
+        self.led_failures = 0
+        self.max_step_ms = 0.0
+        self._lateness_us.clear()
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self) -> bool:
+        if self.running:
+            return False
+        self._reset_counters()
+        # Redraw on the first usable sample, whatever is on display now
+        self._table = None
+        self._current = None
+        self.rule = None
+        self.expression = None
+        self.started_at = time.time()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="proximity-loop", daemon=True)
+        self._thread.start()
+        return True
+    
+    def stop(self, timeout: float = 2.0):
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+    
+    def _step(self):
+        reading = self.get_reading()
+        if reading is None or reading.status != STATUS_OK or reading.age_ms() > self.stale_ms:
+            self.stale_samples += 1
+            return
+        distance = reading.filtered_mm if reading.filtered_mm is not None else reading.distance_mm
+        self.distance_mm = distance
+        table = self.rules
+        if table is not self._table:
+            # Slot numbers are per table; start over after a swap
+            self._table, self._current = table, None
+        slot = table.select(distance, self._current, self.hysteresis_mm)
+        if slot == self._current:
+            return
+        rule = table.slots[slot]
+        if rule is None or rule == self.rule:
+            # No rule here, or the same reaction as on display
+            self._current = slot
+            return
+        if self.apply(rule, self.rule):
+            self._current = slot
+            self.rule = rule
+            self.expression = rule.expression
+            self.led_updates += 1
+        else:
+            # Left unchanged so the next tick tries again
+            self.led_failures += 1
+    
+    def _run(self):
+        period_ns = int(1e9 / self.rate_hz)
+        next_deadline = time.monotonic_ns()
+        while not self._stop_event.is_set():
+            start = time.monotonic_ns()
+            self._lateness_us.append((start - next_deadline) / 1e3)
+            try:
+                self._step()
+            except Exception as e:
+                self.led_failures += 1
+                print(f"Proximity loop step failed: {e}")
+            self.ticks += 1
+            now = time.monotonic_ns()
+            self.max_step_ms = max(self.max_step_ms, (now - start) / 1e6)
+            
+            next_deadline += period_ns
+            if next_deadline <= now:
+                # Overran the period; skip the lost ticks instead of bursting
+                self.deadline_misses += 1
+                next_deadline = now
+                continue
+            self._stop_event.wait((next_deadline - now) / 1e9)
+    
+    def get_status(self) -> Dict[str, Any]:
+        lateness = np.array(self._lateness_us.copy()) / 1e3
+        jitter = None
+        if len(lateness):
+            jitter = {
+                "avg_ms": round(float(lateness.mean()), 3),
+                "p99_ms": round(float(np.percentile(lateness, 99)), 3),
+                "max_ms": round(float(lateness.max()), 3)
+            }
+        return {
+            "running": self.running,
+            "rate_hz": self.rate_hz,
+            "hysteresis_mm": self.hysteresis_mm,
+            "expression": self.expression,
+            "rule": self.rule.to_dict() if self.rule else None,
+            "distance_mm": self.distance_mm,
+            "started_at": self.started_at,
+            "ticks": self.ticks,
+            "deadline_misses": self.deadline_misses,
+            "stale_samples": self.stale_samples,
+            "led_updates": self.led_updates,
+            "led_failures": self.led_failures,
+            "max_step_ms": round(self.max_step_ms, 3),
+            "jitter": jitter
+        }
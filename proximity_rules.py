@@ -0,0 +1,193 @@
+"""
+Proximity Rule Table
+Distance bands mapped to LED reactions, compiled for binary-search lookup
+"""
+
+import bisect
+import json
+import time
+from typing import Any, Collection, Dict, List, NamedTuple, Optional, Tuple
+
+from tof_events import parse_zones, select_band
+
+MAX_RULES = 64
+
+# Expression per distance band: "expression:upper_bound_mm,...,last_expression"
+DEFAULT_PROXIMITY_MAP = "love:100,happy:300,normal:800,sad"
+
+
+class Animation(NamedTuple):
+    expressions: Tuple[str, ...]
+    duration: float
+
+
+class ProximityRule(NamedTuple):
+    """Reaction for distances in [min_mm, max_mm); max_mm None is open-ended"""
+    expression: str
+    min_mm: float = 0
+    max_mm: Optional[float] = None
+    blink: bool = False
+    animation: Optional[Animation] = None
+    priority: int = 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        config = {
+            "expression": self.expression,
+            "min_mm": self.min_mm,
+            "max_mm": self.max_mm,
+            "priority": self.priority
+        }
+        if self.blink:
+            config["blink"] = True
+        if self.animation:
+            config["animation"] = {"expressions": list(self.animation.expressions),
+                                   "duration": self.animation.duration}
+        return config
+
+
+def _number(spec: Dict[str, Any], name: str, default: Any) -> Any:
+    value = spec.get(name, default)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        raise ValueError(f"Rule {name} must be a number: {value!r}")
+    return value
+
+
+def build_rule(spec: Dict[str, Any], expressions: Optional[Collection[str]] = None) -> ProximityRule:
+    """Create a rule from {"expression": "happy", "min_mm": 100, "max_mm": 300}; raises ValueError"""
+    if not isinstance(spec, dict):
+        raise ValueError(f"Rule must be an object: {spec}")
+    expression = spec.get("expression")
+    if not isinstance(expression, str) or (expressions is not None and expression not in expressions):
+        raise ValueError(f"Unknown expression in rule: {expression!r}")
+    min_mm = _number(spec, "min_mm", 0)
+    max_mm = _number(spec, "max_mm", None)
+    if min_mm < 0 or (max_mm is not None and max_mm <= min_mm):
+        raise ValueError(f"Rule for {expression} needs 0 <= min_mm < max_mm")
+    priority = spec.get("priority", 0)
+    if isinstance(priority, bool) or not isinstance(priority, int):
+        raise ValueError(f"Rule priority must be an integer: {priority!r}")
+    blink = spec.get("blink", False)
+    if not isinstance(blink, bool):
+        raise ValueError(f"Rule blink must be true or false: {blink!r}")
+    
+    animation = spec.get("animation")
+    if animation is not None:
+        if blink:
+            raise ValueError(f"Rule for {expression} cannot both blink and animate")
+        if not isinstance(animation, dict) or not animation.get("expressions"):
+            raise ValueError("Rule animation needs a non-empty expressions list")
+        frames = animation["expressions"]
+        if not isinstance(frames, list) or (expressions is not None and
+                                            any(frame not in expressions for frame in frames)):
+            raise ValueError(f"Unknown expressions in animation: {frames!r}")
+        duration = _number(animation, "duration", 1.0)
+        if duration <= 0:
+            raise ValueError("Rule animation duration must be positive")
+        animation = Animation(tuple(frames), float(duration))
+    
+    return ProximityRule(expression, min_mm, max_mm, blink, animation, priority)
+
+
+class RuleTable:
+    """Immutable, compiled rule table.
+    
+    Rules may overlap; compiling splits the distance axis at every rule
+    edge and resolves each slot once to its highest-priority rule (the
+    earlier rule on ties), or None where no rule applies. Lookups are then
+    a binary search over the sorted boundaries, independent of how rules
+    overlap. Tables are replaced, never modified, so a reader holding a
+    reference always sees one consistent table.
+    """
+    
+    def __init__(self, rules: List[ProximityRule]):
+        if not rules:
+            raise ValueError("Rule table needs at least one rule")
+        if len(rules) > MAX_RULES:
+            raise ValueError(f"Rule table is limited to {MAX_RULES} rules")
+        self.rules = list(rules)
+        self.loaded_at = time.time()
+        
+        edges = sorted({rule.min_mm for rule in rules} |
+                       {rule.max_mm for rule in rules if rule.max_mm is not None})
+        bounds: List[float] = []
+        slots: List[Optional[ProximityRule]] = []
+        # Slot i covers [edges[i - 1], edges[i]); slot 0 lies below every rule
+        for i in range(len(edges) + 1):
+            start = edges[i - 1] if i else None
+            covering = [] if start is None else [
+                (rule.priority, -order, rule) for order, rule in enumerate(rules)
+                if rule.min_mm <= start and (rule.max_mm is None or start < rule.max_mm)
+            ]
+            winner = max(covering)[2] if covering else None
+            if slots and slots[-1] is winner:
+                continue  # Same rule as the slot below: merge them
+            if i:
+                bounds.append(start)
+            slots.append(winner)
+        self.bounds = bounds
+        self.slots = slots
+    
+    @classmethod
+    def from_config(cls, specs: List[Dict[str, Any]],
+                    expressions: Optional[Collection[str]] = None) -> "RuleTable":
+        if not isinstance(specs, list):
+            raise ValueError("rules must be a list")
+        return cls([build_rule(spec, expressions) for spec in specs])
+    
+    @classmethod
+    def parse(cls, text: str, expressions: Optional[Collection[str]] = None) -> "RuleTable":
+        """Contiguous bands from a compact spec such as "love:100,happy:300,sad" """
+        names, bounds = parse_zones(text)
+        edges = [0] + bounds + [None]
+        return cls.from_config([
+            {"expression": name, "min_mm": edges[i], "max_mm": edges[i + 1]}
+            for i, name in enumerate(names)
+        ], expressions)
+    
+    @classmethod
+    def load(cls, path: str, expressions: Optional[Collection[str]] = None) -> "RuleTable":
+        """Load {"rules": [...]} (or a bare list) from a JSON file"""
+        with open(path) as f:
+            data = json.load(f)
+        return cls.from_config(data.get("rules") if isinstance(data, dict) else data, expressions)
+    
+    def slot(self, distance: float) -> int:
+        return bisect.bisect_right(self.bounds, distance)
+    
+    def select(self, distance: float, current: Optional[int], hysteresis_mm: float) -> int:
+        """Slot for a reading with hysteresis around the ``current`` slot"""
+        return select_band(self.bounds, distance, current, hysteresis_mm)
+    
+    def lookup(self, distance: float) -> Optional[ProximityRule]:
+        return self.slots[self.slot(distance)]
+    
+    def config(self) -> List[Dict[str, Any]]:
+        return [rule.to_dict() for rule in self.rules]
+    
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "rules": self.config(),
+            "compiled": {
+                "bounds": self.bounds,
+                "slots": [rule.expression if rule else None for rule in self.slots]
+            },
+            "loaded_at": self.loaded_at
+        }
+
+
+def apply_rule(led_controller, rule: ProximityRule,
+               previous: Optional[ProximityRule] = None) -> bool:
+    """Show a rule on the LED controller.
+    
+    An animation left running by ``previous`` is stopped first; with no
+    ``previous`` (stateless callers) any running animation is stopped.
+    """
+    if previous is None or previous.animation:
+        led_controller.stop_current_animation()
+    if rule.animation:
+        led_controller.start_animation(list(rule.animation.expressions), rule.animation.duration)
+        return True
+    if rule.blink:
+        # Closes the eyes and reopens on the rule's expression
+        return led_controller.blink(rule.expression)
+    return led_controller.display_expression(rule.expression)
@@ -30,7 +30,7 @@ pip install --upgrade pip
 pip install adafruit-circuitpython-vl53l0x
 pip install luma.led-matrix
 pip install RPi.GPIO
-pip install flask flask-cors requests websockets
+pip install flask flask-cors requests websockets numpy
 
 # Add user to hardware groups
 echo "👤 Adding user to hardware groups..."
@@ -6,6 +6,7 @@ Comprehensive testing suite for the consolidated hardware API
 This script runs tests for:
 - TOF Sensor API endpoints (on combined server port 5000)
 - LED Control API endpoints (on combined server port 5000)  
+- WebSocket channel (on combined server port 8765)
 - Combined API Server functionality
 - Integration tests
 
@@ -29,6 +30,7 @@ try:
     from test_tof_api import run_tof_tests
     from test_led_api import run_led_tests
     from test_integration import run_integration_tests
+    from test_websocket_api import run_websocket_tests
 except ImportError as e:
     print(f"Error importing test modules: {e}")
     sys.exit(1)
@@ -138,7 +140,17 @@ class TestRunner:
             print("⚠️  Combined API server not running on port 5000")
             print("   Run: python api_server.py")
         
-        return tof_success, led_success, True
+        # Test WebSocket channel served alongside the combined server
+        print("\n3️⃣  WebSocket Channel Tests (via Combined API)")
+        print("-" * 30)
+        ws_success = False
+        if self.check_server("combined", 5000):
+            ws_success = run_websocket_tests()
+        else:
+            print("⚠️  Combined API server not running on port 5000")
+            print("   Run: python api_server.py")
+        
+        return tof_success, led_success, ws_success
     
     def run_integration_tests(self) -> bool:
         """Run integration tests"""
@@ -300,9 +312,10 @@ def main():
         
         # Run requested tests
         if args.all or args.individual:
-            tof_result, led_result, _ = runner.run_individual_tests()
+            tof_result, led_result, ws_result = runner.run_individual_tests()
             runner.results["TOF API"] = tof_result
             runner.results["LED API"] = led_result
+            runner.results["WebSocket"] = ws_result
         
         if args.all or args.integration:
             integration_result = runner.run_integration_tests()
@@ -7,6 +7,7 @@ import unittest
 import requests
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
 
 class TestCombinedAPI(unittest.TestCase):
@@ -153,6 +154,68 @@ class TestCombinedAPI(unittest.TestCase):
         except requests.exceptions.ConnectionError:
             self.skipTest("Combined API server not running on port 5000")
     
+    def test_proximity_rules(self):
+        """Test replacing the proximity rule table"""
+        print("\n📐 Testing proximity rules...")
+        
+        try:
+            response = requests.get(f"{self.base_url}/actions/proximity_rules", timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            original = response.json()["rules"]
+            
+            response = requests.put(f"{self.base_url}/actions/proximity_rules",
+                                  json={"rules": [{"expression": "not_an_expression"}]},
+                                  timeout=self.timeout)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("available", response.json())
+            
+            try:
+                # Overlapping bands: the higher priority rule wins in the middle
+                response = requests.put(f"{self.base_url}/actions/proximity_rules", json={"rules": [
+                    {"expression": "normal"},
+                    {"expression": "happy", "min_mm": 200, "max_mm": 400, "priority": 1}
+                ]}, timeout=self.timeout)
+                self.assertEqual(response.status_code, 200)
+                compiled = response.json()["compiled"]
+                self.assertEqual(compiled["bounds"], [0, 200, 400])
+                self.assertEqual(compiled["slots"], [None, "normal", "happy", "normal"])
+            finally:
+                requests.put(f"{self.base_url}/actions/proximity_rules",
+                           json={"rules": original}, timeout=self.timeout)
+            
+            print(f"✅ Rule table swapped and restored ({len(original)} rules)")
+            
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_proximity_loop(self):
+        """Test the closed-loop proximity reaction mode"""
+        print("\n🔁 Testing proximity loop...")
+        
+        try:
+            response = requests.post(f"{self.base_url}/actions/proximity_loop/start",
+                                   json={"rate_hz": 50}, timeout=self.timeout)
+            if response.status_code == 503:
+                self.skipTest("TOF sampler not running")
+            self.assertIn(response.status_code, (200, 409))
+            
+            time.sleep(0.5)
+            status = requests.get(f"{self.base_url}/actions/proximity_loop", timeout=self.timeout).json()
+            self.assertTrue(status["running"])
+            self.assertGreater(status["ticks"], 0)
+            self.assertIn("deadline_misses", status)
+            # The LED is only redrawn when the expression changes
+            self.assertLessEqual(status["led_updates"], status["ticks"])
+            
+            response = requests.post(f"{self.base_url}/actions/proximity_loop/stop", timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.json()["running"])
+            
+            print(f"✅ {status['ticks']} ticks, {status['led_updates']} LED updates, jitter {status['jitter']}")
+            
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
     def test_cors_headers(self):
         """Test CORS headers are present"""
         print("\n🌐 Testing CORS headers...")
@@ -228,7 +291,38 @@ class TestCombinedAPI(unittest.TestCase):
                 print(f"   Proximity reaction: {reaction_data.get('expression')}")
             
             print("✅ Request sequence completed successfully")
-            
+        
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_concurrent_reads_coalesced(self):
+        """Test that a burst of concurrent reads shares hardware reads"""
+        print("\n🚌 Testing I2C read coalescing...")
+        
+        try:
+            status = requests.get(f"{self.base_url}/status", timeout=self.timeout).json()
+            if status["tof_sensor"].get("virtual", {}).get("speed") == 0:
+                self.skipTest("Replay at speed 0 reads instantly; nothing to coalesce")
+            before = status["i2c_bus"]
+            
+            burst = 16
+            params = {"count": 1, "interval": 0.01}
+            with ThreadPoolExecutor(max_workers=burst) as pool:
+                futures = [pool.submit(requests.get, f"{self.base_url}/tof/multiple",
+                                       params=params, timeout=self.timeout)
+                           for _ in range(burst)]
+                responses = [future.result() for future in futures]
+            for response in responses:
+                self.assertEqual(response.status_code, 200)
+                # A failed read is shared too, leaving no readings
+                self.assertLessEqual(len(response.json()["readings"]), 1)
+            
+            after = requests.get(f"{self.base_url}/status", timeout=self.timeout).json()["i2c_bus"]
+            coalesced = after["coalesced_reads"] - before["coalesced_reads"]
+            self.assertGreater(coalesced, 0)
+            
+            print(f"✅ {burst} concurrent reads, {coalesced} served by a shared measurement")
+        
         except requests.exceptions.ConnectionError:
             self.skipTest("Combined API server not running on port 5000")
 
@@ -179,6 +179,143 @@ class TestLEDControlAPI(unittest.TestCase):
         except requests.exceptions.ConnectionError:
             self.skipTest("Combined API server not running on port 5000")
     
+    def test_blink_preempts_animation(self):
+        """Test that a blink returns at once and pauses a running animation"""
+        print("\n⏯️  Testing blink preemption...")
+        
+        try:
+            status = requests.get(f"{self.base_url}/status", timeout=self.timeout).json()["led_controller"]
+            if "display" not in status:
+                self.skipTest("LED controller has no display thread (mock controller)")
+            
+            payload = {"expressions": ["normal", "happy"], "duration": 0.2, "loop": True}
+            requests.post(f"{self.base_url}/led/animate", json=payload, timeout=self.timeout)
+            time.sleep(0.1)
+            
+            start = time.time()
+            response = requests.post(f"{self.base_url}/led/blink", json={"duration": 0.5},
+                                   timeout=self.timeout)
+            elapsed = time.time() - start
+            self.assertEqual(response.status_code, 200)
+            # Queued, not performed on the request thread
+            self.assertLess(elapsed, 0.4)
+            
+            time.sleep(0.1)
+            display = requests.get(f"{self.base_url}/status",
+                                   timeout=self.timeout).json()["led_controller"]["display"]
+            self.assertTrue(display["blinking"])
+            self.assertTrue(display["animation_running"])
+            self.assertEqual(display["expression"], "closed")
+            self.assertGreater(display["preemptions"], status["display"]["preemptions"])
+            
+            time.sleep(0.6)
+            display = requests.get(f"{self.base_url}/status",
+                                   timeout=self.timeout).json()["led_controller"]["display"]
+            self.assertFalse(display["blinking"])
+            self.assertTrue(display["animation_running"])
+            self.assertIn(display["expression"], ["normal", "happy"])
+            
+            requests.post(f"{self.base_url}/led/stop", timeout=self.timeout)
+            print(f"✅ Blink returned in {elapsed * 1000:.0f} ms; animation resumed")
+            print(f"   Queue latency: {display['queue_latency_ms']}")
+            
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_blink_scheduling(self):
+        """Test blink duration validation, bounded waits and rapid blinking"""
+        print("\n⏱️  Testing blink scheduling...")
+        
+        try:
+            response = requests.post(f"{self.base_url}/led/blink", json={"duration": "forever"},
+                                   timeout=self.timeout)
+            self.assertEqual(response.status_code, 400)
+            
+            # Clamped instead of parking the display for minutes
+            response = requests.post(f"{self.base_url}/led/blink", json={"duration": 600},
+                                   timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(response.json()["duration"], 2.0)
+            
+            start = time.time()
+            response = requests.post(f"{self.base_url}/led/blink",
+                                   json={"duration": 0.2, "wait": True},
+                                   timeout=self.timeout)
+            elapsed = time.time() - start
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertTrue(data["success"])
+            self.assertTrue(data["completed"])
+            print(f"✅ Waited blink returned after {elapsed * 1000:.0f} ms")
+            
+            start = time.time()
+            for _ in range(30):
+                response = requests.post(f"{self.base_url}/led/blink", json={"duration": 0.1},
+                                       timeout=self.timeout)
+                self.assertEqual(response.status_code, 200)
+            elapsed = time.time() - start
+            self.assertLess(elapsed, 3.0)
+            print(f"✅ 30 blinks scheduled in {elapsed * 1000:.0f} ms")
+            
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_animation_timeline(self):
+        """Test keyframe timelines with easing, frame rate and validation"""
+        print("\n🎞️  Testing animation timeline...")
+        
+        try:
+            payload = {"keyframes": [{"expression": "normal", "duration": 0.1, "easing": "bounce"}]}
+            response = requests.post(f"{self.base_url}/led/animate", json=payload, timeout=self.timeout)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("easings", response.json())
+            
+            for expressions in (5, ["normal", "bogus"], [["normal"]]):
+                response = requests.post(f"{self.base_url}/led/animate",
+                                         json={"expressions": expressions}, timeout=self.timeout)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("available", response.json())
+            
+            # A 30 fps scan: two keyframes of 1/30 s each
+            payload = {"keyframes": [{"expression": "normal", "duration": 1 / 30},
+                                     {"expression": "wink", "duration": 1 / 30}]}
+            response = requests.post(f"{self.base_url}/led/animate", json=payload, timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertTrue(data["success"])
+            self.assertEqual(data["timeline"]["keyframes"], 2)
+            
+            status = requests.get(f"{self.base_url}/status", timeout=self.timeout).json()["led_controller"]
+            if "display" not in status:
+                requests.post(f"{self.base_url}/led/stop", timeout=self.timeout)
+                self.skipTest("LED controller has no display thread (mock controller)")
+            time.sleep(1.0)
+            display = requests.get(f"{self.base_url}/status",
+                                   timeout=self.timeout).json()["led_controller"]["display"]
+            self.assertTrue(display["animation_running"])
+            # Keyframes shown plus dropped ones follow the clock, not the render time
+            shown = display["animation_steps"] - status["display"]["animation_steps"]
+            self.assertGreaterEqual(shown + display["dropped_keyframes"], 25)
+            self.assertIsNotNone(display["step_jitter"])
+            
+            payload = {"keyframes": [{"expression": "happy", "duration": 0.2, "brightness": 255},
+                                     {"expression": "happy", "duration": 0.3, "brightness": 112,
+                                      "easing": "ease_in_out"}],
+                       "loop": False, "fps": 20}
+            response = requests.post(f"{self.base_url}/led/animate", json=payload, timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            time.sleep(0.7)
+            display = requests.get(f"{self.base_url}/status",
+                                   timeout=self.timeout).json()["led_controller"]["display"]
+            self.assertFalse(display["animation_running"])
+            self.assertEqual(display["brightness"], 112)
+            
+            requests.post(f"{self.base_url}/led/stop", timeout=self.timeout)
+            print(f"✅ Timeline ran; jitter {display['step_jitter']}, dropped {display['dropped_keyframes']}")
+            
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
     def test_invalid_expression(self):
         """Test invalid expression handling"""
         print("\n⚠️  Testing invalid expression...")
@@ -40,6 +40,55 @@ class TestTOFSensorAPI(unittest.TestCase):
         except requests.exceptions.ConnectionError:
             self.skipTest("Combined API server not running on port 5000")
     
+    def test_sampled_distance(self):
+        """Test distance served from the background sampler"""
+        print("\n📡 Testing sampled distance reading...")
+        
+        try:
+            response = requests.get(f"{self.base_url}/tof/distance", timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            
+            data = response.json()
+            self.assertIn(data.get("source"), ("sampler", "sensor"))
+            if data["source"] != "sampler":
+                self.skipTest("Background sampler not running")
+            
+            self.assertIn("age_ms", data)
+            self.assertGreaterEqual(data["age_ms"], 0)
+            
+            print(f"✅ Sampled distance: {data['distance_mm']}mm ({data['age_ms']:.1f}ms old)")
+        
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_max_age(self):
+        """Test max_age_ms freshness control"""
+        print("\n🧊 Testing max_age_ms...")
+        
+        try:
+            response = requests.get(f"{self.base_url}/tof/distance",
+                                  params={"max_age_ms": 0}, timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertFalse(data["cache_hit"])
+            self.assertEqual(data["source"], "sensor")
+            
+            response = requests.get(f"{self.base_url}/tof/distance",
+                                  params={"max_age_ms": 5000}, timeout=self.timeout)
+            data = response.json()
+            self.assertTrue(data["cache_hit"])
+            self.assertLessEqual(data["age_ms"], 5000)
+            
+            response = requests.get(f"{self.base_url}/status", timeout=self.timeout)
+            cache = response.json()["tof_cache"]
+            self.assertGreater(cache["hits"], 0)
+            self.assertGreater(cache["misses"], 0)
+            
+            print(f"✅ Cache: {cache['hits']} hits, {cache['misses']} misses")
+        
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
     def test_multiple_readings(self):
         """Test multiple distance readings"""
         print("\n📊 Testing multiple readings...")
@@ -77,6 +126,164 @@ class TestTOFSensorAPI(unittest.TestCase):
         except requests.exceptions.ConnectionError:
             self.skipTest("Combined API server not running on port 5000")
     
+    def test_robust_statistics(self):
+        """Test requesting robust statistics"""
+        print("\n📐 Testing robust statistics...")
+        
+        try:
+            params = {"count": 5, "interval": 0.05, "stats": "count,median,p5,p95,stddev,mad,valid,invalid"}
+            response = requests.get(f"{self.base_url}/tof/multiple",
+                                  params=params, timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            
+            data = response.json()
+            stats = data["statistics"]
+            for name in ("median", "p5", "p95", "stddev", "mad", "valid", "invalid"):
+                self.assertIn(name, stats)
+            # Failed reads leave no reading but still count as invalid
+            self.assertEqual(stats["count"], len(data["readings"]))
+            self.assertEqual(stats["valid"] + stats["invalid"], params["count"])
+            if stats["valid"]:
+                self.assertLessEqual(stats["p5"], stats["median"])
+                self.assertLessEqual(stats["median"], stats["p95"])
+            
+            params = {"count": 1, "stats": "bogus"}
+            response = requests.get(f"{self.base_url}/tof/multiple",
+                                  params=params, timeout=self.timeout)
+            self.assertEqual(response.status_code, 400)
+            
+            print(f"✅ median={stats['median']}mm, mad={stats['mad']}mm")
+            
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_sampling_job(self):
+        """Test asynchronous sampling jobs"""
+        print("\n🧵 Testing sampling jobs...")
+        
+        try:
+            payload = {"count": 5, "interval": 0.05}
+            response = requests.post(f"{self.base_url}/tof/jobs",
+                                   json=payload, timeout=self.timeout)
+            self.assertEqual(response.status_code, 202)
+            job_id = response.json()["job_id"]
+            
+            deadline = time.time() + self.timeout
+            while time.time() < deadline:
+                response = requests.get(f"{self.base_url}/tof/jobs/{job_id}", timeout=self.timeout)
+                self.assertEqual(response.status_code, 200)
+                data = response.json()
+                if data["status"] not in ("queued", "running"):
+                    break
+                time.sleep(0.1)
+            
+            self.assertEqual(data["status"], "completed")
+            self.assertEqual(data["progress"], 1.0)
+            self.assertIn("statistics", data)
+            
+            # A long job must be cancellable without waiting out its window
+            payload = {"count": 100, "interval": 5.0}
+            response = requests.post(f"{self.base_url}/tof/jobs",
+                                   json=payload, timeout=self.timeout)
+            job_id = response.json()["job_id"]
+            response = requests.delete(f"{self.base_url}/tof/jobs/{job_id}", timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            
+            time.sleep(0.2)
+            response = requests.get(f"{self.base_url}/tof/jobs/{job_id}", timeout=self.timeout)
+            self.assertEqual(response.json()["status"], "cancelled")
+            
+            response = requests.get(f"{self.base_url}/tof/jobs/unknown", timeout=self.timeout)
+            self.assertEqual(response.status_code, 404)
+            
+            print(f"✅ Job completed with {data['readings_collected']} readings; long job cancelled")
+            
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_history(self):
+        """Test sampled history window and downsampling"""
+        print("\n🕒 Testing reading history...")
+        
+        try:
+            params = {"seconds": 5, "max_points": 10}
+            response = requests.get(f"{self.base_url}/tof/history",
+                                  params=params, timeout=self.timeout)
+            if response.status_code == 503:
+                self.skipTest("Background sampler not running")
+            self.assertEqual(response.status_code, 200)
+            
+            data = response.json()
+            self.assertTrue(data.get("success"))
+            self.assertLessEqual(data["count"], 10)
+            self.assertEqual(len(data["distance_mm"]), data["count"])
+            self.assertEqual(len(data["timestamp"]), data["count"])
+            self.assertEqual(data["timestamp"], sorted(data["timestamp"]))
+            
+            print(f"✅ Got {data['count']} history points")
+        
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_stream(self):
+        """Test Server-Sent Events distance stream"""
+        print("\n🌊 Testing distance stream...")
+        
+        try:
+            response = requests.get(f"{self.base_url}/tof/stream",
+                                  params={"rate_hz": 5}, stream=True, timeout=self.timeout)
+            if response.status_code == 503:
+                self.skipTest("Background sampler not running")
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.headers["Content-Type"].startswith("text/event-stream"))
+            
+            events = []
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("data: "):
+                    events.append(json.loads(line[len("data: "):]))
+                if len(events) == 3:
+                    break
+            response.close()
+            
+            for event in events:
+                self.assertIn("distance_mm", event)
+                self.assertIn("timestamp", event)
+            
+            print(f"✅ Received {len(events)} streamed readings")
+        
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_zone_events(self):
+        """Test zone event stream"""
+        print("\n🚪 Testing zone events...")
+        
+        try:
+            response = requests.get(f"{self.base_url}/tof/events", stream=True, timeout=self.timeout)
+            if response.status_code == 503:
+                self.skipTest("Background sampler not running")
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.headers["Content-Type"].startswith("text/event-stream"))
+            
+            event_type, state = None, None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event: "):
+                    event_type = line[len("event: "):]
+                elif line.startswith("data: "):
+                    state = json.loads(line[len("data: "):])
+                    break
+            response.close()
+            
+            self.assertEqual(event_type, "state")
+            zones = requests.get(f"{self.base_url}/status", timeout=self.timeout).json()["tof_events"]["zones"]
+            if state["zone"] is not None:
+                self.assertIn(state["zone"], [zone["name"] for zone in zones])
+            
+            print(f"✅ Current zone: {state['zone']}")
+        
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
     def test_sensor_status(self):
         """Test sensor status endpoint"""
         print("\n📋 Testing sensor status...")
@@ -96,6 +303,226 @@ class TestTOFSensorAPI(unittest.TestCase):
         except requests.exceptions.ConnectionError:
             self.skipTest("Combined API server not running on port 5000")
     
+    def test_ranging_mode_status(self):
+        """Test ranging mode and effective sample rate reporting"""
+        print("\n⏱️  Testing ranging mode status...")
+        
+        try:
+            response = requests.get(f"{self.base_url}/status", timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            
+            data = response.json()["tof_sensor"]
+            self.assertIn(data.get("ranging_mode"), ("single", "continuous"))
+            self.assertIn("inter_measurement_ms", data)
+            self.assertIn("effective_sample_rate_hz", data)
+            
+            print(f"✅ Ranging mode: {data['ranging_mode']}, rate: {data['effective_sample_rate_hz']}Hz")
+            
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_filter_chain(self):
+        """Test configuring the filter chain"""
+        print("\n🧹 Testing filter chain...")
+        
+        try:
+            response = requests.get(f"{self.base_url}/tof/filters", timeout=self.timeout)
+            if response.status_code == 503:
+                self.skipTest("Background sampler not running")
+            self.assertEqual(response.status_code, 200)
+            original = [{k: v for k, v in stage.items() if k not in ("samples", "avg_ns", "last_ns")}
+                        for stage in response.json()["stages"]]
+            
+            stages = [{"type": "median", "window": 3}, {"type": "ema", "alpha": 0.5},
+                      {"type": "kalman", "process_variance": 4, "measurement_variance": 100}]
+            response = requests.put(f"{self.base_url}/tof/filters",
+                                  json={"stages": stages}, timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            
+            time.sleep(0.3)
+            data = requests.get(f"{self.base_url}/tof/filters", timeout=self.timeout).json()
+            self.assertEqual([stage["type"] for stage in data["stages"]], ["median", "ema", "kalman"])
+            for stage in data["stages"]:
+                self.assertIn("avg_ns", stage)
+            
+            data = requests.get(f"{self.base_url}/tof/distance", timeout=self.timeout).json()
+            self.assertIn("filtered_mm", data)
+            
+            response = requests.put(f"{self.base_url}/tof/filters",
+                                  json={"stages": [{"type": "bogus"}]}, timeout=self.timeout)
+            self.assertEqual(response.status_code, 400)
+            
+            response = requests.put(f"{self.base_url}/tof/filters",
+                                  json={"stages": [{"type": "median", "windw": 7}]}, timeout=self.timeout)
+            self.assertEqual(response.status_code, 400)
+            
+            requests.put(f"{self.base_url}/tof/filters", json={"stages": original}, timeout=self.timeout)
+            
+            print(f"✅ Filter chain cost: {data.get('filtered_mm')}mm filtered")
+            
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_ranging_profiles(self):
+        """Test switching ranging profiles"""
+        print("\n🎚️  Testing ranging profiles...")
+        
+        try:
+            response = requests.get(f"{self.base_url}/tof/profile", timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            
+            data = response.json()
+            self.assertIn(data["profile"], data["profiles"])
+            for name in ("fast", "balanced", "accurate"):
+                self.assertIn("expected_latency_ms", data["profiles"][name])
+                self.assertIn("measured", data["profiles"][name])
+            original = data["profile"]
+            
+            response = requests.post(f"{self.base_url}/tof/profile",
+                                   json={"profile": "fast"}, timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["profile"], "fast")
+            
+            response = requests.post(f"{self.base_url}/tof/profile",
+                                   json={"profile": "invalid_profile"}, timeout=self.timeout)
+            self.assertEqual(response.status_code, 400)
+            
+            requests.post(f"{self.base_url}/tof/profile",
+                        json={"profile": original}, timeout=self.timeout)
+            
+            print(f"✅ Profiles: {', '.join(data['profiles'])}")
+        
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_sensor_array(self):
+        """Test per-sensor and combined array readings"""
+        print("\n🛰️  Testing sensor array...")
+        
+        try:
+            response = requests.get(f"{self.base_url}/tof/array", timeout=self.timeout)
+            if response.status_code == 503:
+                self.skipTest("TOF sensor array not configured")
+            self.assertEqual(response.status_code, 200)
+            
+            data = response.json()
+            self.assertTrue(data["success"])
+            self.assertIn("skew_ms", data)
+            names = list(data["sensors"])
+            self.assertGreater(len(names), 0)
+            
+            response = requests.get(f"{self.base_url}/tof/{names[0]}/distance", timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["sensor"], names[0])
+            self.assertIn("age_ms", response.json())
+            
+            response = requests.get(f"{self.base_url}/tof/no_such_sensor/distance", timeout=self.timeout)
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(sorted(response.json()["available"]), sorted(names))
+            
+            print(f"✅ Array: {', '.join(names)} at {data['rate_hz']:.1f} Hz combined")
+        
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_trace_replay(self):
+        """Test a replayed trace standing in for the sensor"""
+        print("\n📼 Testing trace replay...")
+        
+        try:
+            response = requests.get(f"{self.base_url}/status", timeout=self.timeout)
+            virtual = response.json()["tof_sensor"].get("virtual", {})
+            if virtual.get("kind") != "replay":
+                self.skipTest("Server not replaying a trace (set TOF_REPLAY)")
+            
+            self.assertGreater(virtual["samples"], 0)
+            response = requests.get(f"{self.base_url}/tof/distance",
+                                  params={"max_age_ms": 0}, timeout=self.timeout)
+            self.assertIn(response.status_code, (200, 500))
+            
+            print(f"✅ Replaying {virtual['samples']} samples from {virtual['source']} at speed {virtual['speed']}")
+            
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_adaptive_rate(self):
+        """Test adaptive sampling rate reporting"""
+        print("\n🎚️ Testing adaptive sampling rate...")
+        
+        try:
+            response = requests.get(f"{self.base_url}/status", timeout=self.timeout)
+            sampler = response.json()["tof_sampler"]
+            if not sampler.get("adaptive"):
+                self.skipTest("Adaptive sampling not enabled (set TOF_ADAPTIVE=1)")
+            
+            adaptive = sampler["adaptive"]
+            self.assertGreaterEqual(sampler["current_rate_hz"], adaptive["min_hz"])
+            self.assertLessEqual(sampler["current_rate_hz"], adaptive["max_hz"])
+            self.assertEqual(sampler["rate_hz"], adaptive["max_hz"])
+            
+            print(f"✅ Sampling at {sampler['current_rate_hz']:.1f} Hz ({adaptive['min_hz']}-{adaptive['max_hz']} Hz)")
+            
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_synthetic_sensor(self):
+        """Test the synthetic sensor's hardware-like read latency"""
+        print("\n🎭 Testing synthetic sensor...")
+        
+        try:
+            status = requests.get(f"{self.base_url}/status", timeout=self.timeout).json()
+            virtual = status["tof_sensor"].get("virtual", {})
+            if virtual.get("kind") != "synthetic":
+                self.skipTest("Server not using the synthetic sensor")
+            before = status["i2c_bus"]["coalesced_reads"]
+            
+            start = time.time()
+            response = requests.get(f"{self.base_url}/tof/distance",
+                                  params={"max_age_ms": 0}, timeout=self.timeout)
+            elapsed_ms = (time.time() - start) * 1000
+            self.assertIn(response.status_code, (200, 500))
+            
+            # A fresh read cannot return before the simulated measurement
+            # completes, unless it joined the sampler's read already in flight
+            after = requests.get(f"{self.base_url}/status", timeout=self.timeout).json()["i2c_bus"]
+            joined = after["coalesced_reads"] > before
+            if response.status_code == 200 and not response.json()["cache_hit"] and not joined:
+                self.assertGreaterEqual(elapsed_ms, virtual["latency_ms"] * 0.9)
+            
+            print(f"✅ Synthetic read took {elapsed_ms:.1f} ms (latency {virtual['latency_ms']:.1f} ms, seed {virtual['seed']})")
+            
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
+    def test_recording(self):
+        """Test binary sample recording"""
+        print("\n💾 Testing sample recording...")
+        
+        try:
+            response = requests.post(f"{self.base_url}/tof/recording/start", timeout=self.timeout)
+            if response.status_code == 503:
+                self.skipTest("TOF sampler not running")
+            self.assertEqual(response.status_code, 200)
+            
+            time.sleep(1.0)
+            response = requests.post(f"{self.base_url}/tof/recording/stop", timeout=self.timeout)
+            self.assertEqual(response.status_code, 200)
+            written = response.json()["records_written"]
+            self.assertGreater(written, 0)
+            
+            response = requests.get(f"{self.base_url}/tof/recording", timeout=self.timeout)
+            data = response.json()
+            self.assertFalse(data["running"])
+            self.assertEqual(data["record_size"], 16)
+            segment = [s for s in data["segments"] if data["segment"].endswith(s["file"])]
+            self.assertEqual(len(segment), 1)
+            self.assertGreater(segment[0]["records"], 0)
+            
+            print(f"✅ Recorded {written} samples to {segment[0]['file']}")
+            
+        except requests.exceptions.ConnectionError:
+            self.skipTest("Combined API server not running on port 5000")
+    
     def test_sensor_initialization(self):
         """Test sensor re-initialization"""
         print("\n🔄 Testing sensor initialization...")
@@ -0,0 +1,138 @@
+"""
+WebSocket Channel Tests
+Tests for the combined LED command / TOF telemetry WebSocket channel
+"""
+
+import unittest
+import json
+import time
+
+try:
+    from websockets.sync.client import connect
+except ImportError:
+    connect = None
+
+class TestWebSocketChannel(unittest.TestCase):
+    """Test cases for the WebSocket channel"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        if connect is None:
+            self.skipTest("websockets>=11 not installed")
+        self.ws_url = "ws://localhost:8765"
+        self.timeout = 5
+    
+    def open_channel(self):
+        try:
+            return connect(self.ws_url, open_timeout=self.timeout)
+        except (ConnectionRefusedError, OSError):
+            self.skipTest("WebSocket channel not running on port 8765")
+    
+    def receive_ack(self, ws, command_id):
+        """Read messages until the ack for command_id arrives"""
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            message = json.loads(ws.recv(timeout=self.timeout))
+            if message.get("id") == command_id:
+                return message
+        self.fail(f"No reply for command {command_id}")
+    
+    def test_expression_command(self):
+        """Test setting an expression over the channel"""
+        print("\n🔌 Testing WebSocket expression command...")
+        
+        with self.open_channel() as ws:
+            ws.send(json.dumps({"id": 1, "type": "expression", "expression": "happy"}))
+            reply = self.receive_ack(ws, 1)
+            
+            self.assertEqual(reply["type"], "ack")
+            self.assertTrue(reply["success"])
+            self.assertIn("server_ms", reply)
+            
+            ws.send(json.dumps({"id": 2, "type": "expression", "expression": "invalid_expression"}))
+            reply = self.receive_ack(ws, 2)
+            self.assertFalse(reply["success"])
+            
+            print(f"✅ Expression ack in {reply['server_ms']:.2f}ms server time")
+    
+    def test_animate_command(self):
+        """Test animate validation and acks over the channel"""
+        print("\n🎞️  Testing WebSocket animate command...")
+        
+        with self.open_channel() as ws:
+            ws.send(json.dumps({"id": 1, "type": "animate", "expressions": ["normal"], "duration": "slow"}))
+            reply = self.receive_ack(ws, 1)
+            self.assertFalse(reply["success"])
+            self.assertIn("duration", reply["error"])
+            
+            ws.send(json.dumps({"id": 4, "type": "animate", "expressions": 5}))
+            reply = self.receive_ack(ws, 4)
+            self.assertFalse(reply["success"])
+            self.assertIn("available", reply)
+            
+            ws.send(json.dumps({"id": 2, "type": "animate", "fps": 30,
+                                "keyframes": [{"expression": "normal", "duration": 0.2},
+                                              {"expression": "happy", "duration": 0.2}]}))
+            reply = self.receive_ack(ws, 2)
+            self.assertTrue(reply["success"])
+            self.assertEqual(reply["timeline"]["keyframes"], 2)
+            
+            ws.send(json.dumps({"id": 3, "type": "stop"}))
+            self.receive_ack(ws, 3)
+            print("✅ Animate command validated and acknowledged")
+    
+    def test_round_trip_latency(self):
+        """Test ping command round trip"""
+        print("\n⏱️  Testing WebSocket round trip...")
+        
+        with self.open_channel() as ws:
+            rtts = []
+            for i in range(10):
+                start = time.perf_counter()
+                ws.send(json.dumps({"id": i, "type": "ping", "client_time": time.time()}))
+                self.receive_ack(ws, i)
+                rtts.append((time.perf_counter() - start) * 1000)
+            
+            print(f"✅ Round trip: avg={sum(rtts) / len(rtts):.2f}ms, max={max(rtts):.2f}ms")
+    
+    def test_telemetry_subscription(self):
+        """Test TOF telemetry pushes"""
+        print("\n📡 Testing WebSocket telemetry...")
+        
+        with self.open_channel() as ws:
+            ws.send(json.dumps({"id": 1, "type": "subscribe", "rate_hz": 10}))
+            reply = self.receive_ack(ws, 1)
+            if not reply["success"]:
+                self.skipTest("TOF sampler not running")
+            
+            samples = []
+            while len(samples) < 3:
+                message = json.loads(ws.recv(timeout=self.timeout))
+                if message["type"] == "tof":
+                    samples.append(message)
+            
+            for sample in samples:
+                self.assertIn("distance_mm", sample)
+                self.assertIn("timestamp", sample)
+            
+            print(f"✅ Received {len(samples)} telemetry samples")
+
+def run_websocket_tests():
+    """Run all WebSocket channel tests"""
+    print("🔌 Running WebSocket Channel Tests")
+    print("=" * 50)
+    
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestWebSocketChannel)
+    runner = unittest.TextTestRunner(verbosity=0)
+    result = runner.run(suite)
+    
+    print(f"\n📊 WebSocket Test Results:")
+    print(f"   Tests run: {result.testsRun}")
+    print(f"   Failures: {len(result.failures)}")
+    print(f"   Errors: {len(result.errors)}")
+    print(f"   Skipped: {len(result.skipped)}")
+    
+    return result.wasSuccessful()
+
+if __name__ == "__main__":
+    run_websocket_tests()
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+I2C Bus Manager
+Serializes transactions on a shared I2C bus and coalesces concurrent reads
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Flight:
+    """One hardware read that any number of callers are waiting on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 1
+
+
+class I2CBusManager:
+    """Owns access to one I2C bus.
+    
+    ``transaction()`` holds the bus lock for a multi-step exchange with a
+    device (e.g. trigger, poll, read result) so no other thread's traffic
+    lands in the middle of it.
+    
+    ``read(key, fn)`` is single-flight: the first caller for a key runs
+    ``fn`` inside a transaction; callers that arrive while it is in flight
+    wait for that same result instead of queueing their own read. A burst of
+    requests during one measurement therefore costs one hardware read.
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self.transactions = 0
+        self.hardware_reads = 0
+        self.coalesced_reads = 0
+        self.max_waiters = 0
+        self.busy_ns = 0
+    
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            start = time.perf_counter_ns()
+            self.transactions += 1
+            try:
+                yield
+            finally:
+                self.busy_ns += time.perf_counter_ns() - start
+    
+    def read(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run ``fn`` on the bus, sharing the result with concurrent callers.
+        
+        Exceptions raised by ``fn`` propagate to every waiter of that read.
+        """
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+                self.coalesced_reads += 1
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        
+        try:
+            with self.transaction():
+                self.hardware_reads += 1
+                flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+        finally:
+            # Unpublish before waking waiters so late arrivals start a new read
+            with self._flights_lock:
+                del self._flights[key]
+                self.max_waiters = max(self.max_waiters, flight.waiters)
+            flight.done.set()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+    
+    def get_status(self) -> Dict[str, Any]:
+        requested = self.hardware_reads + self.coalesced_reads
+        return {
+            "transactions": self.transactions,
+            "hardware_reads": self.hardware_reads,
+            "coalesced_reads": self.coalesced_reads,
+            "coalesced_ratio": self.coalesced_reads / requested if requested else None,
+            "max_waiters": self.max_waiters,
+            "busy_ms": self.busy_ns / 1e6
+        }
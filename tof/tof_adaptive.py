@@ -0,0 +1,98 @@
+"""
+Adaptive TOF Sampling Rate
+Chooses the sampler rate from recent signal activity
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+from tof_sampler import OUT_OF_RANGE_MM, STATUS_OK, TOFReading
+
+
+class AdaptiveRate:
+    """Sampling rate policy: fast while something moves, slow when idle.
+    
+    A sample counts as activity when the distance changes faster than
+    ``activity_mm_s`` (using the filtered value when there is one, so
+    sensor noise does not register as motion); ``boost()`` lets other
+    detectors, such as zone changes, report activity too. Activity jumps
+    straight to ``max_hz``. After ``hold_s`` without activity the rate
+    decays by ``decay`` per sample down to ``min_hz``. Out-of-range codes
+    and failed reads never count as activity.
+    """
+    
+    def __init__(self, min_hz: float = 5.0, max_hz: float = 50.0,
+                 activity_mm_s: float = 250.0, hold_s: float = 2.0, decay: float = 0.8):
+        if not 0 < min_hz <= max_hz:
+            raise ValueError("adaptive rates need 0 < min_hz <= max_hz")
+        if activity_mm_s <= 0 or hold_s < 0 or not 0 < decay < 1:
+            raise ValueError("activity threshold must be positive, hold >= 0 and decay in (0, 1)")
+        self.min_hz = min_hz
+        self.max_hz = max_hz
+        self.activity_mm_s = activity_mm_s
+        self.hold_s = hold_s
+        self.decay = decay
+        self.rate_hz = max_hz
+        self._previous: Optional[TOFReading] = None
+        self._last_activity_ns: Optional[int] = None
+        self._boosted = False
+        self.boosts = 0
+        self.last_speed_mm_s: Optional[float] = None
+        self._time_at_min_ns = 0
+        self._last_update_ns: Optional[int] = None
+    
+    def boost(self):
+        """Report activity seen elsewhere; applied on the next sample"""
+        self._boosted = True
+    
+    @staticmethod
+    def _value(reading: TOFReading) -> Optional[float]:
+        if reading.status != STATUS_OK or reading.distance_mm is None or reading.distance_mm >= OUT_OF_RANGE_MM:
+            return None
+        return reading.filtered_mm if reading.filtered_mm is not None else reading.distance_mm
+    
+    def update(self, reading: TOFReading) -> float:
+        """Feed one sample; returns the rate to sample at next"""
+        now = reading.monotonic_ns
+        if self._last_update_ns is None:
+            # The hold time runs from the first sample
+            self._last_activity_ns = now
+        elif self.rate_hz == self.min_hz:
+            self._time_at_min_ns += now - self._last_update_ns
+        self._last_update_ns = now
+        
+        active, self._boosted = self._boosted, False
+        value, previous = self._value(reading), self._previous
+        if value is not None:
+            previous_value = self._value(previous) if previous else None
+            if previous_value is not None and now > previous.monotonic_ns:
+                speed = abs(value - previous_value) * 1e9 / (now - previous.monotonic_ns)
+                self.last_speed_mm_s = speed
+                active = active or speed >= self.activity_mm_s
+            self._previous = reading
+        else:
+            self._previous = None
+        
+        if active:
+            if self.rate_hz < self.max_hz:
+                self.boosts += 1
+            self.rate_hz = self.max_hz
+            self._last_activity_ns = now
+        elif now - self._last_activity_ns >= self.hold_s * 1e9:
+            self.rate_hz = max(self.min_hz, self.rate_hz * self.decay)
+        return self.rate_hz
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "rate_hz": round(self.rate_hz, 2),
+            "min_hz": self.min_hz,
+            "max_hz": self.max_hz,
+            "activity_mm_s": self.activity_mm_s,
+            "hold_s": self.hold_s,
+            "decay": self.decay,
+            "boosts": self.boosts,
+            "idle_for_s": round((time.monotonic_ns() - self._last_activity_ns) / 1e9, 2)
+                          if self._last_activity_ns is not None else None,
+            "time_at_min_s": round(self._time_at_min_ns / 1e9, 2),
+            "last_speed_mm_s": round(self.last_speed_mm_s, 1) if self.last_speed_mm_s is not None else None
+        }
@@ -0,0 +1,444 @@
+"""
+TOF Sensor Array
+Several VL53L0X sensors on one I2C bus, addressed at boot through XSHUT and read round-robin
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from i2c_bus import I2CBusManager
+from tof_sampler import RateMeter, TOFReading, STATUS_ERROR, STATUS_OK
+
+# Every VL53L0X answers here after power-up until it is given a new address
+DEFAULT_ADDRESS = 0x29
+
+
+class ArraySensorSpec(NamedTuple):
+    name: str
+    xshut_pin: int
+    address: int
+
+
+def parse_array_spec(text: str) -> List[ArraySensorSpec]:
+    """Parse "left:17:0x30,center:27:0x31" (name:xshut_gpio:i2c_address).
+    
+    Raises ValueError for malformed entries or duplicate names, pins or addresses.
+    """
+    specs = []
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        try:
+            name, pin, address = item.split(":")
+            spec = ArraySensorSpec(name, int(pin), int(address, 0))
+        except ValueError:
+            raise ValueError(f"Invalid array sensor '{item}' (expected name:xshut_gpio:address)")
+        if not 0x08 <= spec.address <= 0x77 or spec.address == DEFAULT_ADDRESS:
+            raise ValueError(f"Invalid address for {name}: 0x{spec.address:02x}")
+        specs.append(spec)
+    for field in ("name", "xshut_pin", "address"):
+        values = [getattr(spec, field) for spec in specs]
+        if len(set(values)) != len(values):
+            raise ValueError(f"Duplicate sensor {field} in array spec")
+    if not specs:
+        raise ValueError("Array spec lists no sensors")
+    return specs
+
+
+class SimulatedI2CBus:
+    """Stands in for busio.I2C: one transaction at a time, each with a fixed cost.
+    
+    Devices register at their current address, so an XSHUT sequencing bug
+    (two sensors powered at 0x29) shows up as an address collision.
+    """
+    
+    def __init__(self, transaction_us: float = 250.0):
+        self.transaction_s = transaction_us / 1e6
+        self.transactions = 0
+        self.devices: Dict[int, "SimulatedVL53L0X"] = {}
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            time.sleep(self.transaction_s)
+            self.transactions += 1
+            yield
+    
+    def attach(self, device: "SimulatedVL53L0X", address: int):
+        if address in self.devices:
+            raise OSError(f"I2C address collision at 0x{address:02x}")
+        self.devices[address] = device
+    
+    def detach(self, device: "SimulatedVL53L0X"):
+        self.devices = {addr: dev for addr, dev in self.devices.items() if dev is not device}
+    
+    def open(self, address: int = DEFAULT_ADDRESS) -> "SimulatedVL53L0X":
+        device = self.devices.get(address)
+        if device is None:
+            raise ValueError(f"No I2C device at address: 0x{address:02x}")
+        return device
+
+
+class SimulatedVL53L0X:
+    """Driver-compatible VL53L0X model (range, data_ready, set_address, continuous mode).
+    
+    In continuous mode measurement k completes at ``start + k * budget`` no
+    matter when the host reads, like the real ranging sequencer.
+    """
+    
+    def __init__(self, bus: SimulatedI2CBus, base_distance_mm: int = 500,
+                 noise_mm: float = 5.0, timing_budget_us: int = 33000):
+        self.bus = bus
+        self.base_distance_mm = base_distance_mm
+        self.noise_mm = noise_mm
+        self.measurement_timing_budget = timing_budget_us
+        self.address = None
+        self._continuous_start: Optional[float] = None
+        self._last_read_index = 0
+    
+    def power(self, on: bool):
+        """XSHUT high boots the chip at the default address; low resets it"""
+        self.bus.detach(self)
+        self.address = None
+        self._continuous_start = None
+        if on:
+            self.bus.attach(self, DEFAULT_ADDRESS)
+            self.address = DEFAULT_ADDRESS
+    
+    def set_address(self, new_address: int):
+        with self.bus.transaction():
+            self.bus.detach(self)
+            self.bus.attach(self, new_address)
+            self.address = new_address
+    
+    @property
+    def _budget_s(self) -> float:
+        return self.measurement_timing_budget / 1e6
+    
+    def _completed(self) -> int:
+        return int((time.monotonic() - self._continuous_start) / self._budget_s)
+    
+    def _measure(self) -> int:
+        return max(0, int(random.gauss(self.base_distance_mm, self.noise_mm)))
+    
+    def start_continuous(self):
+        with self.bus.transaction():
+            self._continuous_start = time.monotonic()
+            self._last_read_index = 0
+    
+    def stop_continuous(self):
+        with self.bus.transaction():
+            self._continuous_start = None
+    
+    @property
+    def data_ready(self) -> bool:
+        with self.bus.transaction():
+            return (self._continuous_start is not None and
+                    self._completed() > self._last_read_index)
+    
+    @property
+    def range(self) -> int:
+        if self._continuous_start is None:
+            # Single shot: trigger, wait out the budget, read the result
+            with self.bus.transaction():
+                pass
+            time.sleep(self._budget_s)
+        else:
+            while not self.data_ready:
+                time.sleep(self._budget_s / 10)
+            self._last_read_index = self._completed()
+        with self.bus.transaction():
+            return self._measure()
+
+
+class SimulatedPin:
+    """XSHUT line of a simulated sensor (digitalio.DigitalInOut subset)"""
+    
+    def __init__(self, device: SimulatedVL53L0X):
+        self.device = device
+        self._value = False
+    
+    @property
+    def value(self) -> bool:
+        return self._value
+    
+    @value.setter
+    def value(self, on: bool):
+        if on != self._value:
+            self.device.power(on)
+        self._value = on
+
+
+class ArrayMember:
+    """One sensor of the array and its newest reading"""
+    
+    def __init__(self, index: int, spec: ArraySensorSpec, pin):
+        self.index = index
+        self.spec = spec
+        self.pin = pin
+        self.device = None
+        self.rate_meter = RateMeter()
+        self.sample_count = 0
+        self.error_count = 0
+        self.last_error: Optional[str] = None
+        self._latest: Optional[TOFReading] = None
+    
+    @property
+    def name(self) -> str:
+        return self.spec.name
+    
+    @property
+    def latest(self) -> Optional[TOFReading]:
+        return self._latest
+    
+    def get_status(self) -> Dict[str, Any]:
+        latest = self._latest
+        return {
+            "address": f"0x{self.spec.address:02x}",
+            "xshut_pin": self.spec.xshut_pin,
+            "online": self.device is not None,
+            "sample_count": self.sample_count,
+            "error_count": self.error_count,
+            "effective_rate_hz": self.rate_meter.rate_hz,
+            "last_error": self.last_error,
+            "latest_age_ms": latest.age_ms() if latest else None
+        }
+
+
+class TOFSensorArray:
+    """XSHUT-addressed VL53L0X sensors sharing one I2C bus.
+    
+    Boot holds every sensor in reset, then releases them one at a time and
+    moves each off 0x29 before the next one wakes up. All sensors then range
+    in continuous mode, so their measurements overlap in time; the scheduler
+    only polls ``data_ready`` round-robin and collects whichever results have
+    completed. Bus time per sample is a few short transactions, so total
+    throughput grows with the number of sensors instead of being capped at
+    one timing budget per read.
+    
+    All traffic goes through ``bus`` (the primary sensor's bus manager when
+    the bus is shared), so array reads never interleave with the primary's.
+    A primary sensor on the same bus must be sequenced too: with
+    ``primary_pin`` (its XSHUT line) boot holds it in reset with the others
+    and releases it last, so it alone wakes at 0x29, then calls
+    ``reinit_primary`` to rebuild its driver.
+    """
+    
+    def __init__(self, specs: List[ArraySensorSpec], i2c, open_sensor: Callable,
+                 make_pin: Callable, timing_budget_us: int = 33000,
+                 poll_interval_ms: float = 1.0, simulated: bool = False,
+                 bus: Optional[I2CBusManager] = None, primary_pin=None,
+                 reinit_primary: Optional[Callable[[], bool]] = None):
+        self.i2c = i2c
+        self.bus = bus or I2CBusManager()
+        self.primary_pin = primary_pin
+        self.reinit_primary = reinit_primary
+        self.simulated = simulated
+        self.timing_budget_us = timing_budget_us
+        self.poll_interval_s = poll_interval_ms / 1000
+        self.members = [ArrayMember(i, spec, make_pin(spec)) for i, spec in enumerate(specs)]
+        self._by_name = {member.name: member for member in self.members}
+        self._open_sensor = open_sensor
+        self.booted = False
+        self.last_error: Optional[str] = None
+        self.rate_meter = RateMeter()
+        self.listener_errors = 0
+        self._listeners: List[Callable[[ArrayMember, TOFReading], None]] = []
+        self._thread = None
+        self._stop_event = threading.Event()
+    
+    def add_listener(self, callback: Callable[[ArrayMember, TOFReading], None]):
+        """Call ``callback(member, reading)`` on the scheduler thread for every sample"""
+        self._listeners = self._listeners + [callback]
+    
+    @classmethod
+    def from_hardware(cls, specs: List[ArraySensorSpec], i2c=None,
+                      primary_xshut: Optional[int] = None, **kwargs) -> "TOFSensorArray":
+        """Real sensors; XSHUT pins are BCM GPIO numbers. Raises ImportError off the Pi."""
+        import board
+        import busio
+        import digitalio
+        import adafruit_vl53l0x
+        
+        def make_pin(pin_number, value=False):
+            pin = digitalio.DigitalInOut(getattr(board, f"D{pin_number}"))
+            pin.switch_to_output(value=value)
+            return pin
+        
+        if i2c is None:
+            i2c = busio.I2C(board.SCL, board.SDA)
+        # The primary keeps running until boot sequences it
+        primary_pin = make_pin(primary_xshut, True) if primary_xshut is not None else None
+        return cls(specs, i2c, adafruit_vl53l0x.VL53L0X, lambda spec: make_pin(spec.xshut_pin),
+                   primary_pin=primary_pin, **kwargs)
+    
+    @classmethod
+    def simulated_array(cls, specs: List[ArraySensorSpec], transaction_us: float = 250.0,
+                        primary: bool = False, primary_xshut: bool = False,
+                        **kwargs) -> "TOFSensorArray":
+        """Simulated sensors on a simulated bus, spread 300mm apart in distance.
+        
+        ``primary`` adds a powered sensor at 0x29, as the primary TOF sensor
+        sits on a real bus; ``primary_xshut`` wires its XSHUT line to the array.
+        """
+        bus = SimulatedI2CBus(transaction_us)
+        budget = kwargs.get("timing_budget_us", 33000)
+        devices = {
+            spec.name: SimulatedVL53L0X(bus, 300 + 300 * i, timing_budget_us=budget)
+            for i, spec in enumerate(specs)
+        }
+        if primary:
+            device = SimulatedVL53L0X(bus, 200, timing_budget_us=budget)
+            if primary_xshut:
+                kwargs["primary_pin"] = SimulatedPin(device)
+                kwargs["primary_pin"].value = True
+                kwargs.setdefault("reinit_primary", lambda: bus.open(DEFAULT_ADDRESS) is device)
+            else:
+                device.power(True)
+        return cls(specs, bus, lambda i2c: i2c.open(), lambda spec: SimulatedPin(devices[spec.name]),
+                   simulated=True, **kwargs)
+    
+    def get(self, name: str) -> Optional[ArrayMember]:
+        return self._by_name.get(name)
+    
+    @property
+    def names(self) -> List[str]:
+        return [member.name for member in self.members]
+    
+    def boot(self) -> bool:
+        """Assign every sensor its address and start continuous ranging.
+        
+        Holds the bus throughout, so the primary sensor is not read while
+        it is in reset or while an array sensor still answers at 0x29.
+        """
+        try:
+            with self.bus.transaction():
+                if self.primary_pin is not None:
+                    self.primary_pin.value = False
+                for member in self.members:
+                    member.pin.value = False
+                    member.device = None
+                time.sleep(0.01)
+                for member in self.members:
+                    member.pin.value = True
+                    # tBOOT is 1.2ms max; wait a little longer before talking to it
+                    time.sleep(0.002)
+                    device = self._open_sensor(self.i2c)
+                    device.set_address(member.spec.address)
+                    member.device = device
+                for member in self.members:
+                    member.device.measurement_timing_budget = self.timing_budget_us
+                    member.device.start_continuous()
+                self.booted = True
+                if self.primary_pin is not None:
+                    # Last one out of reset: the primary alone owns 0x29 again
+                    self.primary_pin.value = True
+                    time.sleep(0.002)
+                    if self.reinit_primary and not self.reinit_primary():
+                        self.last_error = "Primary TOF sensor did not come back after array boot"
+                        print(f"⚠️  {self.last_error}")
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"TOF array boot failed: {e}")
+            return False
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self) -> bool:
+        if self.running:
+            return True
+        if not self.booted and not self.boot():
+            return False
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="tof-array", daemon=True)
+        self._thread.start()
+        return True
+    
+    def stop(self, timeout: float = 2.0):
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+        for member in self.members:
+            if member.device is not None:
+                try:
+                    with self.bus.transaction():
+                        member.device.stop_continuous()
+                except Exception as e:
+                    member.last_error = str(e)
+    
+    def _read(self, member: ArrayMember) -> bool:
+        """Collect one result if the sensor has one; False when nothing was ready"""
+        try:
+            with self.bus.transaction():
+                if not member.device.data_ready:
+                    return False
+                distance, status = member.device.range, STATUS_OK
+        except Exception as e:
+            member.error_count += 1
+            member.last_error = str(e)
+            distance, status = None, STATUS_ERROR
+        reading = TOFReading(time.monotonic_ns(), distance, status, time.time())
+        member._latest = reading
+        member.sample_count += 1
+        member.rate_meter.tick()
+        self.rate_meter.tick()
+        for callback in self._listeners:
+            try:
+                callback(member, reading)
+            except Exception as e:
+                self.listener_errors += 1
+                print(f"TOF array listener failed: {e}")
+        return True
+    
+    def _run(self):
+        while not self._stop_event.is_set():
+            collected = False
+            for member in self.members:
+                collected |= self._read(member)
+            # Nothing finished during this sweep; back off briefly instead of
+            # spinning data_ready polls on the bus
+            if not collected:
+                self._stop_event.wait(self.poll_interval_s)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Newest reading of every sensor plus how far apart in time they are"""
+        now_ns = time.monotonic_ns()
+        sensors = {}
+        stamps = []
+        for member in self.members:
+            latest = member.latest
+            if latest is None:
+                sensors[member.name] = None
+                continue
+            stamps.append(latest.monotonic_ns)
+            sensors[member.name] = {
+                "distance_mm": latest.distance_mm,
+                "status": latest.status,
+                "timestamp": latest.timestamp,
+                "age_ms": latest.age_ms(now_ns)
+            }
+        return {
+            "sensors": sensors,
+            "skew_ms": (max(stamps) - min(stamps)) / 1e6 if stamps else None
+        }
+    
+    def get_status(self) -> Dict[str, Any]:
+        status = {
+            "simulated": self.simulated,
+            "booted": self.booted,
+            "primary_sequenced": self.primary_pin is not None,
+            "running": self.running,
+            "timing_budget_us": self.timing_budget_us,
+            "effective_rate_hz": self.rate_meter.rate_hz,
+            "last_error": self.last_error,
+            "sensors": {member.name: member.get_status() for member in self.members}
+        }
+        if self.simulated:
+            status["bus_transactions"] = self.i2c.transactions
+        status["bus"] = self.bus.get_status()
+        return status
@@ -0,0 +1,85 @@
+"""
+TOF Reading Cache
+Newest valid reading with max-age lookups, so requests only reach the bus when it is stale
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from tof_sampler import TOFReading, STATUS_ERROR, STATUS_OK
+
+SOURCE_SAMPLER = "sampler"
+SOURCE_SENSOR = "sensor"
+
+
+class CachedReading(NamedTuple):
+    reading: TOFReading
+    source: str
+
+
+class ReadingCache:
+    """Holds the newest successful reading, whoever produced it.
+    
+    The sampler stores every good sample through ``update``; requests that
+    miss read the sensor and store the result too, so the next request in
+    the same window is a hit. Entries are immutable tuples replaced by
+    reference, so lookups take no lock.
+    """
+    
+    def __init__(self):
+        self._entry: Optional[CachedReading] = None
+        self._store_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _store(self, reading: TOFReading, source: str):
+        with self._store_lock:
+            # A slow direct read must not replace a newer sampler sample
+            current = self._entry
+            if current is None or reading.monotonic_ns >= current.reading.monotonic_ns:
+                self._entry = CachedReading(reading, source)
+    
+    def update(self, reading: TOFReading):
+        """Sampler listener"""
+        if reading.status == STATUS_OK:
+            self._store(reading, SOURCE_SAMPLER)
+        else:
+            # The sensor just failed; let requests see that instead of an
+            # ever older good value
+            self._entry = None
+    
+    def get(self, max_age_ms: float) -> Optional[CachedReading]:
+        entry = self._entry
+        if entry is not None and entry.reading.age_ms() <= max_age_ms:
+            return entry
+        return None
+    
+    def get_or_read(self, max_age_ms: float,
+                    read_fn: Callable[[], Optional[int]]) -> Tuple[CachedReading, bool]:
+        """Return ``(entry, cache_hit)``; reads the sensor only when the cache is stale.
+        
+        A failed read is returned with STATUS_ERROR but never cached.
+        """
+        entry = self.get(max_age_ms)
+        if entry is not None:
+            self.hits += 1
+            return entry, True
+        self.misses += 1
+        distance = read_fn()
+        status = STATUS_OK if distance is not None else STATUS_ERROR
+        reading = TOFReading(time.monotonic_ns(), distance, status, time.time())
+        if status == STATUS_OK:
+            self._store(reading, SOURCE_SENSOR)
+        return CachedReading(reading, SOURCE_SENSOR), False
+    
+    def get_status(self) -> Dict[str, Any]:
+        entry = self._entry
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "age_ms": entry.reading.age_ms() if entry else None,
+            "source": entry.source if entry else None
+        }
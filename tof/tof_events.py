@@ -0,0 +1,197 @@
+"""
+TOF Zone Events
+Turns the sample stream into enter/leave events for distance zones
+"""
+
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from tof_sampler import STATUS_OK, TOFReading
+
+DEFAULT_ZONES = "very_close:100,close:300,medium:800,far"
+
+EVENT_ENTER = "enter"
+EVENT_LEAVE = "leave"
+
+
+class ZoneEvent(NamedTuple):
+    kind: str
+    zone: str
+    distance_mm: int
+    monotonic_ns: int
+    timestamp: float
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "event": self.kind,
+            "zone": self.zone,
+            "distance_mm": self.distance_mm,
+            "timestamp": self.timestamp
+        }
+
+
+def parse_zones(text: str):
+    """Parse "very_close:100,close:300,far" into names and upper bounds (mm).
+    
+    Zones are contiguous from 0 mm; each but the last names its exclusive
+    upper bound and the last one is open-ended.
+    """
+    names, bounds = [], []
+    items = [part.strip() for part in text.split(",") if part.strip()]
+    for i, item in enumerate(items):
+        name, _, bound = item.partition(":")
+        if not name or name in names:
+            raise ValueError(f"Invalid or duplicate zone name: '{item}'")
+        names.append(name)
+        if i == len(items) - 1:
+            if bound:
+                raise ValueError(f"The last zone is open-ended and takes no bound: '{item}'")
+            break
+        try:
+            bounds.append(int(bound))
+        except ValueError:
+            raise ValueError(f"Invalid zone '{item}' (expected name:upper_bound_mm)")
+        if bounds[-1] <= (bounds[-2] if len(bounds) > 1 else 0):
+            raise ValueError("Zone bounds must increase")
+    if len(names) < 2:
+        raise ValueError("Zone spec needs at least two zones")
+    return names, bounds
+
+
+def select_band(bounds: List[float], distance: float, current: Optional[int],
+                hysteresis_mm: float) -> int:
+    """Band index for ``distance`` among sorted ``bounds``, staying in
+    ``current`` until the reading is ``hysteresis_mm`` past its edge"""
+    index = bisect.bisect_right(bounds, distance)
+    if current is None or index == current:
+        return index
+    if index > current and distance < bounds[current] + hysteresis_mm:
+        return current
+    if index < current and distance >= bounds[current - 1] - hysteresis_mm:
+        return current
+    return index
+
+
+class ZoneMap:
+    """Contiguous distance zones with a bisect lookup"""
+    
+    def __init__(self, spec: str):
+        self.spec = spec
+        self.names, self.bounds = parse_zones(spec)
+    
+    def index(self, distance: float) -> int:
+        return bisect.bisect_right(self.bounds, distance)
+    
+    def select(self, distance: float, current: Optional[int], hysteresis_mm: float) -> int:
+        return select_band(self.bounds, distance, current, hysteresis_mm)
+    
+    def describe(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": name,
+             "min_mm": self.bounds[i - 1] if i else 0,
+             "max_mm": self.bounds[i] if i < len(self.bounds) else None}
+            for i, name in enumerate(self.names)
+        ]
+
+
+class ZoneDetector:
+    """Debounced zone tracking over sampled readings.
+    
+    A sample only counts towards another zone once it is ``hysteresis_mm``
+    past the boundary of the current zone, and the move happens once samples
+    have pointed at the new zone for ``dwell_ms``. With a zero dwell the
+    events fire on the sample that crossed. Failed reads leave the state
+    alone; out-of-range codes land in the last (farthest) zone.
+    
+    ``update`` runs on the sampler thread and calls each subscriber there
+    with a ``ZoneEvent``: ``leave`` for the old zone, then ``enter`` for the
+    new one. Subscribers must be quick.
+    """
+    
+    def __init__(self, zones: str = DEFAULT_ZONES, hysteresis_mm: float = 20,
+                 dwell_ms: float = 50):
+        if hysteresis_mm < 0 or dwell_ms < 0:
+            raise ValueError("hysteresis and dwell must be >= 0")
+        self.map = ZoneMap(zones)
+        self.names = self.map.names
+        self.hysteresis_mm = hysteresis_mm
+        self.dwell_ms = dwell_ms
+        self._dwell_ns = int(dwell_ms * 1e6)
+        self.current: Optional[int] = None
+        self.entered_at: Optional[float] = None
+        self._pending: Optional[int] = None
+        self._pending_since = 0
+        self.samples = 0
+        self.transitions = 0
+        self.suppressed = 0
+        self.subscriber_errors = 0
+        self.last_event: Optional[ZoneEvent] = None
+        self._subscribers: List[Callable[[ZoneEvent], None]] = []
+        self._lock = threading.Lock()
+    
+    @property
+    def zone(self) -> Optional[str]:
+        return self.names[self.current] if self.current is not None else None
+    
+    def subscribe(self, callback: Callable[[ZoneEvent], None]):
+        with self._lock:
+            # Copy-on-write so update() can iterate without taking the lock
+            self._subscribers = self._subscribers + [callback]
+    
+    def unsubscribe(self, callback: Callable[[ZoneEvent], None]):
+        with self._lock:
+            self._subscribers = [cb for cb in self._subscribers if cb is not callback]
+    
+    def update(self, reading: TOFReading):
+        """Sampler listener"""
+        if reading.status != STATUS_OK or reading.distance_mm is None:
+            return
+        self.samples += 1
+        target = self.map.select(reading.distance_mm, self.current, self.hysteresis_mm)
+        if target == self.current:
+            if self._pending is not None:
+                # Bounced back before the dwell time passed
+                self.suppressed += 1
+                self._pending = None
+            return
+        if target != self._pending:
+            self._pending = target
+            self._pending_since = reading.monotonic_ns
+        if self.current is not None and reading.monotonic_ns - self._pending_since < self._dwell_ns:
+            return
+        
+        previous, self.current, self._pending = self.current, target, None
+        self.entered_at = reading.timestamp
+        self.transitions += 1
+        if previous is not None:
+            self._emit(ZoneEvent(EVENT_LEAVE, self.names[previous], reading.distance_mm,
+                                 reading.monotonic_ns, reading.timestamp))
+        self._emit(ZoneEvent(EVENT_ENTER, self.names[target], reading.distance_mm,
+                             reading.monotonic_ns, reading.timestamp))
+    
+    def _emit(self, event: ZoneEvent):
+        self.last_event = event
+        for callback in self._subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                self.subscriber_errors += 1
+                print(f"TOF zone subscriber failed: {e}")
+    
+    def get_status(self) -> Dict[str, Any]:
+        last_event = self.last_event
+        return {
+            "zone": self.zone,
+            "in_zone_s": time.time() - self.entered_at if self.entered_at else None,
+            "zones": self.map.describe(),
+            "hysteresis_mm": self.hysteresis_mm,
+            "dwell_ms": self.dwell_ms,
+            "samples": self.samples,
+            "transitions": self.transitions,
+            "suppressed": self.suppressed,
+            "subscribers": len(self._subscribers),
+            "subscriber_errors": self.subscriber_errors,
+            "last_event": last_event.to_dict() if last_event else None
+        }
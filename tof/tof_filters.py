@@ -0,0 +1,236 @@
+"""
+TOF Filter Pipeline
+Streaming filter stages (sliding median, EMA, scalar Kalman) applied per sample
+"""
+
+import bisect
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+
+class FilterStage:
+    """Base class: subclasses implement update(); process() adds timing"""
+    
+    kind = "identity"
+    
+    def __init__(self):
+        self.samples = 0
+        self.total_ns = 0
+        self.last_ns = 0
+    
+    def process(self, value: float) -> float:
+        start = time.perf_counter_ns()
+        result = self.update(value)
+        self.last_ns = time.perf_counter_ns() - start
+        self.total_ns += self.last_ns
+        self.samples += 1
+        return result
+    
+    def update(self, value: float) -> float:
+        return value
+    
+    def reset(self):
+        pass
+    
+    def config(self) -> Dict[str, Any]:
+        return {"type": self.kind}
+    
+    def get_status(self) -> Dict[str, Any]:
+        status = self.config()
+        status.update({
+            "samples": self.samples,
+            "avg_ns": self.total_ns / self.samples if self.samples else None,
+            "last_ns": self.last_ns
+        })
+        return status
+
+
+class MedianFilter(FilterStage):
+    """Sliding-window median kept in a sorted list.
+    
+    Each sample does one bisect to remove the expiring value and one insort
+    for the new one, so the search is O(log w) and no re-sorting happens.
+    """
+    
+    kind = "median"
+    
+    def __init__(self, window: int = 5):
+        super().__init__()
+        if window < 1:
+            raise ValueError("median window must be at least 1")
+        self.window = window
+        self._fifo = deque()
+        self._sorted: List[float] = []
+    
+    def update(self, value: float) -> float:
+        if len(self._fifo) == self.window:
+            expired = self._fifo.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, expired)]
+        self._fifo.append(value)
+        bisect.insort(self._sorted, value)
+        n = len(self._sorted)
+        if n % 2:
+            return self._sorted[n // 2]
+        return (self._sorted[n // 2 - 1] + self._sorted[n // 2]) / 2
+    
+    def reset(self):
+        self._fifo.clear()
+        self._sorted = []
+    
+    def config(self) -> Dict[str, Any]:
+        return {"type": self.kind, "window": self.window}
+
+
+class EMAFilter(FilterStage):
+    """Exponential moving average; alpha is the weight of the newest sample"""
+    
+    kind = "ema"
+    
+    def __init__(self, alpha: float = 0.3):
+        super().__init__()
+        if not 0 < alpha <= 1:
+            raise ValueError("ema alpha must be in (0, 1]")
+        self.alpha = alpha
+        self._value: Optional[float] = None
+    
+    def update(self, value: float) -> float:
+        if self._value is None:
+            self._value = value
+        else:
+            self._value += self.alpha * (value - self._value)
+        return self._value
+    
+    def reset(self):
+        self._value = None
+    
+    def config(self) -> Dict[str, Any]:
+        return {"type": self.kind, "alpha": self.alpha}
+
+
+class KalmanFilter(FilterStage):
+    """Scalar Kalman filter with a constant-position model.
+    
+    ``process_variance`` (mm^2 per sample) is how far the target may move
+    between samples; ``measurement_variance`` (mm^2) is the sensor noise.
+    """
+    
+    kind = "kalman"
+    
+    def __init__(self, process_variance: float = 4.0, measurement_variance: float = 100.0):
+        super().__init__()
+        if process_variance <= 0 or measurement_variance <= 0:
+            raise ValueError("kalman variances must be positive")
+        self.process_variance = process_variance
+        self.measurement_variance = measurement_variance
+        self._estimate: Optional[float] = None
+        self._error = 0.0
+    
+    def update(self, value: float) -> float:
+        if self._estimate is None:
+            self._estimate = value
+            self._error = self.measurement_variance
+            return value
+        error = self._error + self.process_variance
+        gain = error / (error + self.measurement_variance)
+        self._estimate += gain * (value - self._estimate)
+        self._error = (1 - gain) * error
+        return self._estimate
+    
+    def reset(self):
+        self._estimate = None
+        self._error = 0.0
+    
+    def config(self) -> Dict[str, Any]:
+        return {
+            "type": self.kind,
+            "process_variance": self.process_variance,
+            "measurement_variance": self.measurement_variance
+        }
+
+
+FILTER_TYPES = {
+    "median": (MedianFilter, ("window",), (int,)),
+    "ema": (EMAFilter, ("alpha",), (float,)),
+    "kalman": (KalmanFilter, ("process_variance", "measurement_variance"), (float, float))
+}
+
+
+def build_stage(spec: Dict[str, Any]) -> FilterStage:
+    """Create a stage from {"type": "median", "window": 5}; raises ValueError"""
+    if not isinstance(spec, dict):
+        raise ValueError(f"Filter stage must be an object: {spec}")
+    kind = spec.get("type")
+    if kind not in FILTER_TYPES:
+        raise ValueError(f"Unknown filter type: {kind} (available: {list(FILTER_TYPES)})")
+    cls, params, casts = FILTER_TYPES[kind]
+    unknown = sorted(set(spec) - set(params) - {"type"})
+    if unknown:
+        raise ValueError(f"Unknown {kind} parameters: {unknown} (available: {list(params)})")
+    kwargs = {}
+    for name, cast in zip(params, casts):
+        if name in spec:
+            try:
+                kwargs[name] = cast(spec[name])
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid {kind} parameter {name}: {spec[name]}")
+    return cls(**kwargs)
+
+
+class FilterChain:
+    """Ordered filter stages run on every valid sample.
+    
+    Invalid samples (failed reads, out-of-range codes) bypass the chain and
+    yield None; after ``reset_after_invalid`` of them in a row the stages
+    are reset so a new target does not blend with stale state.
+    """
+    
+    def __init__(self, stages: List[FilterStage], reset_after_invalid: int = 5):
+        self.stages = stages
+        self.reset_after_invalid = reset_after_invalid
+        self._invalid_run = 0
+    
+    @classmethod
+    def from_config(cls, specs: List[Dict[str, Any]]) -> "FilterChain":
+        if not isinstance(specs, list):
+            raise ValueError("stages must be a list")
+        return cls([build_stage(spec) for spec in specs])
+    
+    @classmethod
+    def parse(cls, text: str) -> "FilterChain":
+        """Parse a compact spec such as "median:5,ema:0.3,kalman:4:100" """
+        specs = []
+        for item in filter(None, (part.strip() for part in text.split(","))):
+            kind, *values = item.split(":")
+            if kind not in FILTER_TYPES:
+                raise ValueError(f"Unknown filter type: {kind}")
+            if len(values) > len(FILTER_TYPES[kind][1]):
+                raise ValueError(f"Too many {kind} parameters: {item}")
+            specs.append(dict(zip(FILTER_TYPES[kind][1], values), type=kind))
+        return cls.from_config(specs)
+    
+    def process(self, value: Optional[float], valid: bool = True) -> Optional[float]:
+        if value is None or not valid:
+            self._invalid_run += 1
+            if self._invalid_run == self.reset_after_invalid:
+                self.reset()
+            return None
+        self._invalid_run = 0
+        for stage in self.stages:
+            value = stage.process(value)
+        return value
+    
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+    
+    def config(self) -> List[Dict[str, Any]]:
+        return [stage.config() for stage in self.stages]
+    
+    def get_status(self, sample_period_s: Optional[float] = None) -> Dict[str, Any]:
+        stages = [stage.get_status() for stage in self.stages]
+        avg_ns = sum(stage["avg_ns"] or 0 for stage in stages)
+        status = {"stages": stages, "total_avg_ns": avg_ns}
+        if sample_period_s:
+            status["budget_used"] = avg_ns / (sample_period_s * 1e9)
+        return status
@@ -0,0 +1,136 @@
+"""
+TOF Reading History
+Fixed-capacity NumPy ring buffer of sampled distance readings
+"""
+
+import bisect
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from tof_sampler import STATUS_OK, TOFReading
+from tof_stats import DEFAULT_STATS, compute_statistics
+
+HISTORY_DTYPE = np.dtype([
+    ("monotonic_ns", np.int64),
+    ("distance_mm", np.int32),
+    ("status", np.uint8),
+    ("filtered_mm", np.float32),
+])
+
+# Readers stay this many records away from the write head, so the sampler has
+# to lap the whole guard band during a single read before it can overwrite a
+# record that is being returned.
+READ_GUARD = 64
+
+
+class TOFHistory:
+    """Preallocated ring buffer filled by the sampler thread.
+    
+    There is exactly one writer (the sampler listener). A record is written
+    before ``_total`` is advanced, so readers only ever index completed
+    records and need no lock.
+    """
+    
+    def __init__(self, capacity: int = 12000):
+        if capacity <= READ_GUARD:
+            raise ValueError(f"capacity must be larger than {READ_GUARD}")
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity, dtype=HISTORY_DTYPE)
+        self._total = 0
+    
+    @property
+    def nbytes(self) -> int:
+        return self._buffer.nbytes
+    
+    def __len__(self) -> int:
+        return min(self._total, self.capacity - READ_GUARD)
+    
+    def append(self, reading: TOFReading):
+        distance = reading.distance_mm if reading.distance_mm is not None else -1
+        filtered = reading.filtered_mm if reading.filtered_mm is not None else np.nan
+        self._buffer[self._total % self.capacity] = (reading.monotonic_ns, distance, reading.status, filtered)
+        self._total += 1
+    
+    def segments(self, seconds: Optional[float] = None) -> List[np.ndarray]:
+        """Return the requested window as at most two views into the buffer, oldest first"""
+        total = self._total
+        count = min(total, self.capacity - READ_GUARD)
+        if count == 0:
+            return []
+        
+        start = (total - count) % self.capacity
+        if start + count <= self.capacity:
+            views = [self._buffer[start:start + count]]
+        else:
+            views = [self._buffer[start:], self._buffer[:start + count - self.capacity]]
+        
+        if seconds is None:
+            return views
+        
+        # Timestamps are monotonic, so the window start is a binary search.
+        # bisect indexes the strided field view directly; np.searchsorted
+        # would first copy it into a contiguous array.
+        cutoff = time.monotonic_ns() - int(seconds * 1e9)
+        for i, view in enumerate(views):
+            times = view["monotonic_ns"]
+            if len(times) and times[-1] >= cutoff:
+                first = bisect.bisect_left(times, cutoff)
+                return [view[first:]] + views[i + 1:]
+        return []
+    
+    def window(self, seconds: Optional[float] = None,
+               max_points: Optional[int] = None) -> List[np.ndarray]:
+        """Like segments(), but strided down to at most max_points records"""
+        views = self.segments(seconds)
+        total = sum(len(v) for v in views)
+        if not max_points or total <= max_points:
+            return views
+        
+        step = math.ceil(total / max_points)
+        strided = []
+        offset = 0
+        for view in views:
+            strided.append(view[offset::step])
+            # Keep the stride phase continuous across the wrap-around point
+            offset = (offset - len(view)) % step
+        return strided
+    
+    def to_dict(self, views: List[np.ndarray]) -> Dict[str, Any]:
+        """Convert window views into JSON-ready columns"""
+        if not views:
+            return {"count": 0, "timestamp": [], "distance_mm": [], "filtered_mm": [], "status": []}
+        
+        records = np.concatenate(views) if len(views) > 1 else views[0]
+        wall_offset = time.time() - time.monotonic_ns() / 1e9
+        timestamps = records["monotonic_ns"] / 1e9 + wall_offset
+        distances = np.where(records["status"] == STATUS_OK, records["distance_mm"], None)
+        filtered = records["filtered_mm"]
+        filtered = np.where(np.isnan(filtered), None, np.round(filtered, 1))
+        return {
+            "count": len(records),
+            "timestamp": timestamps.tolist(),
+            "distance_mm": distances.tolist(),
+            "filtered_mm": filtered.tolist(),
+            "status": records["status"].tolist()
+        }
+    
+    def statistics(self, seconds: Optional[float] = None,
+                   stats: Iterable[str] = DEFAULT_STATS) -> Dict[str, Any]:
+        """Statistics over every record in the window, computed on the columns"""
+        views = self.segments(seconds)
+        if not views:
+            return compute_statistics([], stats=stats)
+        distances = np.concatenate([v["distance_mm"] for v in views])
+        status = np.concatenate([v["status"] for v in views])
+        return compute_statistics(distances, status, stats)
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "size": len(self),
+            "total_appended": self._total,
+            "memory_bytes": self.nbytes
+        }
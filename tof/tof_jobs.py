@@ -0,0 +1,153 @@
+"""
+TOF Sampling Jobs
+Runs multi-reading sampling windows on a bounded worker pool instead of request threads
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from tof_stats import DEFAULT_STATS, compute_statistics
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_CANCELLED = "cancelled"
+JOB_FAILED = "failed"
+
+FINISHED_STATES = (JOB_COMPLETED, JOB_CANCELLED, JOB_FAILED)
+
+
+class SamplingJob:
+    """One read_multiple-style sampling window"""
+    
+    def __init__(self, count: int, interval: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.count = count
+        self.interval = interval
+        self.status = JOB_QUEUED
+        self.readings: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self.attempted = 0
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+    
+    def to_dict(self, include_readings: bool = True,
+                stats: Iterable[str] = DEFAULT_STATS) -> Dict[str, Any]:
+        # attempted is bumped after each append, so read it first
+        attempted = self.attempted
+        readings = list(self.readings)
+        result = {
+            "job_id": self.id,
+            "status": self.status,
+            "count": self.count,
+            "interval": self.interval,
+            "progress": attempted / self.count,
+            "readings_collected": len(readings),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+        if include_readings:
+            result["readings"] = readings
+            result["statistics"] = compute_statistics([r["distance_mm"] for r in readings], stats=stats,
+                                                      failed=max(0, attempted - len(readings)))
+        return result
+
+
+class JobManager:
+    """Bounded pool of sampling workers with cancellable, pollable jobs"""
+    
+    def __init__(self, read_fn: Callable[[], Optional[int]], max_workers: int = 2,
+                 max_pending: int = 16, max_retained: int = 50):
+        self.read_fn = read_fn
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_retained = max_retained
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tof-job")
+        self._jobs: "OrderedDict[str, SamplingJob]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def submit(self, count: int, interval: float) -> Optional[SamplingJob]:
+        """Queue a job; None when too many jobs are already waiting"""
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                return None
+            job = SamplingJob(count, interval)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[SamplingJob]:
+        return self._jobs.get(job_id)
+    
+    def list_jobs(self) -> List[SamplingJob]:
+        with self._lock:
+            return list(self._jobs.values())
+    
+    def cancel(self, job_id: str) -> Optional[SamplingJob]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        with self._lock:
+            # A queued job never reaches a worker loop, so finish it here
+            if job.status == JOB_QUEUED:
+                job.status = JOB_CANCELLED
+                job.finished_at = time.time()
+        return job
+    
+    def _prune(self):
+        """Drop the oldest finished jobs beyond the retention limit"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_retained)]:
+            del self._jobs[job_id]
+    
+    def _run(self, job: SamplingJob):
+        with self._lock:
+            if job.status != JOB_QUEUED:
+                return
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+        try:
+            for i in range(job.count):
+                if job.cancel_event.is_set():
+                    break
+                distance = self.read_fn()
+                if distance is not None:
+                    job.readings.append({
+                        "reading": i + 1,
+                        "distance_mm": distance,
+                        "timestamp": time.time()
+                    })
+                job.attempted = i + 1
+                # Waiting on the event makes cancellation immediate
+                if i < job.count - 1 and job.cancel_event.wait(job.interval):
+                    break
+            job.status = JOB_CANCELLED if job.cancel_event.is_set() else JOB_COMPLETED
+        except Exception as e:
+            job.error = str(e)
+            job.status = JOB_FAILED
+        finally:
+            job.finished_at = time.time()
+    
+    def get_status(self) -> Dict[str, Any]:
+        jobs = self.list_jobs()
+        return {
+            "workers": self.max_workers,
+            "running": sum(1 for job in jobs if job.status == JOB_RUNNING),
+            "queued": sum(1 for job in jobs if job.status == JOB_QUEUED),
+            "retained": len(jobs)
+        }
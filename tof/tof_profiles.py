@@ -0,0 +1,69 @@
+"""
+TOF Ranging Profiles
+Named VL53L0X timing budget presets and per-profile read latency tracking
+"""
+
+from typing import Any, Dict, NamedTuple, Optional
+
+# Fixed per-read cost on top of the timing budget: I2C start/result
+# transactions plus driver overhead at the default 100 kHz bus clock
+READ_OVERHEAD_MS = 2.0
+
+
+class RangingProfile(NamedTuple):
+    name: str
+    timing_budget_us: int
+    signal_rate_limit: float
+    description: str
+    
+    @property
+    def expected_latency_ms(self) -> float:
+        return self.timing_budget_us / 1000 + READ_OVERHEAD_MS
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "timing_budget_us": self.timing_budget_us,
+            "signal_rate_limit": self.signal_rate_limit,
+            "description": self.description,
+            "expected_latency_ms": self.expected_latency_ms
+        }
+
+
+PROFILES = {
+    "fast": RangingProfile("fast", 20000, 0.25, "Lowest latency for proximity reactions"),
+    "balanced": RangingProfile("balanced", 33000, 0.25, "Driver default trade-off"),
+    "accurate": RangingProfile("accurate", 200000, 0.25, "Lowest noise for logging"),
+    "long_range": RangingProfile("long_range", 33000, 0.1, "Accept weaker returns to see further")
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+class LatencyTracker:
+    """Exponentially weighted per-read latency for each profile"""
+    
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha
+        self._stats: Dict[str, Dict[str, Any]] = {}
+    
+    def record(self, profile: str, latency_ms: float):
+        stats = self._stats.get(profile)
+        if stats is None:
+            self._stats[profile] = {"count": 1, "avg_ms": latency_ms, "last_ms": latency_ms}
+            return
+        stats["count"] += 1
+        stats["avg_ms"] += self.alpha * (latency_ms - stats["avg_ms"])
+        stats["last_ms"] = latency_ms
+    
+    def get(self, profile: str) -> Optional[Dict[str, Any]]:
+        stats = self._stats.get(profile)
+        return dict(stats) if stats else None
+
+
+def describe_profiles(tracker: LatencyTracker) -> Dict[str, Any]:
+    """All profiles with their expected and measured latency"""
+    return {
+        name: dict(profile.to_dict(), measured=tracker.get(name))
+        for name, profile in PROFILES.items()
+    }
@@ -0,0 +1,250 @@
+"""
+TOF Sample Recorder
+Append-only binary segment files of fixed-width samples, read back through np.memmap
+"""
+
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tof_sampler import TOFReading
+
+MAGIC = b"TOFREC01"
+# v2 stores monotonic timestamps plus the wall-clock offset in the header;
+# v1 stored wall-clock time, which jumps when NTP steps the clock
+FORMAT_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+SEGMENT_SUFFIX = ".tofrec"
+
+# Fixed part of the header: magic, version, record size, header size, created (ns).
+# JSON metadata follows, padded so records start on a 64-byte boundary.
+HEADER_STRUCT = struct.Struct("<8sHHIq")
+HEADER_ALIGN = 64
+
+# 16 bytes per sample; same layout as struct "<qiHH"
+RECORD_DTYPE = np.dtype([
+    ("timestamp_ns", "<i8"),
+    ("distance_mm", "<i4"),
+    ("status", "<u2"),
+    ("sensor_id", "<u2")
+])
+
+
+def encode_header(metadata: Dict[str, Any], created_ns: int) -> bytes:
+    meta = json.dumps(metadata, separators=(",", ":")).encode()
+    size = HEADER_STRUCT.size + len(meta)
+    header_size = -(-size // HEADER_ALIGN) * HEADER_ALIGN
+    fixed = HEADER_STRUCT.pack(MAGIC, FORMAT_VERSION, RECORD_DTYPE.itemsize, header_size, created_ns)
+    return (fixed + meta).ljust(header_size, b" ")
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    """Parse a segment header; raises ValueError for files that are not segments"""
+    with open(path, "rb") as f:
+        fixed = f.read(HEADER_STRUCT.size)
+        if len(fixed) < HEADER_STRUCT.size:
+            raise ValueError(f"Truncated segment header: {path}")
+        magic, version, record_size, header_size, created_ns = HEADER_STRUCT.unpack(fixed)
+        if magic != MAGIC:
+            raise ValueError(f"Not a TOF recording: {path}")
+        if version not in READABLE_VERSIONS or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"Unsupported recording format v{version}/{record_size}B: {path}")
+        metadata = json.loads(f.read(header_size - HEADER_STRUCT.size).decode().strip() or "{}")
+    return {"header_size": header_size, "created_ns": created_ns, "version": version, "metadata": metadata}
+
+
+def open_segment(path: str) -> Tuple[Dict[str, Any], np.ndarray]:
+    """Map a segment's records without reading or parsing them.
+    
+    A trailing partial record (e.g. from a power cut mid-write) is ignored.
+    """
+    header = read_header(path)
+    count = (os.path.getsize(path) - header["header_size"]) // RECORD_DTYPE.itemsize
+    if count <= 0:
+        return header, np.empty(0, dtype=RECORD_DTYPE)
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode="r",
+                        offset=header["header_size"], shape=(count,))
+    return header, records
+
+
+def wall_time_ns(header: Dict[str, Any], timestamps_ns: np.ndarray) -> np.ndarray:
+    """Unix time (ns) of a segment's record timestamps.
+    
+    Uses the offset between the clocks when the segment was opened; a
+    clock step while it was written is not reflected.
+    """
+    return timestamps_ns + header["metadata"].get("wall_offset_ns", 0)
+
+
+def list_segments(directory: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.endswith(SEGMENT_SUFFIX))
+
+
+def time_slice(records: np.ndarray, start_ns: Optional[int] = None,
+               end_ns: Optional[int] = None) -> np.ndarray:
+    """View of the records in [start_ns, end_ns).
+    
+    Needs timestamp order, which holds per sensor; samples from different
+    sensors may interleave by a few ms, so select one sensor_id first.
+    """
+    timestamps = records["timestamp_ns"]
+    lo = 0 if start_ns is None else int(np.searchsorted(timestamps, start_ns, "left"))
+    hi = len(records) if end_ns is None else int(np.searchsorted(timestamps, end_ns, "left"))
+    return records[lo:hi]
+
+
+class TOFRecorder:
+    """Buffers samples in memory and appends them to disk in batches.
+    
+    ``record`` runs on the sampler thread and only appends a tuple to a
+    deque, so a slow SD card never delays a sensor read. A writer thread
+    drains the queue every ``flush_interval_s`` (or once ``batch_records``
+    are waiting), packs the batch with NumPy and issues one write per batch.
+    If the card stalls long enough for ``max_pending`` samples to pile up,
+    new samples are dropped and counted rather than growing memory.
+    """
+    
+    def __init__(self, directory: str, segment_records: int = 1 << 20,
+                 batch_records: int = 512, flush_interval_s: float = 1.0,
+                 max_pending: int = 100000):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.batch_records = batch_records
+        self.flush_interval_s = flush_interval_s
+        self.max_pending = max_pending
+        self.sensor_names: Dict[int, str] = {0: "primary"}
+        self._pending = deque()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._file = None
+        self.segment_path: Optional[str] = None
+        self._segment_count = 0
+        self._segment_records = 0
+        self.records_written = 0
+        self.bytes_written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+        self.last_batch_ms: Optional[float] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def record(self, reading: TOFReading, sensor_id: int = 0):
+        """Queue one sample; never blocks"""
+        if not self.running:
+            return
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        distance = reading.distance_mm if reading.distance_mm is not None else -1
+        self._pending.append((reading.monotonic_ns, distance, reading.status, sensor_id))
+        if len(self._pending) >= self.batch_records:
+            self._wake.set()
+    
+    def start(self) -> bool:
+        if self.running:
+            return True
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError as e:
+            self.last_error = str(e)
+            return False
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="tof-recorder", daemon=True)
+        self._thread.start()
+        return True
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop and write out everything still queued"""
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+    
+    def _open_segment(self):
+        created_ns = time.time_ns()
+        wall_offset_ns = created_ns - time.monotonic_ns()
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(created_ns / 1e9))
+        self._segment_count += 1
+        self.segment_path = os.path.join(self.directory, f"tof_{stamp}_{created_ns % 10**9:09d}{SEGMENT_SUFFIX}")
+        self._file = open(self.segment_path, "wb")
+        names = {str(sensor_id): name for sensor_id, name in self.sensor_names.items()}
+        self._file.write(encode_header({"sensors": names, "wall_offset_ns": wall_offset_ns}, created_ns))
+        self._segment_records = 0
+    
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+    
+    def _write(self, batch: np.ndarray):
+        start = time.perf_counter()
+        offset = 0
+        while offset < len(batch):
+            if self._file is None:
+                self._open_segment()
+            room = self.segment_records - self._segment_records
+            chunk = batch[offset:offset + room]
+            self._file.write(chunk.tobytes())
+            self._segment_records += len(chunk)
+            offset += len(chunk)
+            if self._segment_records >= self.segment_records:
+                self._close_segment()
+        if self._file is not None:
+            self._file.flush()
+        self.records_written += len(batch)
+        self.bytes_written += batch.nbytes
+        self.batches += 1
+        self.last_batch_ms = (time.perf_counter() - start) * 1000
+    
+    def _drain(self):
+        count = len(self._pending)
+        if not count:
+            return
+        batch = np.array([self._pending.popleft() for _ in range(count)], dtype=RECORD_DTYPE)
+        self._write(batch)
+    
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                self._wake.wait(self.flush_interval_s)
+                self._wake.clear()
+                self._drain()
+            self._drain()
+        except OSError as e:
+            self.last_error = str(e)
+            print(f"TOF recorder stopped: {e}")
+        finally:
+            try:
+                self._close_segment()
+            except OSError as e:
+                self.last_error = str(e)
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "directory": self.directory,
+            "segment": self.segment_path,
+            "segments_opened": self._segment_count,
+            "records_written": self.records_written,
+            "bytes_written": self.bytes_written,
+            "batches": self.batches,
+            "pending": len(self._pending),
+            "dropped": self.dropped,
+            "last_batch_ms": self.last_batch_ms,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,158 @@
+"""
+TOF Trace Replay
+Plays a recorded distance trace back through the TOFSensor interface
+"""
+
+import csv
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from tof_recorder import SEGMENT_SUFFIX, list_segments, open_segment
+from tof_sampler import STATUS_OK
+from tof_virtual import VirtualTOFSensor
+
+# A gap this many times the typical one is a clock jump, not a pause
+MAX_GAP_FACTOR = 10
+
+
+def load_trace(path: str, sensor_id: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Load ``(timestamps_ns, distances_mm)`` from a trace; -1 marks a failed read.
+    
+    ``path`` may be a recorder segment, a directory of segments (played in
+    file order) or a CSV with ``timestamp_s,distance_mm`` rows (an empty
+    distance is a failed read; a header row is skipped).
+    """
+    if os.path.isdir(path) or path.endswith(SEGMENT_SUFFIX):
+        paths = list_segments(path) if os.path.isdir(path) else [path]
+        parts = []
+        for segment in paths:
+            _, records = open_segment(segment)
+            parts.append(records[records["sensor_id"] == sensor_id])
+        records = np.concatenate(parts) if parts else np.empty(0)
+        if not len(records):
+            raise ValueError(f"No samples for sensor {sensor_id} in {path}")
+        distances = np.where(records["status"] == STATUS_OK, records["distance_mm"], -1)
+        return records["timestamp_ns"].astype(np.int64), distances.astype(np.int32)
+    
+    timestamps, distances = [], []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith("#"):
+                continue
+            try:
+                timestamp = float(row[0])
+            except ValueError:
+                continue  # header
+            distance = row[1].strip() if len(row) > 1 else ""
+            timestamps.append(int(timestamp * 1e9))
+            distances.append(int(float(distance)) if distance else -1)
+    if not timestamps:
+        raise ValueError(f"No samples in {path}")
+    return np.array(timestamps, dtype=np.int64), np.array(distances, dtype=np.int32)
+
+
+class ReplayTOFSensor(VirtualTOFSensor):
+    """Serves a recorded trace as if it were the sensor.
+    
+    With ``speed > 0`` the trace plays against the wall clock (2.0 = twice
+    as fast): a read returns the newest sample that is due, or waits for the
+    next one if it was already returned, and samples a slow reader misses
+    are skipped, like a real sensor ranging continuously. With ``speed == 0``
+    every read returns the next sample immediately, so the sequence a
+    consumer sees is exactly reproducible. Ranging mode and profile changes
+    are accepted but do not alter the trace.
+    
+    Gaps that run backwards or exceed ``MAX_GAP_FACTOR`` typical gaps (a
+    wall-clock step in a CSV or v1 recording, or a reboot between segments)
+    are played as one typical gap and counted in ``clock_jumps``.
+    """
+    
+    kind = "replay"
+    
+    def __init__(self, timestamps_ns: np.ndarray, distances: np.ndarray,
+                 speed: float = 1.0, loop: bool = True, source: str = "",
+                 **kwargs):
+        if speed < 0:
+            raise ValueError("replay speed must be >= 0")
+        if len(timestamps_ns) != len(distances) or not len(distances):
+            raise ValueError("trace needs matching, non-empty timestamps and distances")
+        super().__init__(**kwargs)
+        self.source = source
+        self.speed = speed
+        self.loop = loop
+        self._distances = np.asarray(distances, dtype=np.int32)
+        gaps = np.diff(np.asarray(timestamps_ns, dtype=np.int64))
+        gap = max(int(np.median(gaps)), 1) if len(gaps) else int(self.measurement_period_s * 1e9)
+        jumps = (gaps < 0) | (gaps > MAX_GAP_FACTOR * gap)
+        gaps[jumps] = gap
+        self.clock_jumps = int(jumps.sum())
+        self._offsets = np.concatenate(([0], np.cumsum(gaps))).astype(np.int64)
+        # One loop lasts the trace plus one typical sample gap, so the wrap
+        # does not play two samples at once
+        self._loop_ns = int(self._offsets[-1]) + max(gap, 1)
+        self.rewind()
+    
+    @classmethod
+    def from_file(cls, path: str, sensor_id: int = 0, **kwargs) -> "ReplayTOFSensor":
+        timestamps, distances = load_trace(path, sensor_id)
+        return cls(timestamps, distances, source=path, **kwargs)
+    
+    def rewind(self):
+        self._start_ns: Optional[int] = None
+        self._position = -1
+        self.loops = 0
+        self.skipped = 0
+    
+    def _due_ns(self, position: int) -> int:
+        loops, index = divmod(position, len(self._distances))
+        trace_ns = loops * self._loop_ns + int(self._offsets[index])
+        return self._start_ns + int(trace_ns / self.speed)
+    
+    def _position_at(self, now_ns: int) -> int:
+        trace_ns = (now_ns - self._start_ns) * self.speed
+        loops, within = divmod(trace_ns, self._loop_ns)
+        index = int(np.searchsorted(self._offsets, within, "right")) - 1
+        return int(loops) * len(self._distances) + index
+    
+    def _measure(self) -> Optional[int]:
+        if self.speed == 0:
+            position = self._position + 1
+        else:
+            now = time.monotonic_ns()
+            if self._start_ns is None:
+                self._start_ns = now
+            position = self._position_at(now)
+            if position <= self._position:
+                # Caught up with the trace; wait for its next sample
+                position = self._position + 1
+                time.sleep(max(0, self._due_ns(position) - now) / 1e9)
+            else:
+                self.skipped += position - self._position - 1
+        
+        loops, index = divmod(position, len(self._distances))
+        if loops and not self.loop:
+            self.last_error = "Replay trace finished"
+            return None
+        self._position = position
+        self.loops = loops
+        distance = int(self._distances[index])
+        if distance < 0:
+            self.last_error = "Replayed read failure"
+            return None
+        return distance
+    
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "samples": len(self._distances),
+            "duration_s": self._loop_ns / 1e9,
+            "speed": self.speed,
+            "loop": self.loop,
+            "position": max(self._position, 0) % len(self._distances),
+            "loops": self.loops,
+            "skipped": self.skipped,
+            "clock_jumps": self.clock_jumps
+        }
@@ -0,0 +1,166 @@
+"""
+TOF Background Sampler
+Reads the distance sensor on a dedicated thread and publishes the newest sample
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# The VL53L0X reports 8190/8191 when nothing is in range; those codes are
+# not distances and would drag averages and filters towards 8 m
+OUT_OF_RANGE_MM = 8190
+
+
+class TOFReading(NamedTuple):
+    """One published sample. Immutable, so readers never see a half-written value."""
+    monotonic_ns: int
+    distance_mm: Optional[int]
+    status: int
+    timestamp: float
+    filtered_mm: Optional[float] = None
+    
+    def age_ms(self, now_ns: Optional[int] = None) -> float:
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        return (now_ns - self.monotonic_ns) / 1e6
+
+
+class RateMeter:
+    """Measures an event rate over a sliding window of recent events"""
+    
+    def __init__(self, window: int = 50):
+        self._ticks = deque(maxlen=window)
+    
+    def tick(self):
+        self._ticks.append(time.monotonic())
+    
+    @property
+    def rate_hz(self) -> Optional[float]:
+        ticks = list(self._ticks)
+        if len(ticks) < 2 or ticks[-1] == ticks[0]:
+            return None
+        return (len(ticks) - 1) / (ticks[-1] - ticks[0])
+
+
+class TOFSampler:
+    """Samples a TOF sensor at a fixed rate from a single thread.
+    
+    The newest sample lives in ``self._latest``. The sampler thread replaces it
+    with a new ``TOFReading`` object and request handlers only read the
+    reference, so publishing needs no lock: a reference assignment is atomic
+    under the GIL and the tuple itself never changes.
+    
+    With ``rate_hz=None`` the sampler free-runs: it issues the next read as
+    soon as the previous one returns, which suits a sensor in continuous
+    ranging mode whose reads block until a measurement completes.
+    
+    A ``rate_policy`` (see ``AdaptiveRate``) overrides the fixed rate: it
+    sees every sample after the listeners and returns the rate to sample
+    at next. ``rate_hz`` then reports its maximum.
+    """
+    
+    def __init__(self, sensor, rate_hz: Optional[float] = 20.0, filter_chain=None,
+                 rate_policy=None):
+        self.sensor = sensor
+        self.rate_policy = rate_policy
+        self.rate_hz = rate_policy.max_hz if rate_policy else rate_hz
+        # Swapped by reference from request threads; read once per sample
+        self.filter_chain = filter_chain
+        self.rate_meter = RateMeter()
+        self.sample_count = 0
+        self.error_count = 0
+        self.listener_errors = 0
+        self._latest: Optional[TOFReading] = None
+        self._listeners: List[Callable[[TOFReading], None]] = []
+        self._thread = None
+        self._stop_event = threading.Event()
+    
+    @property
+    def latest(self) -> Optional[TOFReading]:
+        return self._latest
+    
+    def add_listener(self, callback: Callable[[TOFReading], None]):
+        """Call ``callback(reading)`` on the sampler thread for every new sample.
+        
+        Listeners must be quick; anything slow belongs on its own thread.
+        """
+        self._listeners = self._listeners + [callback]
+    
+    def remove_listener(self, callback: Callable[[TOFReading], None]):
+        self._listeners = [cb for cb in self._listeners if cb is not callback]
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="tof-sampler", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 2.0):
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+    
+    def _run(self):
+        period_ns = int(1e9 / self.rate_hz) if self.rate_hz else 0
+        next_deadline = time.monotonic_ns()
+        while not self._stop_event.is_set():
+            distance = self.sensor.read_distance()
+            if distance is None:
+                self.error_count += 1
+                status = STATUS_ERROR
+            else:
+                status = STATUS_OK
+            self.sample_count += 1
+            self.rate_meter.tick()
+            filtered = None
+            chain = self.filter_chain
+            if chain is not None:
+                valid = status == STATUS_OK and distance < OUT_OF_RANGE_MM
+                filtered = chain.process(distance, valid)
+            reading = TOFReading(time.monotonic_ns(), distance, status, time.time(), filtered)
+            self._latest = reading
+            for callback in self._listeners:
+                try:
+                    callback(reading)
+                except Exception as e:
+                    self.listener_errors += 1
+                    print(f"TOF sampler listener failed: {e}")
+            if self.rate_policy:
+                period_ns = int(1e9 / self.rate_policy.update(reading))
+            
+            # Schedule against absolute deadlines so the rate does not drift
+            # with read time; if a read overran, restart the schedule from now.
+            next_deadline += period_ns
+            now = time.monotonic_ns()
+            if next_deadline <= now:
+                next_deadline = now
+                continue
+            self._stop_event.wait((next_deadline - now) / 1e9)
+    
+    @property
+    def current_rate_hz(self) -> Optional[float]:
+        return self.rate_policy.rate_hz if self.rate_policy else self.rate_hz
+    
+    def get_status(self) -> Dict[str, Any]:
+        latest = self._latest
+        return {
+            "running": self.running,
+            "rate_hz": self.rate_hz,
+            "current_rate_hz": self.current_rate_hz,
+            "adaptive": self.rate_policy.get_status() if self.rate_policy else None,
+            "effective_rate_hz": self.rate_meter.rate_hz,
+            "sample_count": self.sample_count,
+            "error_count": self.error_count,
+            "listener_errors": self.listener_errors,
+            "latest_age_ms": latest.age_ms() if latest else None
+        }
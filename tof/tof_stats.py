@@ -0,0 +1,76 @@
+"""
+TOF Reading Statistics
+Vectorized summary statistics over distance sample arrays
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from tof_sampler import OUT_OF_RANGE_MM, STATUS_OK
+
+AVAILABLE_STATS = ("min", "max", "avg", "count", "median", "p5", "p95",
+                   "stddev", "mad", "valid", "invalid")
+DEFAULT_STATS = ("min", "max", "avg", "count")
+
+
+def parse_stats(spec: Optional[str]) -> List[str]:
+    """Parse a comma separated stats list; raises ValueError on unknown names"""
+    if not spec:
+        return list(DEFAULT_STATS)
+    if spec == "all":
+        return list(AVAILABLE_STATS)
+    names = [name.strip() for name in spec.split(",") if name.strip()]
+    unknown = [name for name in names if name not in AVAILABLE_STATS]
+    if unknown:
+        raise ValueError(f"Unknown statistics: {unknown}")
+    return names
+
+
+def compute_statistics(distances, status=None,
+                       stats: Iterable[str] = DEFAULT_STATS, failed: int = 0) -> Dict[str, Any]:
+    """Summarize distance samples.
+    
+    ``distances`` may be a NumPy array (e.g. a history window column) or a
+    list that can contain None for failed reads. ``count`` is every sample
+    given. Out-of-range codes (8190/8191), failed reads and samples whose
+    ``status`` is not OK are counted as ``invalid`` and excluded from the
+    value statistics. ``failed`` adds reads the caller dropped before
+    collecting samples; they count as invalid only.
+    """
+    values = np.asarray(distances, dtype=np.float64)
+    valid_mask = np.isfinite(values) & (values >= 0) & (values < OUT_OF_RANGE_MM)
+    if status is not None:
+        valid_mask &= np.asarray(status) == STATUS_OK
+    valid = values[valid_mask]
+    n = len(valid)
+    
+    result: Dict[str, Any] = {}
+    median = None
+    for name in stats:
+        if name == "count":
+            result[name] = len(values)
+        elif name == "valid":
+            result[name] = n
+        elif name == "invalid":
+            result[name] = int(len(values) - n) + failed
+        elif n == 0:
+            result[name] = None
+        elif name == "min":
+            result[name] = int(valid.min())
+        elif name == "max":
+            result[name] = int(valid.max())
+        elif name == "avg":
+            result[name] = float(valid.mean())
+        elif name == "stddev":
+            result[name] = float(valid.std())
+        elif name in ("p5", "p95"):
+            result[name] = float(np.percentile(valid, int(name[1:])))
+        elif name in ("median", "mad"):
+            if median is None:
+                median = np.median(valid)
+            if name == "median":
+                result[name] = float(median)
+            else:
+                result[name] = float(np.median(np.abs(valid - median)))
+    return result
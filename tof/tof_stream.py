@@ -0,0 +1,127 @@
+"""
+TOF Stream Fan-out
+Delivers each sampled reading to many streaming subscribers
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+
+def format_sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Format one Server-Sent Events message"""
+    message = f"data: {json.dumps(data)}\n\n"
+    if event:
+        message = f"event: {event}\n" + message
+    return message
+
+
+class Subscription:
+    """A single subscriber: rate decimation plus a bounded drop-oldest queue"""
+    
+    def __init__(self, max_rate_hz: Optional[float] = None, queue_size: int = 16):
+        self.max_rate_hz = max_rate_hz
+        self.queue_size = queue_size
+        self.delivered = 0
+        self.decimated = 0
+        self.dropped = 0
+        self.closed = False
+        self._interval_ns = int(1e9 / max_rate_hz) if max_rate_hz else 0
+        self._next_ns = 0
+        self._queue = deque(maxlen=queue_size)
+        self._cond = threading.Condition()
+    
+    def offer(self, item: Any, now_ns: int):
+        """Called from the producer thread; never blocks on the consumer"""
+        if self._interval_ns:
+            # Allow 10% early arrival so sampler jitter does not halve the rate
+            if now_ns < self._next_ns - self._interval_ns // 10:
+                self.decimated += 1
+                return
+            # Advance on the schedule, but restart it after a gap in samples
+            if now_ns - self._next_ns >= self._interval_ns:
+                self._next_ns = now_ns
+            self._next_ns += self._interval_ns
+        
+        with self._cond:
+            if len(self._queue) == self.queue_size:
+                self.dropped += 1
+            self._queue.append(item)
+            self._cond.notify()
+    
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Next queued item, or None on timeout or close"""
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            if not self._queue:
+                return None
+            self.delivered += 1
+            return self._queue.popleft()
+    
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "max_rate_hz": self.max_rate_hz,
+            "queue_size": self.queue_size,
+            "queued": len(self._queue),
+            "delivered": self.delivered,
+            "decimated": self.decimated,
+            "dropped": self.dropped
+        }
+
+
+class Broadcaster:
+    """One producer, many subscribers.
+    
+    ``publish`` is called once per item by the producer and hands the same
+    object to every subscriber, so formatting work is done once regardless
+    of how many clients are connected.
+    """
+    
+    def __init__(self, max_subscribers: int = 32):
+        self.max_subscribers = max_subscribers
+        self.published = 0
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+    
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+    
+    def subscribe(self, max_rate_hz: Optional[float] = None,
+                  queue_size: int = 16) -> Optional[Subscription]:
+        """Register a subscriber; None when the subscriber limit is reached"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription(max_rate_hz, queue_size)
+            # Copy-on-write so publish() can iterate without taking the lock
+            self._subscribers = self._subscribers + [subscription]
+            return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscription]
+        subscription.close()
+    
+    def publish(self, item: Any):
+        now_ns = time.monotonic_ns()
+        self.published += 1
+        for subscription in self._subscribers:
+            subscription.offer(item, now_ns)
+    
+    def get_status(self) -> Dict[str, Any]:
+        subscribers = self._subscribers
+        return {
+            "subscribers": len(subscribers),
+            "max_subscribers": self.max_subscribers,
+            "published": self.published,
+            "dropped": sum(s.dropped for s in subscribers)
+        }
@@ -0,0 +1,117 @@
+"""
+Synthetic TOF Sensor
+Hardware-free sensor with seeded noise models and hardware-like read timing
+"""
+
+import math
+import random
+import time
+from typing import Any, Dict, Optional
+
+from tof_sampler import OUT_OF_RANGE_MM
+from tof_virtual import VirtualTOFSensor
+
+
+class SyntheticTOFSensor(VirtualTOFSensor):
+    """Generates distances from a seeded noise model.
+    
+    Each measurement is ``distance_mm`` plus a slow sinusoidal drift of
+    ``drift_mm`` over ``drift_period_s`` and gaussian jitter with standard
+    deviation ``noise_mm``. A fraction ``dropout_rate`` of reads fail
+    (None) and ``out_of_range_rate`` return the VL53L0X out-of-range code.
+    The model advances by one measurement period per read, not by wall
+    time, so the same seed always yields the same sequence.
+    
+    Reads block like the hardware: ``latency_ms`` per single-shot read
+    (default: the profile's timing budget), and in continuous mode a read
+    waits for the back-to-back measurement in flight.
+    """
+    
+    kind = "synthetic"
+    
+    def __init__(self, seed: Optional[int] = None, distance_mm: float = 800,
+                 noise_mm: float = 8.0, drift_mm: float = 200.0, drift_period_s: float = 30.0,
+                 dropout_rate: float = 0.0, out_of_range_rate: float = 0.0,
+                 latency_ms: Optional[float] = None, **kwargs):
+        if not 0 <= dropout_rate <= 1 or not 0 <= out_of_range_rate <= 1:
+            raise ValueError("dropout and out-of-range rates must be within [0, 1]")
+        if noise_mm < 0 or drift_period_s <= 0 or (latency_ms is not None and latency_ms < 0):
+            raise ValueError("noise and latency must be >= 0 and the drift period > 0")
+        self.seed = seed
+        self.distance_mm = distance_mm
+        self.noise_mm = noise_mm
+        self.drift_mm = drift_mm
+        self.drift_period_s = drift_period_s
+        self.dropout_rate = dropout_rate
+        self.out_of_range_rate = out_of_range_rate
+        self.latency_ms = latency_ms
+        self._next_measurement = 0.0
+        super().__init__(**kwargs)
+        self.reset()
+    
+    @property
+    def read_latency_s(self) -> float:
+        if self.latency_ms is None:
+            return self.measurement_period_s
+        return self.latency_ms / 1000
+    
+    def reset(self):
+        """Restart the noise sequence from the seed"""
+        self._rng = random.Random(self.seed)
+        self._model_time_s = 0.0
+        self.measurements = 0
+        self.dropouts = 0
+        self.out_of_range = 0
+    
+    def set_ranging_mode(self, mode: str, inter_measurement_ms: float = 0) -> bool:
+        if not super().set_ranging_mode(mode, inter_measurement_ms):
+            return False
+        self._next_measurement = time.monotonic() + self.read_latency_s
+        return True
+    
+    def _wait(self):
+        if self.ranging_mode == "continuous":
+            # Emulate waiting for the back-to-back measurement to complete
+            now = time.monotonic()
+            if self._next_measurement > now:
+                time.sleep(self._next_measurement - now)
+            self._next_measurement = max(self._next_measurement, now) + self.read_latency_s
+        else:
+            # Emulate a single-shot measurement taking its timing budget
+            time.sleep(self.read_latency_s)
+    
+    def _sample(self) -> Optional[int]:
+        self.measurements += 1
+        self._model_time_s += self.measurement_period_s
+        # Draw every variate on every read so one knob does not shift the
+        # sequence the others produce for a given seed
+        roll = self._rng.random()
+        jitter = self._rng.gauss(0, self.noise_mm)
+        if roll < self.dropout_rate:
+            self.dropouts += 1
+            self.last_error = "Simulated read failure"
+            return None
+        if roll < self.dropout_rate + self.out_of_range_rate:
+            self.out_of_range += 1
+            return OUT_OF_RANGE_MM
+        drift = self.drift_mm * math.sin(2 * math.pi * self._model_time_s / self.drift_period_s)
+        return int(min(OUT_OF_RANGE_MM - 1, max(0, round(self.distance_mm + drift + jitter))))
+    
+    def _measure(self) -> Optional[int]:
+        self._wait()
+        return self._sample()
+    
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "seed": self.seed,
+            "distance_mm": self.distance_mm,
+            "noise_mm": self.noise_mm,
+            "drift_mm": self.drift_mm,
+            "drift_period_s": self.drift_period_s,
+            "dropout_rate": self.dropout_rate,
+            "out_of_range_rate": self.out_of_range_rate,
+            "latency_ms": self.read_latency_s * 1000,
+            "measurements": self.measurements,
+            "dropouts": self.dropouts,
+            "out_of_range": self.out_of_range
+        }
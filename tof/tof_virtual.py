@@ -0,0 +1,111 @@
+"""
+Virtual TOF Sensors
+Base class for hardware-free sensors that behave like TOFSensor
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+from i2c_bus import I2CBusManager
+from tof_profiles import DEFAULT_PROFILE, PROFILES, LatencyTracker
+from tof_sampler import RateMeter
+from tof_stats import DEFAULT_STATS, compute_statistics
+
+
+class VirtualTOFSensor:
+    """Drop-in for TOFSensor wherever the server uses one.
+    
+    Subclasses implement ``_measure()``, which returns a distance in mm or
+    None for a failed read and may block to model measurement time. Reads go
+    through an ``I2CBusManager`` like the hardware sensor, so coalescing,
+    latency tracking and rate metering behave the same.
+    """
+    
+    kind = "virtual"
+    
+    def __init__(self, ranging_mode: str = "single", inter_measurement_ms: float = 0,
+                 profile: str = DEFAULT_PROFILE):
+        self.is_initialized = True
+        self.last_reading = None
+        self.last_error = None
+        self.ranging_mode = "single"
+        self.inter_measurement_ms = 0
+        self.profile = DEFAULT_PROFILE
+        self.rate_meter = RateMeter()
+        self.latency = LatencyTracker()
+        self.bus = I2CBusManager()
+        self.apply_profile(profile)
+        self.set_ranging_mode(ranging_mode, inter_measurement_ms)
+    
+    @property
+    def measurement_period_s(self) -> float:
+        return PROFILES[self.profile].timing_budget_us / 1e6
+    
+    def set_ranging_mode(self, mode: str, inter_measurement_ms: float = 0) -> bool:
+        if mode not in ("single", "continuous"):
+            return False
+        self.ranging_mode = mode
+        self.inter_measurement_ms = max(0, inter_measurement_ms)
+        return True
+    
+    def apply_profile(self, name: str) -> bool:
+        if name not in PROFILES:
+            return False
+        self.profile = name
+        return True
+    
+    def _measure(self) -> Optional[int]:
+        raise NotImplementedError
+    
+    def _read_range(self) -> Optional[int]:
+        start = time.perf_counter()
+        distance = self._measure()
+        self.latency.record(self.profile, (time.perf_counter() - start) * 1000)
+        self.rate_meter.tick()
+        return distance
+    
+    def read_distance(self) -> Optional[int]:
+        distance = self.bus.read("range", self._read_range)
+        if distance is not None:
+            self.last_reading = distance
+        return distance
+    
+    def describe(self) -> Dict[str, Any]:
+        """Subclass-specific status"""
+        return {}
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "initialized": self.is_initialized,
+            "hardware_available": False,
+            "virtual": dict(self.describe(), kind=self.kind),
+            "last_reading": self.last_reading,
+            "last_error": self.last_error,
+            "ranging_mode": self.ranging_mode,
+            "inter_measurement_ms": self.inter_measurement_ms,
+            "effective_sample_rate_hz": self.rate_meter.rate_hz,
+            "profile": self.profile,
+            "timestamp": time.time()
+        }
+    
+    def read_multiple(self, count: int = 10, interval: float = 0.1,
+                      stats=DEFAULT_STATS) -> Dict[str, Any]:
+        readings = []
+        start_time = time.time()
+        
+        for i in range(count):
+            distance = self.read_distance()
+            if distance is not None:
+                readings.append({
+                    "reading": i + 1,
+                    "distance_mm": distance,
+                    "timestamp": time.time()
+                })
+            time.sleep(interval)
+        
+        distances = [r["distance_mm"] for r in readings]
+        return {
+            "readings": readings,
+            "statistics": compute_statistics(distances, stats=stats, failed=count - len(readings)),
+            "duration_seconds": time.time() - start_time
+        }
@@ -0,0 +1,297 @@
+"""
+WebSocket Control Channel
+Multiplexes TOF telemetry pushes and LED commands over one persistent connection
+
+Runs its own asyncio loop on a background thread inside the API server process,
+so it shares the TOF sampler and LED controller instances used by Flask.
+
+Client -> server (JSON text frames, "id" is echoed back in the reply):
+    {"id": 1, "type": "expression", "expression": "happy"}
+    {"id": 2, "type": "blink", "base_expression": "normal", "duration": 0.15}
+    {"id": 3, "type": "animate", "expressions": ["normal", "happy"], "duration": 1.0, "loop": true}
+    {"id": 3, "type": "animate", "keyframes": [{"expression": "happy", "duration": 0.5}], "fps": 30}
+    {"id": 4, "type": "stop"}
+    {"id": 5, "type": "subscribe", "rate_hz": 10}
+    {"id": 6, "type": "unsubscribe"}
+    {"id": 7, "type": "ping", "client_time": 1700000000.0}
+    {"id": 8, "type": "stats"}
+
+Server -> client:
+    {"type": "ack", "id": 1, "command": "expression", "success": true, "server_ms": 0.3}
+    {"type": "error", "id": 1, "error": "..."}
+    {"type": "tof", "distance_mm": 412, "filtered_mm": 409.5, "status": 0, "timestamp": 1700000000.0}
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import websockets
+
+from display_actor import blink_duration
+from led_timeline import timeline_from_request
+from tof_stream import Subscription
+
+
+class LatencyStats:
+    """Running latency summary for one command type"""
+    
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = None
+    
+    def add(self, value_ms: float):
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+        self.last_ms = value_ms
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": self.total_ms / self.count if self.count else None,
+            "max_ms": self.max_ms if self.count else None,
+            "last_ms": self.last_ms
+        }
+
+
+class ClientConnection:
+    """Per-connection telemetry subscription state.
+    
+    Rate decimation and the drop-oldest queue are the SSE stream's
+    ``Subscription``; both are driven from the event loop thread, which
+    wakes the push task through an ``asyncio.Event``.
+    """
+    
+    def __init__(self, websocket, queue_size: int = 16):
+        self.websocket = websocket
+        self.queue_size = queue_size
+        self.subscription: Optional[Subscription] = None
+        self.rtt = LatencyStats()
+        self._ready = asyncio.Event()
+    
+    @property
+    def dropped(self) -> int:
+        return self.subscription.dropped if self.subscription else 0
+    
+    def subscribe(self, rate_hz: Optional[float] = None):
+        self.subscription = Subscription(rate_hz, self.queue_size)
+    
+    def unsubscribe(self):
+        self.subscription = None
+    
+    def offer(self, message: str, now_ns: int):
+        if self.subscription is None:
+            return
+        self.subscription.offer(message, now_ns)
+        self._ready.set()
+    
+    async def next_message(self) -> str:
+        while True:
+            subscription = self.subscription
+            message = subscription.get(0) if subscription else None
+            if message is not None:
+                return message
+            self._ready.clear()
+            await self._ready.wait()
+
+
+class WebSocketServer:
+    """Serves the control/telemetry channel next to the Flask app"""
+    
+    def __init__(self, led_controller, tof_sampler=None, host: str = "0.0.0.0",
+                 port: int = 8765, ping_interval: float = 5.0):
+        self.led_controller = led_controller
+        self.tof_sampler = tof_sampler
+        self.host = host
+        self.port = port
+        self.ping_interval = ping_interval
+        self.latency = {}
+        self.rtt = LatencyStats()
+        self._clients = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread = None
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._run, name="ws-server", daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        if self.tof_sampler:
+            self.tof_sampler.add_listener(self._on_reading)
+        self._loop.run_until_complete(self._serve())
+    
+    async def _serve(self):
+        async with websockets.serve(self._handle, self.host, self.port):
+            await asyncio.Future()
+    
+    def _on_reading(self, reading):
+        """Sampler-thread listener: hand the reading to the event loop"""
+        if self._clients and self._loop:
+            self._loop.call_soon_threadsafe(self._fan_out, reading)
+    
+    def _fan_out(self, reading):
+        message = json.dumps({
+            "type": "tof",
+            "distance_mm": reading.distance_mm,
+            "filtered_mm": reading.filtered_mm,
+            "status": reading.status,
+            "timestamp": reading.timestamp
+        })
+        now_ns = time.monotonic_ns()
+        for client in self._clients:
+            client.offer(message, now_ns)
+    
+    async def _handle(self, websocket):
+        client = ClientConnection(websocket)
+        self._clients.add(client)
+        tasks = [
+            asyncio.ensure_future(self._push_telemetry(client)),
+            asyncio.ensure_future(self._measure_rtt(client))
+        ]
+        try:
+            async for raw in websocket:
+                reply = await self._dispatch(client, raw)
+                await websocket.send(json.dumps(reply))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._clients.discard(client)
+            for task in tasks:
+                task.cancel()
+    
+    async def _push_telemetry(self, client: ClientConnection):
+        try:
+            while True:
+                message = await client.next_message()
+                await client.websocket.send(message)
+        except websockets.ConnectionClosed:
+            pass
+    
+    async def _measure_rtt(self, client: ClientConnection):
+        """Time a protocol-level ping/pong so transport latency is visible per client"""
+        try:
+            while True:
+                await asyncio.sleep(self.ping_interval)
+                start = time.perf_counter()
+                pong_waiter = await client.websocket.ping()
+                await pong_waiter
+                rtt_ms = (time.perf_counter() - start) * 1000
+                client.rtt.add(rtt_ms)
+                self.rtt.add(rtt_ms)
+        except websockets.ConnectionClosed:
+            pass
+    
+    async def _dispatch(self, client: ClientConnection, raw) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            message = json.loads(raw)
+        except (TypeError, ValueError):
+            return {"type": "error", "id": None, "error": "Invalid JSON"}
+        if not isinstance(message, dict):
+            return {"type": "error", "id": None, "error": "Expected a JSON object"}
+        
+        command = message.get("type")
+        handler = getattr(self, f"_cmd_{command}", None) if isinstance(command, str) else None
+        if handler is None:
+            return {"type": "error", "id": message.get("id"), "error": f"Unknown command: {command}"}
+        
+        try:
+            reply = await handler(client, message)
+        except Exception as e:
+            reply = {"success": False, "error": str(e)}
+        
+        server_ms = (time.perf_counter() - start) * 1000
+        self.latency.setdefault(command, LatencyStats()).add(server_ms)
+        reply.update({"type": "ack", "id": message.get("id"), "command": command, "server_ms": server_ms})
+        return reply
+    
+    def _check_expressions(self, expressions) -> Optional[Dict[str, Any]]:
+        invalid = [e for e in expressions if e not in self.led_controller.expressions]
+        if invalid:
+            return {
+                "success": False,
+                "error": f"Unknown expressions: {invalid}",
+                "available": list(self.led_controller.expressions.keys())
+            }
+        return None
+    
+    # LED calls only queue a command for the display thread, so they run inline
+    async def _cmd_expression(self, client, message):
+        expression = message.get("expression", "normal")
+        error = self._check_expressions([expression])
+        if error:
+            return error
+        success = self.led_controller.display_expression(expression)
+        return {"success": success, "expression": expression}
+    
+    async def _cmd_blink(self, client, message):
+        base_expression = message.get("base_expression")
+        duration = blink_duration(message.get("duration", 0.15))
+        success = self.led_controller.blink(base_expression, duration)
+        return {"success": success, "duration": duration}
+    
+    async def _cmd_animate(self, client, message):
+        try:
+            timeline, start_at = timeline_from_request(message, self.led_controller.expressions)
+        except ValueError as e:
+            return {"success": False, "error": str(e), "available": list(self.led_controller.expressions.keys())}
+        success = self.led_controller.play_timeline(timeline, start_at)
+        return {
+            "success": success,
+            "expressions": [keyframe.expression for keyframe in timeline.keyframes],
+            "duration": message.get("duration", 1.0) if "keyframes" not in message else None,
+            "loop": timeline.loop,
+            "timeline": timeline.describe(),
+            "start_at": start_at
+        }
+    
+    async def _cmd_stop(self, client, message):
+        self.led_controller.stop_current_animation()
+        return {"success": True}
+    
+    async def _cmd_subscribe(self, client, message):
+        if not self.tof_sampler or not self.tof_sampler.running:
+            return {"success": False, "error": "TOF sampler not running"}
+        rate_hz = message.get("rate_hz")
+        if rate_hz:
+            rate_hz = max(0.1, min(float(rate_hz), self.tof_sampler.rate_hz or float(rate_hz)))
+        client.subscribe(rate_hz or None)
+        return {"success": True, "rate_hz": rate_hz or self.tof_sampler.rate_meter.rate_hz}
+    
+    async def _cmd_unsubscribe(self, client, message):
+        client.unsubscribe()
+        return {"success": True}
+    
+    async def _cmd_ping(self, client, message):
+        # client_time is echoed so the client can compute its own round trip
+        return {"success": True, "client_time": message.get("client_time"), "server_time": time.time()}
+    
+    async def _cmd_stats(self, client, message):
+        return {"success": True, "rtt": client.rtt.to_dict(), "dropped": client.dropped,
+                "latency": self._latency_summary()}
+    
+    def _latency_summary(self) -> Dict[str, Any]:
+        # Copy first: the event loop may add a command type while Flask reads
+        return {name: stats.to_dict() for name, stats in list(self.latency.items())}
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "port": self.port,
+            "clients": len(self._clients),
+            "rtt": self.rtt.to_dict(),
+            "latency": self._latency_summary()
+        }